@@ -4,17 +4,28 @@ from google.adk.agents import LlmAgent
 from google.adk.tools.openapi_tool.openapi_spec_parser import OpenAPIToolset
 
 OPENAPI_SPEC_URL: str = f"{os.getenv('MCP_SERVER_HOST')}/openapi.json"
+OPENAPI_SPEC_FILE: str | None = os.getenv('OPENAPI_SPEC_FILE')
 LLM_MODEL: str = 'gemini-2.5-flash'
 AGENT_NAME: str = 'user_management_agent'
 AGENT_INSTRUCTION: str = 'You can manage user data by calling the available tools.'
 DEFAULT_AGENT_INSTRUCTION: str = 'The user management tools are unavailable. Please check the server status.'
 
-try:
-    response = requests.get(OPENAPI_SPEC_URL)
-    response.raise_for_status()
-    openapi_spec_content = response.text
-except requests.exceptions.RequestException:
-    openapi_spec_content = None
+openapi_spec_content = None
+if OPENAPI_SPEC_FILE:
+    # Written by `python -m src.manifest`; no server round trip on start
+    try:
+        with open(OPENAPI_SPEC_FILE) as file:
+            openapi_spec_content = file.read()
+    except OSError:
+        openapi_spec_content = None
+
+if not openapi_spec_content:
+    try:
+        response = requests.get(OPENAPI_SPEC_URL)
+        response.raise_for_status()
+        openapi_spec_content = response.text
+    except requests.exceptions.RequestException:
+        openapi_spec_content = None
 
 if openapi_spec_content:
     root_agent = LlmAgent(
@@ -0,0 +1,84 @@
+"""Response compression benchmark: CPU cost against bytes saved
+
+Compresses the bodies the API actually sends (a single user, get_users
+pages of 5 and --rows users, and the NDJSON export of --rows users streamed
+in USERS_EXPORT_CHUNK_ROWS chunks, flushed per chunk as CompressionMiddleware
+does) with every available encoder at a few levels, and prints the CPU time,
+compressed size and ratio of each; the middleware uses level 1 of each
+encoder. `break-even` is the link bandwidth below which compressing is faster
+end to end than sending the identity body: the bytes saved divided by the CPU
+time spent.
+
+    python -m benchmarks.compression [--rows N] [--repeat N]
+
+br and zstd are skipped unless the brotli and zstandard packages are installed.
+"""
+import time
+import argparse
+from typing import Callable, Dict, List, Tuple
+from benchmarks.serialize_users import make_rows
+from src.helpers.common import json_dumps
+from src.helpers.responses import FastJSONResponse
+from src.libs.compression import ENCODERS, GZIP, BROTLI, ZSTD, GzipEncoder, BrotliEncoder, ZstdEncoder
+from src.constants import USERS_EXPORT_CHUNK_ROWS
+
+LEVELS: Dict[str, Tuple[Callable, Tuple[int, ...]]] = {
+    GZIP: (GzipEncoder, (1, 6, 9)),
+    BROTLI: (BrotliEncoder, (1, 4, 6)),
+    ZSTD: (ZstdEncoder, (1, 3, 9))
+}
+
+def bodies(rows_count: int) -> Dict[str, List[bytes]]:
+    """Response bodies as the list of chunks the app sends for each
+    """
+    rows: list = [dict(row) for row in make_rows(rows_count)]
+    lines: List[bytes] = [json_dumps(row) for row in rows]
+    export: List[bytes] = [
+        b'\n'.join(lines[index:index + USERS_EXPORT_CHUNK_ROWS]) + b'\n'
+        for index in range(0, len(lines), USERS_EXPORT_CHUNK_ROWS)
+    ]
+    return {
+        'get_user': [FastJSONResponse(content={'status': True, 'message': [], 'response': rows[:1]}).body],
+        'get_users (5 rows)': [FastJSONResponse(content={'status': True, 'message': [], 'response': rows[:5]}).body],
+        f'get_users ({rows_count} rows)': [FastJSONResponse(content={'status': True, 'message': [], 'response': rows}).body],
+        f'export ({rows_count} rows, {len(export)} chunks)': export
+    }
+
+def compress(encoder: Callable, level: int, chunks: List[bytes]) -> bytes:
+    """Compress chunks as one streamed response
+    """
+    stream = encoder(level)
+    *head, last = chunks
+    return b''.join([stream.compress(chunk) for chunk in head] + [stream.finish(last)])
+
+def measure(encoder: Callable, level: int, chunks: List[bytes], repeat: int) -> Tuple[float, int]:
+    """Best of `repeat` runs in milliseconds, and the compressed size
+    """
+    timings: list = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size: int = len(compress(encoder, level, chunks))
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1e3, size
+
+def main(rows_count: int, repeat: int):
+    print(f"best of {repeat} runs; encoders available: {', '.join(ENCODERS)}")
+    for name, chunks in bodies(rows_count).items():
+        identity: int = sum(map(len, chunks))
+        print(f"\n{name}: {identity} bytes")
+        print(f"{'encoding':<10}{'level':>6}{'cpu ms':>10}{'bytes':>10}{'ratio':>8}{'break-even':>16}")
+        for encoding, (encoder, levels) in LEVELS.items():
+            if encoding not in ENCODERS:
+                continue
+            for level in levels:
+                elapsed, size = measure(encoder, level, chunks, repeat)
+                saved_mbit: float = (identity - size) * 8 / 1e6
+                break_even: str = f'{saved_mbit / (elapsed / 1e3):.0f} Mbit/s' if size < identity else 'never'
+                print(f"{encoding:<10}{level:>6}{elapsed:>10.3f}{size:>10}{identity / size:>8.1f}{break_even:>16}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    arguments = parser.parse_args()
+    main(arguments.rows, arguments.repeat)
@@ -0,0 +1,227 @@
+"""In-memory stand-in for CockroachDBClient
+
+Implements the UserDAL statements against a dict of users so the HTTP and
+MCP stacks can be load tested without a database. An optional per-query
+delay models the network round trip to the cluster. Like the schema,
+usernames and email addresses are unique: a statement that would break that
+raises asyncpg.UniqueViolationError without changing any row.
+"""
+import uuid
+import asyncio
+import asyncpg
+from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from src.models import user_dal
+from src.libs.db_client import SharedQueries
+
+COLUMNS: tuple = ('id', 'username', 'email_address', 'created_at', 'updated_at')
+
+class FakeConnection:
+    """Connection handed to transaction callbacks
+    """
+    @asynccontextmanager
+    async def transaction(self):
+        """Savepoints are no-ops
+        """
+        yield self
+
+class FakeCockroachDBClient(SharedQueries):
+    """CockroachDBClient replacement backed by a dict of users
+
+    Coalescing and batching come from SharedQueries, as in CockroachDBClient.
+    """
+    def __init__(self, users: int = 1000, latency: float = 0.0, coalesce_reads: bool = False,
+                 batch_window: float = 0.0, batch_max_size: int = 1, write_batch_interval: float = 0.0,
+                 write_batch_max_size: int = 1, write_queue_size: int = 1):
+        """Seed `users` active users; every query waits `latency` seconds
+        """
+        super().__init__(
+            coalesce_reads=coalesce_reads, batch_window=batch_window, batch_max_size=batch_max_size,
+            write_batch_interval=write_batch_interval, write_batch_max_size=write_batch_max_size,
+            write_queue_size=write_queue_size
+        )
+        self.latency = latency
+        self.statements.update(user_dal.UserDAL.STATEMENTS)
+        self.users: Dict[uuid.UUID, Dict] = {}
+        self.queries: int = 0
+        created_at = datetime(2025, 1, 1)
+        for index in range(users):
+            self.insert(f'seed{index}', f'seed{index}@example.com', True, created_at + timedelta(seconds=index))
+        self.handlers: Dict[str, Callable] = {
+            user_dal.NEW_USER_STMT: self.new_user,
+            user_dal.GET_USER_STMT: self.get_user,
+            user_dal.GET_USERS_STMT: self.get_users,
+            user_dal.GET_USERS_AFTER_STMT: self.get_users_after,
+            user_dal.EXPORT_USERS_STMT: self.export_users,
+            user_dal.GET_USERS_BY_IDS_STMT: self.get_users_by_ids,
+            user_dal.UPDATE_USER_STMT: self.update_user,
+            user_dal.DELETE_USER_STMT: self.delete_user,
+            user_dal.NEW_USERS_STMT: self.new_users,
+            user_dal.UPDATE_USERS_STMT: self.update_users,
+            user_dal.DELETE_USERS_STMT: self.delete_users
+        }
+
+    def insert(self, username: str, email_address: str, active: bool, created_at: Optional[datetime] = None) -> Dict:
+        """Insert a user row
+        """
+        created_at = created_at or datetime.now()
+        row: Dict = {
+            'id': uuid.uuid4(),
+            'username': username,
+            'email_address': email_address,
+            'created_at': created_at,
+            'updated_at': created_at,
+            'active': active
+        }
+        self.users[row['id']] = row
+        return row
+
+    def public(self, row: Dict) -> Dict:
+        """Row as returned by the users SELECT list
+        """
+        return {column: row[column] for column in COLUMNS}
+
+    def ordered(self, active: bool) -> List[Dict]:
+        """Users with the given active flag, ordered by (created_at, id)
+        """
+        rows = [row for row in self.users.values() if row['active'] == active]
+        rows.sort(key=lambda row: (row['created_at'], row['id']))
+        return rows
+
+    def active_ids(self) -> List[uuid.UUID]:
+        """Ids of active users, in creation order
+        """
+        return [row['id'] for row in self.ordered(True)]
+
+    def taken(self, column: str, value: str, id: Optional[uuid.UUID] = None) -> bool:
+        """Whether a user other than id has the value in a unique column
+        """
+        return any(row[column] == value and row['id'] != id for row in self.users.values())
+
+    def matches(self, id, active: bool) -> bool:
+        """Whether the user exists with the given active flag
+        """
+        row = self.users.get(uuid.UUID(str(id)))
+        return row is not None and row['active'] == active
+
+    def check_unique(self, values: List[Tuple[Optional[uuid.UUID], str, str]]):
+        """Raise UniqueViolationError when a (id, column, value) write would duplicate a username or email address
+        """
+        written: Dict[Tuple[str, str], Optional[uuid.UUID]] = {}
+        for id, column, value in values:
+            if self.taken(column, value, id) or written.get((column, value), id) != id:
+                raise asyncpg.UniqueViolationError(f'duplicate key value violates unique constraint "users_{column}_key"')
+            written[(column, value)] = id
+
+    def new_user(self, username, email_address, active) -> List[Dict]:
+        self.check_unique([(None, 'username', username), (None, 'email_address', email_address)])
+        return [self.public(self.insert(username, email_address, active))]
+
+    def get_user(self, id, active, limit) -> List[Dict]:
+        row = self.users.get(uuid.UUID(str(id)))
+        return [self.public(row)] if row and row['active'] == active else []
+
+    def get_users(self, active, limit, offset) -> List[Dict]:
+        return [self.public(row) for row in self.ordered(active)[offset:offset + limit]]
+
+    def get_users_after(self, active, created_at, id, limit) -> List[Dict]:
+        rows = [row for row in self.ordered(active) if (row['created_at'], row['id']) > (created_at, id)]
+        return [self.public(row) for row in rows[:limit]]
+
+    def export_users(self, active, limit) -> List[Dict]:
+        return [self.public(row) for row in self.ordered(active)[:limit]]
+
+    def get_users_by_ids(self, ids, active) -> List[Dict]:
+        rows = [self.users.get(uuid.UUID(str(id))) for id in ids]
+        return [self.public(row) for row in rows if row and row['active'] == active]
+
+    def update_user(self, id, email_address, active) -> List[Dict]:
+        if not self.matches(id, active):
+            return []
+        self.check_unique([(uuid.UUID(str(id)), 'email_address', email_address)])
+        row = self.users[uuid.UUID(str(id))]
+        row.update(email_address=email_address, updated_at=datetime.now())
+        return [self.public(row)]
+
+    def delete_user(self, active, id) -> List:
+        row = self.users.get(uuid.UUID(str(id)))
+        if row:
+            row['active'] = active
+        return []
+
+    def new_users(self, usernames, email_addresses, actives) -> List[Dict]:
+        rows: List = []
+        for username, email_address, active in zip(usernames, email_addresses, actives):
+            # ON CONFLICT DO NOTHING
+            if not self.taken('username', username) and not self.taken('email_address', email_address):
+                rows.append(self.public(self.insert(username, email_address, active)))
+        return rows
+
+    def update_users(self, ids, email_addresses, active) -> List[Dict]:
+        self.check_unique([(uuid.UUID(str(id)), 'email_address', email_address)
+                           for id, email_address in zip(ids, email_addresses) if self.matches(id, active)])
+        rows: List = []
+        for id, email_address in zip(ids, email_addresses):
+            rows.extend(self.update_user(id, email_address, active))
+        return rows
+
+    def delete_users(self, active, ids, expected_active) -> List[Dict]:
+        deleted: List = []
+        for id in ids:
+            row = self.users.get(uuid.UUID(str(id)))
+            if row and row['active'] == expected_active:
+                row['active'] = active
+                deleted.append({'id': row['id']})
+        return deleted
+
+    async def run(self, query: str, *args) -> List[Dict]:
+        """Wait the simulated round trip and run a statement
+        """
+        self.queries += 1
+        await asyncio.sleep(self.latency)
+        return self.handlers[query](*args)
+
+    async def connect(self):
+        """Nothing to connect
+        """
+
+    async def disconnect(self):
+        """Commit queued writes
+        """
+        await self.close_coalescers()
+
+    async def warm_up(self):
+        """Nothing to warm up
+        """
+
+    def start(self):
+        """Nothing to start
+        """
+
+    def register_statements(self, statements: Dict):
+        """Statements are dispatched by name
+        """
+
+    async def fetch(self, conn: FakeConnection, query: str, *args) -> List[Dict]:
+        return await self.run(query, *args)
+
+    async def read(self, query: str, *args, follower_read: bool = False) -> List[Dict]:
+        return await self.run(query, *args)
+
+    async def write(self, query: str, *args) -> List[Dict]:
+        return await self.run(query, *args)
+
+    async def stream_read(self, query: str, *args, follower_read: bool = False, **kwargs) -> AsyncIterator:
+        for row in await self.run(query, *args):
+            yield row
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield FakeConnection()
+
+    async def write_transaction(self, name: str, callback: Callable[[FakeConnection], Awaitable]) -> Any:
+        return await callback(FakeConnection())
+
+    def stats(self) -> Dict:
+        return {'fake': True, 'users': len(self.users), 'queries': self.queries, **self.sharing_stats()}
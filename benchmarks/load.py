@@ -0,0 +1,260 @@
+"""REST and MCP load benchmark
+
+Drives every operation in USER_OPERATIONS and STATUS_OPERATIONS through the
+REST routes and through the FastMCP streamable HTTP transport (/mcp/mcp/mcp),
+and prints p50/p95/p99 latency (ms) and throughput (req/s) per transport and
+operation as JSON.
+
+By default the app runs in process against FakeCockroachDBClient, so the
+numbers cover routing, validation, serialization and the MCP proxy without a
+database. Pass --url to load a running server instead; write operations then
+hit its database, so point it at a disposable one.
+
+    python -m benchmarks.load [--transports rest mcp] [--operations get_user ...]
+                              [--requests 500] [--concurrency 16] [--db-latency 0.001] [--hot-users 4]
+                              [--output run.json] [--baseline previous.json]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import itertools
+import statistics
+from contextlib import AsyncExitStack
+from typing import Callable, Dict, List, Optional, Tuple
+import httpx
+from fastmcp import Client
+from fastmcp.client.transports import StreamableHttpTransport
+from src.constants import USER_OPERATIONS, STATUS_OPERATIONS, GET_API_STATUS_OP_ID, \
+    GET_USER_OP_ID, GET_USERS_OP_ID, GET_USERS_BY_IDS_OP_ID, POST_USER_SIGNUP_OP_ID, PUT_USER_OP_ID, \
+    DELETE_USER_OP_ID, POST_USERS_BATCH_OP_ID, PUT_USERS_BATCH_OP_ID, DELETE_USERS_BATCH_OP_ID, EXPORT_USERS_OP_ID
+
+IN_PROCESS_URL: str = 'http://benchmark'
+MCP_PATH: str = '/mcp/mcp/mcp'
+BATCH_SIZE: int = 10
+PAGE_SIZE: int = 20
+EXPORT_SIZE: int = 100
+
+class Workload:
+    """Request arguments for each operation, rotating over known user ids
+    """
+    def __init__(self, read_ids: List[str], write_ids: List[str]):
+        """Reads use read_ids; updates and deletes use write_ids so reads keep finding active users
+        """
+        self.read_ids = itertools.cycle(read_ids)
+        self.write_ids = itertools.cycle(write_ids)
+        self.run_id: str = uuid.uuid4().hex[:8]
+        self.sequence = itertools.count()
+
+    def new_user(self) -> Dict:
+        index: int = next(self.sequence)
+        return {'username': f'bench{self.run_id}{index}', 'email_address': f'bench{self.run_id}{index}@example.com'}
+
+    def arguments(self, operation: str) -> Dict:
+        """Tool arguments for one call of the operation
+        """
+        if operation == GET_USER_OP_ID:
+            return {'id': next(self.read_ids)}
+        if operation == GET_USERS_OP_ID:
+            return {'limit': PAGE_SIZE}
+        if operation == GET_USERS_BY_IDS_OP_ID:
+            return {'ids': [next(self.read_ids) for _ in range(BATCH_SIZE)]}
+        if operation == POST_USER_SIGNUP_OP_ID:
+            return self.new_user()
+        if operation == PUT_USER_OP_ID:
+            return {'id': next(self.write_ids), 'email_address': self.new_user()['email_address']}
+        if operation == DELETE_USER_OP_ID:
+            return {'id': next(self.write_ids)}
+        if operation == POST_USERS_BATCH_OP_ID:
+            return {'users': [self.new_user() for _ in range(BATCH_SIZE)]}
+        if operation == PUT_USERS_BATCH_OP_ID:
+            return {'users': [{'id': next(self.write_ids), 'email_address': self.new_user()['email_address']}
+                              for _ in range(BATCH_SIZE)]}
+        if operation == DELETE_USERS_BATCH_OP_ID:
+            return {'ids': [next(self.write_ids) for _ in range(BATCH_SIZE)]}
+        if operation == EXPORT_USERS_OP_ID:
+            return {'limit': EXPORT_SIZE}
+        return {}
+
+def rest_request(operation: str, arguments: Dict) -> Tuple[str, str, Optional[Dict], Optional[Dict]]:
+    """(method, path, query params, JSON body) of the REST route behind an operation
+    """
+    routes: Dict[str, Callable] = {
+        GET_API_STATUS_OP_ID: lambda a: ('GET', '/mcp/status/', None, None),
+        GET_USER_OP_ID: lambda a: ('GET', f"/mcp/users/{a['id']}", None, None),
+        GET_USERS_OP_ID: lambda a: ('GET', '/mcp/users/', a, None),
+        GET_USERS_BY_IDS_OP_ID: lambda a: ('POST', '/mcp/users/lookup', None, a),
+        POST_USER_SIGNUP_OP_ID: lambda a: ('POST', '/mcp/users/', None, a),
+        PUT_USER_OP_ID: lambda a: ('PUT', f"/mcp/users/{a['id']}", None, a),
+        DELETE_USER_OP_ID: lambda a: ('DELETE', f"/mcp/users/{a['id']}", None, None),
+        POST_USERS_BATCH_OP_ID: lambda a: ('POST', '/mcp/users/batch', None, a),
+        PUT_USERS_BATCH_OP_ID: lambda a: ('PUT', '/mcp/users/batch', None, a),
+        DELETE_USERS_BATCH_OP_ID: lambda a: ('DELETE', '/mcp/users/batch', None, a),
+        EXPORT_USERS_OP_ID: lambda a: ('GET', '/mcp/users/export', a, None)
+    }
+    return routes[operation](arguments)
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Latency percentiles in milliseconds and throughput
+    """
+    cuts: List[float] = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 \
+        else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(cuts[49] * 1000, 3),
+        'p95_ms': round(cuts[94] * 1000, 3),
+        'p99_ms': round(cuts[98] * 1000, 3)
+    }
+
+async def drive(call: Callable, requests: int, concurrency: int) -> Dict:
+    """Run `requests` calls from `concurrency` concurrent workers; call() returns True on success
+    """
+    latencies: List[float] = []
+    errors: List[int] = [0]
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started: float = time.perf_counter()
+            try:
+                ok: bool = await call()
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors[0] += 1
+
+    started: float = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+async def run(args, http: httpx.AsyncClient, mcp: Optional[Client]) -> Dict:
+    """Benchmark every selected operation on every selected transport
+    """
+    response = await http.get('/mcp/users/', params={'limit': args.users})
+    ids: List[str] = [user['id'] for user in response.json()['response']]
+    if len(ids) < 2:
+        raise RuntimeError("The target needs at least two active users to benchmark against.")
+    workload = Workload(read_ids=ids[:len(ids) // 2][:args.hot_users or None], write_ids=ids[len(ids) // 2:])
+
+    async def rest_call(operation: str) -> bool:
+        method, path, params, body = rest_request(operation, workload.arguments(operation))
+        response = await http.request(method, path, params=params, json=body)
+        await response.aread()
+        return response.is_success
+
+    async def mcp_call(operation: str) -> bool:
+        result = await mcp.call_tool(operation, workload.arguments(operation), raise_on_error=False)
+        return not result.is_error
+
+    calls: Dict[str, Callable] = {'rest': rest_call, 'mcp': mcp_call}
+    results: Dict = {}
+    for transport in args.transports:
+        results[transport] = {}
+        for operation in args.operations:
+            call: Callable = calls[transport]
+            await drive(lambda: call(operation), min(args.warmup, args.requests), args.concurrency)
+            results[transport][operation] = await drive(lambda: call(operation), args.requests, args.concurrency)
+            print(f"{transport:<5}{operation:<22}{json.dumps(results[transport][operation])}", file=sys.stderr)
+    return results
+
+async def main_async(args) -> Dict:
+    """Set up the target (in process with the fake database, or a running server) and run the benchmark
+    """
+    async with AsyncExitStack() as stack:
+        if args.url:
+            base_url: str = args.url.rstrip('/')
+            transport: Optional[httpx.AsyncBaseTransport] = None
+        else:
+            os.environ.setdefault('MCP_SERVER_HOST', IN_PROCESS_URL)
+            from src.libs import lifespan
+            from src.main import app
+            from benchmarks.fake_db import FakeCockroachDBClient
+            fake = FakeCockroachDBClient(users=args.users, latency=args.db_latency,
+                                         coalesce_reads=lifespan.db_client_options['coalesce_reads'],
+                                         batch_window=lifespan.db_client_options['batch_window'],
+                                         batch_max_size=lifespan.db_client_options['batch_max_size'],
+                                         write_batch_interval=lifespan.db_client_options['write_batch_interval'],
+                                         write_batch_max_size=lifespan.db_client_options['write_batch_max_size'],
+                                         write_queue_size=lifespan.db_client_options['write_queue_size'])
+            lifespan.db_client_ro = lifespan.db_client_rw = fake
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            base_url = IN_PROCESS_URL
+            transport = httpx.ASGITransport(app=app)
+
+        def client_factory(**kwargs) -> httpx.AsyncClient:
+            return httpx.AsyncClient(transport=transport, **kwargs)
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        http = await stack.enter_async_context(
+            httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=30.0)
+        )
+        mcp: Optional[Client] = None
+        if 'mcp' in args.transports:
+            mcp = await stack.enter_async_context(Client(StreamableHttpTransport(
+                base_url + MCP_PATH, httpx_client_factory=client_factory if transport else None
+            )))
+        results: Dict = await run(args, http, mcp)
+        if not args.url:
+            print(f"database queries: {fake.queries}, reads coalesced: {fake.reads.stats()['collapsed']}", file=sys.stderr)
+        return results
+
+def compare(results: Dict, baseline: Dict):
+    """Print the change against a previous run
+    """
+    for transport, operations in results['results'].items():
+        for operation, current in operations.items():
+            previous: Optional[Dict] = baseline.get('results', {}).get(transport, {}).get(operation)
+            if not previous:
+                continue
+            deltas: str = '  '.join(
+                f"{key} {previous[key]} -> {current[key]} ({(current[key] / previous[key] - 1) * 100:+.1f}%)"
+                for key in ('p50_ms', 'p99_ms', 'throughput_rps') if previous[key]
+            )
+            print(f"{transport:<5}{operation:<22}{deltas}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='base URL of a running server, e.g. http://localhost:8080')
+    parser.add_argument('--transports', nargs='+', choices=['rest', 'mcp'], default=['rest', 'mcp'])
+    parser.add_argument('--operations', nargs='+', choices=USER_OPERATIONS + STATUS_OPERATIONS,
+                        default=USER_OPERATIONS + STATUS_OPERATIONS)
+    parser.add_argument('--requests', type=int, default=500, help='measured requests per operation and transport')
+    parser.add_argument('--warmup', type=int, default=50, help='unmeasured requests before each measurement')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--users', type=int, default=1000, help='users seeded in the fake database / read from --url')
+    parser.add_argument('--db-latency', type=float, default=0.0, help='seconds added to every fake query')
+    parser.add_argument('--hot-users', type=int, default=0,
+                        help='spread reads over only this many users, as in a fan-out spike (0: all)')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--baseline', help='JSON report of a previous run to compare against')
+    args = parser.parse_args()
+
+    report: Dict = {
+        'config': {
+            'target': args.url or 'in-process (FakeCockroachDBClient)',
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'users': args.users,
+            'db_latency': args.db_latency,
+            'hot_users': args.hot_users,
+            'python': sys.version.split()[0]
+        },
+        'results': asyncio.run(main_async(args))
+    }
+    output: str = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(report, json.load(file))
+
+if __name__ == '__main__':
+    main()
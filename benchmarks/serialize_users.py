@@ -0,0 +1,73 @@
+"""get_users page serialization benchmark
+
+Times building the response body for one page of users: the previous path
+(custom_serializer per field + stdlib JSONResponse) against FastJSONResponse.
+
+    python -m benchmarks.serialize_users [--rows N] [--repeat N]
+"""
+import time
+import uuid
+import argparse
+from datetime import datetime, timedelta
+from asyncpg.pgproto.pgproto import UUID
+from fastapi.responses import JSONResponse
+from src.helpers import common
+from src.helpers.common import custom_serializer
+from src.helpers.responses import FastJSONResponse
+
+def make_rows(count: int) -> list:
+    """Rows shaped like the users SELECT, with asyncpg's UUID type
+    """
+    created_at = datetime(2025, 1, 1, 12, 0, 0, 123456)
+    return [
+        {
+            'id': UUID(uuid.uuid4().bytes),
+            'username': f'user{index}',
+            'email_address': f'user{index}@example.com',
+            'created_at': created_at + timedelta(seconds=index),
+            'updated_at': created_at + timedelta(seconds=index, minutes=5)
+        }
+        for index in range(count)
+    ]
+
+def before(rows: list) -> bytes:
+    response: list = []
+    for row in rows:
+        mutable_result = dict(row)
+        mutable_result['id'] = custom_serializer(mutable_result['id'])
+        mutable_result['created_at'] = custom_serializer(mutable_result['created_at'])
+        mutable_result['updated_at'] = custom_serializer(mutable_result['updated_at'])
+        response.append(mutable_result)
+    return JSONResponse(content={'status': True, 'message': [], 'response': response}).body
+
+def after(rows: list) -> bytes:
+    response: list = [dict(row) for row in rows]
+    return FastJSONResponse(content={'status': True, 'message': [], 'response': response}).body
+
+def measure(function, rows: list, repeat: int) -> float:
+    """Return the best of `repeat` runs in milliseconds
+    """
+    timings: list = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(rows)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1e3
+
+def main(rows_count: int, repeat: int):
+    rows = make_rows(rows_count)
+    assert before(rows) == after(rows), 'serializers disagree'
+    print(f'{rows_count} rows, best of {repeat} runs')
+    print(f"{'custom_serializer + JSONResponse (before)':<45}{measure(before, rows, repeat):>8.3f} ms")
+    print(f"{'FastJSONResponse (after)':<45}{measure(after, rows, repeat):>8.3f} ms")
+    if common.orjson is not None:
+        orjson, common.orjson = common.orjson, None
+        print(f"{'FastJSONResponse, stdlib json fallback':<45}{measure(after, rows, repeat):>8.3f} ms")
+        common.orjson = orjson
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    arguments = parser.parse_args()
+    main(arguments.rows, arguments.repeat)
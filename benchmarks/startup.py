@@ -0,0 +1,103 @@
+"""Startup benchmark and import-time budget
+
+Measures, in fresh interpreters, the time `import src.main` takes (from
+`python -X importtime`, minimum of --runs) with the heaviest packages it
+pulls in, and the time from launching `python -m src.server` until
+/mcp/status/ answers. Exits non-zero when the import exceeds --budget-ms or
+imports one of the --forbid modules eagerly (FastMCP is loaded in the
+background after startup, see src.mcp_server), so it can gate CI.
+
+    python -m benchmarks.startup [--budget-ms 1000] [--runs 3] [--top 10] [--forbid fastmcp mcp] [--no-serve]
+
+The health check needs no database, so no DSN is required.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+from typing import Dict, List, Set, Tuple
+from benchmarks.workers import HOST, free_port, wait_ready
+
+MODULE: str = 'src.main'
+STATUS_PATH: str = '/mcp/status/'
+BUDGET_MS: float = 1000.0
+FORBIDDEN_MODULES: List[str] = ['fastmcp', 'mcp']
+
+def import_times(statement: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) of every module imported by a fresh interpreter running `statement`
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True, check=True)
+    modules: List[Tuple[str, int, int]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name[1:], int(self_us), int(cumulative_us)))
+    return modules
+
+def measure_import(module: str) -> Tuple[float, Dict[str, float], Set[str]]:
+    """Import time of a module in ms, self time in ms per top-level package, and the modules it imported
+    """
+    preloaded: Set[str] = {name.strip() for name, _, _ in import_times('pass')}
+    total: int = 0
+    packages: Dict[str, float] = {}
+    imported: Set[str] = set()
+    for name, self_us, cumulative_us in import_times(f'import {module}'):
+        if name.strip() in preloaded:
+            continue
+        if not name.startswith(' '):
+            total += cumulative_us
+        package: str = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0.0) + self_us / 1000
+        imported.add(name.strip())
+    return total / 1000, packages, imported
+
+def measure_serve() -> float:
+    """Time in ms from launching the production server until it answers the health check
+    """
+    port: int = free_port()
+    env: dict = dict(os.environ, MCP_SERVER_WORKERS='1', MCP_SERVER_PORT=str(port),
+                     MCP_SERVER_BIND_HOST=HOST, MCP_SERVER_LOG_LEVEL='warning')
+    env.setdefault('MCP_SERVER_HOST', f'http://{HOST}:{port}')
+    started: float = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m', 'src.server'], env=env)
+    try:
+        asyncio.run(wait_ready(port, STATUS_PATH, interval=0.005))
+        return (time.perf_counter() - started) * 1000
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--forbid', nargs='*', default=FORBIDDEN_MODULES)
+    parser.add_argument('--no-serve', action='store_true', help="skip the time-to-first-response measurement")
+    args = parser.parse_args()
+
+    runs: List[Tuple[float, Dict[str, float], Set[str]]] = [measure_import(MODULE) for _ in range(args.runs)]
+    total, packages, imported = min(runs, key=lambda run: run[0])
+    print(f"import {MODULE}: {total:.0f} ms (min of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    for package, self_ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {package:<24} {self_ms:>8.1f} ms")
+
+    if not args.no_serve:
+        print(f"python -m src.server: first {STATUS_PATH} response after {measure_serve():.0f} ms")
+
+    failures: List[str] = []
+    if total > args.budget_ms:
+        failures.append(f"import {MODULE} took {total:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    eager: List[str] = sorted(name for name in args.forbid if name in imported)
+    if eager:
+        failures.append(f"import {MODULE} eagerly imports {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""URLEncodingMiddleware micro-benchmark
+
+Compares the per-request overhead of the pure ASGI URLEncodingMiddleware with
+the previous BaseHTTPMiddleware implementation, in front of a no-op endpoint.
+
+    python -m benchmarks.url_encoding_middleware [--requests N]
+"""
+import os
+import time
+import asyncio
+import argparse
+from urllib.parse import urlencode, parse_qs, unquote_plus
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+os.environ.setdefault('MCP_SERVER_HOST', 'http://localhost:8080')
+
+from src.main import URLEncodingMiddleware  # noqa: E402
+
+QUERY_STRINGS: dict = {
+    'empty': b'',
+    'plain': b'offset=0&limit=10',
+    'encoded': b'cursor=WyIyMDI1LTAxLTAxVDAwOjAwOjAxIiwiNDM0In0%3D&limit=10',
+    'html-escaped': b'offset=0&amp;limit=10',
+}
+
+class LegacyURLEncodingMiddleware(BaseHTTPMiddleware):
+    """Previous BaseHTTPMiddleware implementation, kept for comparison
+    """
+    async def dispatch(self, request: Request, call_next):
+        raw_query_string = request.scope["query_string"].decode()
+        decoded_query_string = unquote_plus(raw_query_string.replace("&amp;", "&"))
+        parsed_query = parse_qs(decoded_query_string)
+        encoded_query_string = urlencode(parsed_query, doseq=True).encode()
+        request.scope["query_string"] = encoded_query_string
+        return await call_next(request)
+
+async def endpoint(scope, receive, send):
+    """No-op ASGI endpoint
+    """
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+async def receive():
+    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+async def send(message):
+    pass
+
+def make_scope(query_string: bytes) -> dict:
+    return {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': '/mcp/users/', 'raw_path': b'/mcp/users/', 'root_path': '',
+        'query_string': query_string, 'headers': [], 'client': ('127.0.0.1', 1), 'server': ('127.0.0.1', 8080),
+    }
+
+async def measure(app, query_string: bytes, requests: int) -> float:
+    """Return the mean microseconds per request
+    """
+    for _ in range(min(requests, 1000)):
+        await app(make_scope(query_string), receive, send)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(make_scope(query_string), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+async def main(requests: int):
+    apps: dict = {
+        'no middleware': endpoint,
+        'BaseHTTPMiddleware (before)': LegacyURLEncodingMiddleware(endpoint),
+        'pure ASGI (after)': URLEncodingMiddleware(endpoint),
+    }
+    print(f"{'query string':<14}" + ''.join(f'{name:>30}' for name in apps) + '   (us/request)')
+    for label, query_string in QUERY_STRINGS.items():
+        timings = [await measure(app, query_string, requests) for app in apps.values()]
+        print(f'{label:<14}' + ''.join(f'{timing:>30.2f}' for timing in timings))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    asyncio.run(main(parser.parse_args().requests))
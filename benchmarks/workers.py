@@ -0,0 +1,111 @@
+"""Worker scaling benchmark
+
+Starts the production launcher (python -m src.server) once per worker count
+and drives it with keep-alive HTTP/1.1 connections, reporting requests per
+second. The default target, /mcp/status/, needs no database, so the numbers
+measure the HTTP and application stack alone.
+
+    python -m benchmarks.workers [--workers 1 2 4] [--connections 64] [--duration 10] [--path /mcp/status/]
+
+Run the load generator on other cores than the server (or another host) for
+meaningful numbers; with workers >= available cores, the two compete.
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+from src.server import default_workers
+
+HOST: str = '127.0.0.1'
+
+def free_port() -> int:
+    """Ask the OS for an unused TCP port
+    """
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+async def wait_ready(port: int, path: str, timeout: float = 30.0, interval: float = 0.2):
+    """Wait until the server answers the target path
+    """
+    deadline: float = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection(HOST, port)
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\nConnection: close\r\n\r\n'.encode())
+            status_line = await reader.readline()
+            writer.close()
+            if b' 200 ' in status_line:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(interval)
+    raise RuntimeError(f"Server on port {port} not ready after {timeout}s")
+
+async def read_response(reader: asyncio.StreamReader):
+    """Read one response with a Content-Length body
+    """
+    headers = await reader.readuntil(b'\r\n\r\n')
+    length: int = 0
+    for line in headers.split(b'\r\n'):
+        if line[:15].lower() == b'content-length:':
+            length = int(line[15:])
+    await reader.readexactly(length)
+
+async def client(port: int, request: bytes, stop_at: float) -> int:
+    """Send requests back to back on one connection until stop_at
+    """
+    reader, writer = await asyncio.open_connection(HOST, port)
+    completed: int = 0
+    while time.monotonic() < stop_at:
+        writer.write(request)
+        await read_response(reader)
+        completed += 1
+    writer.close()
+    return completed
+
+async def load(port: int, path: str, connections: int, duration: float) -> float:
+    """Requests per second sustained by `connections` keep-alive clients
+    """
+    request: bytes = f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\n\r\n'.encode()
+    started: float = time.monotonic()
+    counts = await asyncio.gather(*[client(port, request, started + duration) for _ in range(connections)])
+    return sum(counts) / (time.monotonic() - started)
+
+def run(workers: int, connections: int, duration: float, path: str) -> float:
+    """Start the launcher with the given worker count and measure it
+    """
+    port: int = free_port()
+    env: dict = dict(os.environ, MCP_SERVER_WORKERS=str(workers), MCP_SERVER_PORT=str(port),
+                     MCP_SERVER_BIND_HOST=HOST, MCP_SERVER_LOG_LEVEL='warning')
+    env.setdefault('MCP_SERVER_HOST', f'http://{HOST}:{port}')
+    server = subprocess.Popen([sys.executable, '-m', 'src.server'], env=env)
+    try:
+        asyncio.run(wait_ready(port, path))
+        return asyncio.run(load(port, path, connections, duration))
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, default_workers()}))
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--path', default='/mcp/status/')
+    args = parser.parse_args()
+
+    print(f"{args.connections} connections, {args.duration:.0f}s per run, GET {args.path}, "
+          f"{default_workers()} CPUs available")
+    baseline: float = 0.0
+    for workers in args.workers:
+        rps: float = run(workers, args.connections, args.duration, args.path)
+        baseline = baseline or rps
+        print(f"workers={workers:<3} {rps:>10.0f} req/s  x{rps / baseline:.2f}")
+
+if __name__ == '__main__':
+    main()
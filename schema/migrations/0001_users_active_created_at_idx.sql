@@ -0,0 +1,8 @@
+USE demodb;
+
+-- Serves get_users / get_users_after / export_users: `active = $1 ORDER BY created_at, id`
+-- becomes a single index span instead of a full table scan, and the stored columns keep
+-- the read covering (no index join back to the primary index).
+CREATE INDEX IF NOT EXISTS users_active_created_at_id_idx
+    ON users (active, created_at, id)
+    STORING (username, email_address, updated_at);
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 
 # COMMON
 IS_TRUE: bool = True
@@ -7,25 +7,118 @@ IS_FALSE: bool = False
 # DB
 DB_POOL_DEFAULT_MIN_SIZE: int = 1
 DB_POOL_DEFAULT_MAX_SIZE: int = 15
+DB_POOL_DEFAULT_ACQUIRE_TIMEOUT: float = 10.0
+DB_CURSOR_DEFAULT_PREFETCH: int = 1000
+DB_DEFAULT_FOLLOWER_READ_AS_OF: str = 'follower_read_timestamp()'
 DB_RO_VAR: str = 'DATABASE_RO_DSN'
 DB_RW_VAR: str = 'DATABASE_RW_DSN'
+DB_POOL_MIN_SIZE_VAR: str = 'DB_POOL_MIN_SIZE'
+DB_POOL_MAX_SIZE_VAR: str = 'DB_POOL_MAX_SIZE'
+DB_POOL_ACQUIRE_TIMEOUT_VAR: str = 'DB_POOL_ACQUIRE_TIMEOUT'
+DB_COMMAND_TIMEOUT_VAR: str = 'DB_COMMAND_TIMEOUT'
+DB_STATEMENT_CACHE_SIZE_VAR: str = 'DB_STATEMENT_CACHE_SIZE'
+DB_MAX_CACHED_STATEMENT_LIFETIME_VAR: str = 'DB_MAX_CACHED_STATEMENT_LIFETIME'
+DB_FOLLOWER_READ_AS_OF_VAR: str = 'DB_FOLLOWER_READ_AS_OF'
+DB_MAX_INACTIVE_CONNECTION_LIFETIME_VAR: str = 'DB_MAX_INACTIVE_CONNECTION_LIFETIME'
+DB_DEFAULT_STATEMENT_CACHE_SIZE: int = 100
+DB_DEFAULT_MAX_CACHED_STATEMENT_LIFETIME: float = 0.0
+DB_DEFAULT_MAX_INACTIVE_CONNECTION_LIFETIME: float = 300.0
+DB_TXN_MAX_RETRIES_VAR: str = 'DB_TXN_MAX_RETRIES'
+DB_TXN_RETRY_BASE_DELAY_VAR: str = 'DB_TXN_RETRY_BASE_DELAY'
+DB_TXN_RETRY_MAX_DELAY_VAR: str = 'DB_TXN_RETRY_MAX_DELAY'
+DB_TXN_DEFAULT_MAX_RETRIES: int = 5
+DB_TXN_DEFAULT_RETRY_BASE_DELAY: float = 0.01
+DB_TXN_DEFAULT_RETRY_MAX_DELAY: float = 1.0
+DB_COALESCE_READS_VAR: str = 'DB_COALESCE_READS'
+DB_DEFAULT_COALESCE_READS: bool = False
+DB_BATCH_WINDOW_VAR: str = 'DB_BATCH_WINDOW'
+DB_BATCH_MAX_SIZE_VAR: str = 'DB_BATCH_MAX_SIZE'
+DB_DEFAULT_BATCH_WINDOW: float = 0.0
+DB_DEFAULT_BATCH_MAX_SIZE: int = 100
+DB_WRITE_BATCH_INTERVAL_VAR: str = 'DB_WRITE_BATCH_INTERVAL'
+DB_WRITE_BATCH_MAX_SIZE_VAR: str = 'DB_WRITE_BATCH_MAX_SIZE'
+DB_WRITE_QUEUE_SIZE_VAR: str = 'DB_WRITE_QUEUE_SIZE'
+DB_DEFAULT_WRITE_BATCH_INTERVAL: float = 0.0
+DB_DEFAULT_WRITE_BATCH_MAX_SIZE: int = 100
+DB_DEFAULT_WRITE_QUEUE_SIZE: int = 1000
+
+# CACHE
+USER_CACHE_BACKEND_VAR: str = 'USER_CACHE_BACKEND'
+USER_CACHE_MAX_SIZE_VAR: str = 'USER_CACHE_MAX_SIZE'
+USER_CACHE_TTL_VAR: str = 'USER_CACHE_TTL_SECONDS'
+USER_CACHE_REDIS_URL_VAR: str = 'USER_CACHE_REDIS_URL'
+USER_CACHE_TOMBSTONE_TTL_VAR: str = 'USER_CACHE_TOMBSTONE_TTL_SECONDS'
+USER_CACHE_MEMORY_BACKEND: str = 'memory'
+USER_CACHE_REDIS_BACKEND: str = 'redis'
+USER_CACHE_DEFAULT_MAX_SIZE: int = 0
+USER_CACHE_DEFAULT_TTL: float = 30.0
+USER_CACHE_DEFAULT_TOMBSTONE_TTL: float = 2.0
+USER_CACHE_NAMESPACE: str = 'mcp:user'
+
+# SERVER
+SERVER_HOST_VAR: str = 'MCP_SERVER_BIND_HOST'
+SERVER_PORT_VAR: str = 'MCP_SERVER_PORT'
+SERVER_WORKERS_VAR: str = 'MCP_SERVER_WORKERS'
+SERVER_LIMIT_CONCURRENCY_VAR: str = 'MCP_SERVER_LIMIT_CONCURRENCY'
+SERVER_GRACEFUL_TIMEOUT_VAR: str = 'MCP_SERVER_GRACEFUL_TIMEOUT'
+SERVER_LOG_LEVEL_VAR: str = 'MCP_SERVER_LOG_LEVEL'
+SERVER_TIMING_ENABLED_VAR: str = 'MCP_SERVER_TIMING_ENABLED'
+SERVER_COMPRESSION_ENABLED_VAR: str = 'MCP_SERVER_COMPRESSION_ENABLED'
+SERVER_COMPRESSION_MIN_SIZE_VAR: str = 'MCP_SERVER_COMPRESSION_MIN_SIZE'
+SERVER_DEFAULT_HOST: str = '0.0.0.0'
+SERVER_DEFAULT_PORT: int = 8080
+SERVER_DEFAULT_LIMIT_CONCURRENCY: int = 1000
+SERVER_DEFAULT_GRACEFUL_TIMEOUT: float = 30.0
+SERVER_DEFAULT_LOG_LEVEL: str = 'info'
+SERVER_DEFAULT_COMPRESSION_MIN_SIZE: int = 1024
+# Health checks stay uncompressed and never pay for encoder setup
+SERVER_COMPRESSION_EXCLUDED_PATHS: Tuple[str, ...] = ('/mcp/status',)
+
+# USERS
+USERS_LOOKUP_MAX_IDS: int = 1000
+USERS_BATCH_MAX_SIZE: int = 1000
+USERS_EXPORT_CHUNK_ROWS: int = 500
+USERS_EXPORT_MCP_MAX_ROWS: int = 1000
+
+# MCP
+MCP_TOOL_HEADER: str = 'X-MCP-Tool'
+# Tool calls FastMCP proxies in process to the REST routes are read right away: compressing them only costs CPU
+SERVER_COMPRESSION_EXCLUDED_HEADERS: Tuple[str, ...] = (MCP_TOOL_HEADER,)
+MCP_TOOLS_MODE_VAR: str = 'MCP_TOOLS_MODE'
+MCP_TOOLS_PROXY_MODE: str = 'proxy'
+MCP_TOOLS_NATIVE_MODE: str = 'native'
+MCP_TOOLS_DEFAULT_MODE: str = MCP_TOOLS_PROXY_MODE
+MANIFEST_OPENAPI_FILE: str = 'openapi.json'
+MANIFEST_TOOLS_FILE: str = 'tools.json'
+MANIFEST_TOOLS_PATH: str = '/tools.json'
 
 # MCP Tags
 USERS: str = 'User'
 HEALTHCHECK: str = 'Health Check'
 GET_API_STATUS_OP_ID: str = 'get_api_status'
+GET_API_STATS_OP_ID: str = 'get_api_stats'
 GET_USER_OP_ID: str = 'get_user'
 GET_USERS_OP_ID: str = 'get_users'
+GET_USERS_BY_IDS_OP_ID: str = 'get_users_by_ids'
 POST_USER_SIGNUP_OP_ID: str = 'post_user_signup'
 PUT_USER_OP_ID: str = 'put_user'
 DELETE_USER_OP_ID: str = 'delete_user'
+POST_USERS_BATCH_OP_ID: str = 'post_users_batch'
+PUT_USERS_BATCH_OP_ID: str = 'put_users_batch'
+DELETE_USERS_BATCH_OP_ID: str = 'delete_users_batch'
+EXPORT_USERS_OP_ID: str = 'export_users'
 
 USER_OPERATIONS: List = [
     GET_USER_OP_ID,
     GET_USERS_OP_ID,
+    GET_USERS_BY_IDS_OP_ID,
     POST_USER_SIGNUP_OP_ID,
     PUT_USER_OP_ID,
-    DELETE_USER_OP_ID
+    DELETE_USER_OP_ID,
+    POST_USERS_BATCH_OP_ID,
+    PUT_USERS_BATCH_OP_ID,
+    DELETE_USERS_BATCH_OP_ID,
+    EXPORT_USERS_OP_ID
 ]
 
 STATUS_OPERATIONS: List = [
@@ -1,5 +1,6 @@
 from src.app import app
 from src.libs.db_client import CockroachDBClient
+from src.libs.cache import CacheBackend
 
 def get_db_client_rw() -> CockroachDBClient:
     return app.state.db_client_rw
@@ -7,5 +8,8 @@ def get_db_client_rw() -> CockroachDBClient:
 def get_db_client_ro() -> CockroachDBClient:
     return app.state.db_client_ro
 
+def get_user_cache() -> CacheBackend | None:
+    return getattr(app.state, 'user_cache', None)
+
 def get_dal(dal_class, client_getter):
     return dal_class(client_getter())
@@ -1,7 +1,16 @@
+import json
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Optional, Tuple
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timezone
 from decimal import Decimal
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 def custom_serializer(obj):
     """Custom serializer
     """
@@ -15,3 +24,69 @@ def custom_serializer(obj):
         # Convert Decimal to float
         return float(obj)
     raise TypeError(f"Type {type(obj)} not serializable")
+
+def json_dumps(obj) -> bytes:
+    """Serialize to compact JSON bytes
+
+    orjson encodes UUID, datetime and nested rows natively; custom_serializer
+    is only reached for types it does not know (e.g. Decimal, asyncpg's UUID).
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=custom_serializer)
+    return json.dumps(obj, default=custom_serializer, ensure_ascii=False, separators=(',', ':')).encode()
+
+def json_loads(data: bytes | str):
+    """Deserialize JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    """Encode a keyset pagination cursor
+    """
+    payload = json.dumps([created_at.isoformat(), str(id)], separators=(',', ':'))
+    return urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a keyset pagination cursor
+    """
+    try:
+        created_at, id = json.loads(urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), UUID(id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value names the ETag (weak comparison, as RFC 9110 requires)
+    """
+    if not if_none_match:
+        return False
+    tags: List[str] = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+def http_date(value: datetime) -> str:
+    """HTTP-date of a timestamp; naive timestamps are taken as UTC, as the database stores them
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def not_modified(if_none_match: Optional[str], if_modified_since: Optional[str], etag: str,
+                 last_modified: Optional[datetime]) -> bool:
+    """Whether a GET can be answered with 304: If-None-Match when sent, else If-Modified-Since
+    """
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since: datetime = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP-dates have whole seconds
+    return last_modified.replace(microsecond=0) <= since
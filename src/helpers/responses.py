@@ -0,0 +1,40 @@
+"""Response classes
+"""
+import time
+import hashlib
+from typing import Any, Dict, Optional
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse
+from src.helpers.common import json_dumps, etag_matches
+from src.libs.timing import record
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with json_dumps, so rows can be returned without per-field conversion
+    """
+    def render(self, content: Any) -> bytes:
+        started: float = time.perf_counter()
+        body: bytes = json_dumps(content)
+        record('serialize', started)
+        return body
+
+class StaticDocument:
+    """Pre-encoded JSON document with a strong ETag
+    """
+    def __init__(self, body: bytes):
+        """Initialize this class and set class members
+        """
+        self.body: bytes = body
+        self.etag: str = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.headers: Dict[str, str] = {'ETag': self.etag, 'Cache-Control': 'no-cache'}
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header value names this document
+        """
+        return etag_matches(if_none_match, self.etag)
+
+    def response(self, request: Request) -> Response:
+        """200 with the document, or 304 when the client already has it
+        """
+        if self.matches(request.headers.get('if-none-match')):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=self.headers)
+        return Response(content=self.body, media_type='application/json', headers=self.headers)
@@ -0,0 +1,128 @@
+"""User operations shared by the users routes and the native MCP tools
+"""
+import time
+import hashlib
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+from src.models.user_dal import UserDAL
+from src.libs.cache import CacheBackend
+from src.libs.timing import record
+from src.libs.single_flight import shared_call
+from src.helpers.common import encode_cursor, decode_cursor, json_dumps
+from src.constants import IS_TRUE, IS_FALSE
+
+FOLLOWER_READ_DESCRIPTION: str = 'Serve the read from the nearest replica; data may be a few seconds stale.'
+
+def cache_key(user_id) -> Optional[str]:
+    """Canonical cache key for a user id, None when it is not a valid UUID.
+    """
+    try:
+        return str(UUID(str(user_id)))
+    except ValueError:
+        return None
+
+async def invalidate_users(cache: Optional[CacheBackend], user_ids: List):
+    """Drop cached entries for the given user ids, with one cache call for all of them.
+    """
+    if cache is None:
+        return
+    keys: List[str] = [key for key in dict.fromkeys(map(cache_key, user_ids)) if key]
+    await cache.delete_many(keys)
+
+async def get_user_data(dal: UserDAL, user_id: str, cache: Optional[CacheBackend] = None,
+                        follower_read: bool = False) -> Optional[Dict]:
+    """Core logic to retrieve and serialize user data, read through the user cache when given.
+    A follower read may be served from the cache but never fills it, as its row can be seconds stale,
+    and neither does a read that shared a query started by another request, which may predate a write.
+    """
+    key = cache_key(user_id) if cache is not None else None
+    if key:
+        started: float = time.perf_counter()
+        user_data = await cache.get(key)
+        record('cache', started)
+        if user_data is not None:
+            return user_data
+
+    shared_call.set(False)
+    query_result = await dal.get_user(id=user_id, follower_read=follower_read)
+    if query_result:
+        started = time.perf_counter()
+        user_data = dict(query_result[0])
+        record('rows', started)
+        if key and not follower_read and not shared_call.get():
+            started = time.perf_counter()
+            await cache.set(key, user_data)
+            record('cache', started)
+        return user_data
+    return None
+
+async def get_users_page(dal: UserDAL, offset: int, limit: int, cursor: Optional[str] = None,
+                         follower_read: bool = False) -> Tuple[List[Dict], Optional[str]]:
+    """One page of users ordered by creation time, and the cursor of the next page.
+    Raises ValueError for an invalid cursor.
+    """
+    if cursor:
+        created_at, user_id = decode_cursor(cursor)
+        query_results = await dal.get_users_after(created_at=created_at, id=user_id, limit=limit,
+                                                  follower_read=follower_read)
+    else:
+        query_results = await dal.get_users(offset=offset, limit=limit, follower_read=follower_read)
+
+    response: List = []
+    next_cursor: Optional[str] = None
+    if query_results:
+        started: float = time.perf_counter()
+        response = [dict(query_result) for query_result in query_results]
+        record('rows', started)
+        if len(query_results) == limit:
+            last_result = query_results[-1]
+            next_cursor = encode_cursor(last_result['created_at'], last_result['id'])
+    return response, next_cursor
+
+async def get_users_by_ids(dal: UserDAL, ids: List[UUID], follower_read: bool = False) -> Tuple[List[Dict], List[str]]:
+    """Users in input order, and the ids that were not found.
+    """
+    user_ids: List = list(dict.fromkeys(ids))
+    query_results = await dal.get_users_by_ids(ids=user_ids, follower_read=follower_read)
+    users_by_id: Dict = {query_result['id']: query_result for query_result in query_results}
+
+    response: List = []
+    missing_ids: List = []
+    for user_id in user_ids:
+        query_result = users_by_id.get(user_id)
+        if query_result is None:
+            missing_ids.append(str(user_id))
+            continue
+        response.append(dict(query_result))
+    return response, missing_ids
+
+def user_validators(users: List[Dict], *extra) -> Tuple[str, Optional[datetime]]:
+    """Strong ETag over the (id, updated_at) of the users, and their latest updated_at.
+    `extra` adds other parts of the response body (e.g. the next cursor) to the ETag. Rows from the
+    Redis cache, whose ids and timestamps are strings written by json_dumps, give the same values.
+    """
+    pairs: List[Tuple] = [(user['id'], user.get('updated_at')) for user in users]
+    etag: str = f'"{hashlib.sha256(json_dumps([pairs, *extra])).hexdigest()[:32]}"'
+    updated: List = [updated_at for _, updated_at in pairs if updated_at]
+    last_modified = max(updated) if updated else None
+    if isinstance(last_modified, str):
+        last_modified = datetime.fromisoformat(last_modified)
+    return etag, last_modified
+
+def batch_content(results: List, serialize: Callable) -> Dict:
+    """Batch response content with one result entry per input item.
+    """
+    response: List = []
+    failed: int = 0
+    for index, (result, error) in enumerate(results):
+        if error:
+            failed += 1
+            response.append({'index': index, 'status': IS_FALSE, 'message': [error], 'response': {}})
+        else:
+            response.append({'index': index, 'status': IS_TRUE, 'message': [], 'response': serialize(result)})
+    return {
+        'status': IS_FALSE if failed else IS_TRUE,
+        'message': [f'{failed} of {len(results)} items failed.'] if failed else [],
+        'response': response
+    }
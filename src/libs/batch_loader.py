@@ -0,0 +1,89 @@
+"""Micro-batching of per-key loads across concurrent callers
+"""
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+from src.libs.single_flight import shared_call
+
+class BatchLoader:
+    """Collect keys requested within a short window and load them with one call
+
+    load(key) queues the key and waits; the queue is flushed `window` seconds
+    after its first key, or as soon as it holds `max_size` keys, by a single
+    load_many(keys) call returning {key: value}. Each caller gets the value of
+    its key (None when missing) or the error of the batch. A key requested
+    again while queued shares the queued entry. When load_many shared a read
+    already in flight (see SingleFlight), `shared_call` is set for every caller.
+    """
+    def __init__(self, load_many: Callable[[List[Hashable]], Awaitable[Dict]], window: float, max_size: int):
+        """Initialize this class and set class members
+        """
+        self.load_many = load_many
+        self.window = window
+        self.max_size = max_size
+        self.pending: Dict[Hashable, asyncio.Future] = {}
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.tasks: Set[asyncio.Task] = set()
+        self.calls: int = 0
+        self.keys: int = 0
+        self.batches: int = 0
+
+    async def load(self, key: Hashable) -> Any:
+        """Value of one key, loaded together with the keys requested around it
+        """
+        self.calls += 1
+        future = self.pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            # A batch error is set on every future, including those of cancelled callers
+            future.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self.pending[key] = future
+            if len(self.pending) >= self.max_size:
+                self.dispatch()
+            elif self.timer is None:
+                self.timer = loop.call_later(self.window, self.dispatch)
+        value, shared = await asyncio.shield(future)
+        if shared:
+            shared_call.set(True)
+        return value
+
+    def dispatch(self):
+        """Load the queued keys in a background task, outside of the caller's context (request timings)
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, {}
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self.run(batch), context=contextvars.Context())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def run(self, batch: Dict[Hashable, asyncio.Future]):
+        """Resolve the futures of one batch
+        """
+        self.batches += 1
+        self.keys += len(batch)
+        shared_call.set(False)
+        try:
+            values: Dict = await self.load_many(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        shared: bool = shared_call.get()
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result((values.get(key), shared))
+
+    def stats(self) -> Dict:
+        """Return calls, batches and distinct keys loaded
+        """
+        return {
+            'calls': self.calls,
+            'batches': self.batches,
+            'keys': self.keys
+        }
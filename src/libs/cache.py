@@ -0,0 +1,300 @@
+"""Cache backends
+"""
+import time
+import asyncio
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from src.libs.redis_client import RedisClient, RedisError
+from src.helpers.common import json_dumps, json_loads
+
+# Entry left by delete() for tombstone_ttl seconds, so that set() cannot store a value read before the delete
+TOMBSTONE: object = object()
+# Redis value of a tombstone; cached values are JSON documents, never empty
+REDIS_TOMBSTONE: bytes = b''
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after a fixed TTL
+
+    delete() leaves a tombstone for `tombstone_ttl` seconds: a value read
+    from the database before the delete, and set after it, is not stored.
+    """
+    def __init__(self, max_size: int, ttl: float, tombstone_ttl: float = 0.0):
+        """Initialize this class and set class members
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.tombstone_ttl = tombstone_ttl
+        self.entries: OrderedDict = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None when absent or expired
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            if value is not TOMBSTONE:
+                self.expirations += 1
+            self.misses += 1
+            return None
+        if value is TOMBSTONE:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value unless the key was invalidated within the tombstone TTL
+        """
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] is TOMBSTONE and entry[1] > time.monotonic():
+            return
+        self.store(key, value, self.ttl)
+
+    def store(self, key: Hashable, value: Any, ttl: float):
+        """Store an entry, evicting the least recently used entry when full
+        """
+        self.entries[key] = (value, time.monotonic() + ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable):
+        """Invalidate a key, leaving a tombstone when tombstone_ttl is set
+        """
+        if self.tombstone_ttl > 0:
+            self.store(key, TOMBSTONE, self.tombstone_ttl)
+        else:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        """Invalidate every key
+        """
+        self.entries.clear()
+
+    def stats(self) -> Dict:
+        """Return cache counters
+        """
+        return {
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+class CacheBackend(ABC):
+    """Cache backend interface used by the user read path
+    """
+    async def connect(self):
+        """Open backend resources
+        """
+
+    async def disconnect(self):
+        """Release backend resources
+        """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value or None
+        """
+
+    @abstractmethod
+    async def set(self, key: str, value: Any):
+        """Store a value read from the database, unless the key was invalidated since (see delete)
+        """
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Invalidate a key on every replica sharing this cache.
+        For a few seconds afterwards, set() of the key is ignored: the value may have been read before the write.
+        """
+
+    async def delete_many(self, keys: List[str]):
+        """Invalidate several keys
+        """
+        for key in keys:
+            await self.delete(key)
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Return cache counters
+        """
+
+class InMemoryCacheBackend(CacheBackend):
+    """Per-process cache backend
+    """
+    def __init__(self, max_size: int, ttl: float, tombstone_ttl: float = 0.0):
+        """Initialize this class and set class members
+        """
+        self.cache = TTLCache(max_size=max_size, ttl=ttl, tombstone_ttl=tombstone_ttl)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value or None
+        """
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: Any):
+        """Store a value unless the key was just invalidated
+        """
+        self.cache.set(key, value)
+
+    async def delete(self, key: str):
+        """Invalidate a key
+        """
+        self.cache.delete(key)
+
+    def stats(self) -> Dict:
+        """Return cache counters
+        """
+        return {'backend': 'memory', **self.cache.stats()}
+
+class RedisCacheBackend(CacheBackend):
+    """Cache backend shared by all replicas through a Redis-protocol server
+
+    An optional per-process near cache absorbs hot keys; invalidations are
+    published on a channel so every replica drops its near copy as well.
+    A delete replaces the entry with a short-lived tombstone and values are
+    only stored where there is none (SET NX), so a replica cannot put back a
+    row it read before another replica's write. Redis errors degrade to
+    cache misses instead of failing the request.
+    """
+    def __init__(self, url: str, ttl: float, namespace: str, near_cache_size: int = 0, tombstone_ttl: float = 0.0):
+        """Initialize this class and set class members
+        """
+        self.client = RedisClient(url)
+        self.ttl_ms = int(ttl * 1000)
+        self.tombstone_ttl_ms = int(tombstone_ttl * 1000)
+        self.namespace = namespace
+        self.channel = f'{namespace}:invalidate'
+        self.near_cache = TTLCache(max_size=near_cache_size, ttl=ttl, tombstone_ttl=tombstone_ttl) \
+            if near_cache_size > 0 else None
+        self.subscriber_task: Optional[asyncio.Task] = None
+        self.hits: int = 0
+        self.misses: int = 0
+        self.errors: int = 0
+        self.invalidations_received: int = 0
+
+    async def connect(self):
+        """Connect and, with a near cache, listen for invalidations from other replicas
+        """
+        try:
+            await self.client.connect()
+        except (OSError, asyncio.TimeoutError, RedisError):
+            self.errors += 1
+        if self.near_cache is not None:
+            self.subscriber_task = asyncio.create_task(self.listen_invalidations())
+
+    async def disconnect(self):
+        """Stop listening and close the connection
+        """
+        if self.subscriber_task:
+            self.subscriber_task.cancel()
+        await self.client.disconnect()
+
+    async def listen_invalidations(self):
+        """Apply invalidations published by any replica, resubscribing on failure
+        """
+        while True:
+            try:
+                await self.client.subscribe(self.channel, self.on_invalidation)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RedisError):
+                self.errors += 1
+            # Invalidations may have been missed while unsubscribed
+            self.near_cache.clear()
+            await asyncio.sleep(1)
+
+    def on_invalidation(self, keys: bytes):
+        """Drop the space-separated keys of one invalidation message from the near cache
+        """
+        for key in keys.decode().split():
+            self.invalidations_received += 1
+            self.near_cache.delete(key)
+
+    def redis_key(self, key: str) -> str:
+        """Namespaced key
+        """
+        return f'{self.namespace}:{key}'
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value from the near cache or Redis
+        """
+        if self.near_cache is not None:
+            value = self.near_cache.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+        try:
+            data = await self.client.execute('GET', self.redis_key(key))
+        except (OSError, asyncio.TimeoutError, RedisError):
+            self.errors += 1
+            data = None
+        if not data:
+            self.misses += 1
+            return None
+        self.hits += 1
+        value = json_loads(data)
+        if self.near_cache is not None:
+            self.near_cache.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any):
+        """Store a value in Redis, unless the key holds a value or a tombstone, and then in the near cache
+        """
+        stored: bool = True
+        try:
+            stored = await self.client.execute(
+                'SET', self.redis_key(key), json_dumps(value), 'PX', self.ttl_ms, 'NX'
+            ) is not None
+        except (OSError, asyncio.TimeoutError, RedisError):
+            self.errors += 1
+        if stored and self.near_cache is not None:
+            self.near_cache.set(key, value)
+
+    async def delete(self, key: str):
+        """Replace the shared entry with a tombstone and broadcast the invalidation
+        """
+        await self.delete_many([key])
+
+    async def delete_many(self, keys: List[str]):
+        """Replace the shared entries with tombstones and broadcast one invalidation for all of them.
+        The commands are pipelined, so any number of keys costs one round trip.
+        """
+        if not keys:
+            return
+        if self.near_cache is not None:
+            for key in keys:
+                self.near_cache.delete(key)
+        commands: List[Tuple] = [
+            ('SET', self.redis_key(key), REDIS_TOMBSTONE, 'PX', self.tombstone_ttl_ms) for key in keys
+        ] if self.tombstone_ttl_ms > 0 else [('DEL', *map(self.redis_key, keys))]
+        if self.near_cache is not None:
+            commands.append(('PUBLISH', self.channel, ' '.join(keys)))
+        try:
+            await self.client.pipeline(commands)
+        except (OSError, asyncio.TimeoutError, RedisError):
+            self.errors += 1
+
+    def stats(self) -> Dict:
+        """Return cache counters
+        """
+        return {
+            'backend': 'redis',
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'invalidations_received': self.invalidations_received,
+            'near_cache': self.near_cache.stats() if self.near_cache is not None else {}
+        }
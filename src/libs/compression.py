@@ -0,0 +1,217 @@
+"""Negotiated response compression
+
+gzip is always available; brotli (`br`) and zstd are offered when the
+`brotli` and `zstandard` packages are installed. Encoders are created per
+response and flush after every body chunk, so streamed responses (e.g. the
+NDJSON export) reach the client as they are produced. Every encoder runs at
+its fastest level: on user pages it gets within ~10% of the default level's
+ratio for a quarter to half of the CPU (see benchmarks.compression).
+"""
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.libs.timing import record
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP: str = 'gzip'
+BROTLI: str = 'br'
+ZSTD: str = 'zstd'
+COMPRESSIBLE_TYPES: Tuple[str, ...] = ('text/', 'application/json', 'application/x-ndjson', 'application/javascript',
+                                       'application/xml', 'application/problem+json')
+UNCOMPRESSED_TYPES: Tuple[str, ...] = ('text/event-stream',)
+
+class GzipEncoder:
+    """gzip stream, sync-flushed per chunk
+    """
+    def __init__(self, level: int = 1):
+        """Initialize this class and set class members
+        """
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_FINISH)
+
+class BrotliEncoder:
+    """brotli stream, flushed per chunk
+    """
+    def __init__(self, quality: int = 1):
+        """Initialize this class and set class members
+        """
+        self.compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self.compressor.process(data) + self.compressor.finish()
+
+class ZstdEncoder:
+    """zstd frame, block-flushed per chunk
+    """
+    def __init__(self, level: int = 1):
+        """Initialize this class and set class members
+        """
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush()
+
+# Server preference, best ratio per CPU first
+ENCODERS: Dict[str, Callable] = {
+    name: encoder for name, encoder, available in (
+        (ZSTD, ZstdEncoder, zstandard is not None),
+        (BROTLI, BrotliEncoder, brotli is not None),
+        (GZIP, GzipEncoder, True)
+    ) if available
+}
+
+def negotiate(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """First of the server's encodings the Accept-Encoding header allows (q > 0), if any
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        weight: float = 1.0
+        params = params.strip()
+        if params[:2].lower() == 'q=':
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    for encoding in encodings:
+        if weights.get(encoding, weights.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts
+
+    Pure ASGI. Bodies sent in one message are compressed when they are at
+    least `minimum_size` bytes; streamed bodies are compressed chunk by chunk
+    unless they declare a smaller Content-Length. Requests under
+    `excluded_paths` or carrying one of `excluded_headers`, already encoded
+    responses, server-sent events and non-text content types pass through
+    untouched. A strong ETag is made weak
+    on compressed responses, as the bytes differ from the identity encoding.
+    """
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, excluded_paths: Tuple[str, ...] = (),
+                 excluded_headers: Tuple[str, ...] = ()):
+        """Initialize this class and set class members
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_paths = excluded_paths
+        self.excluded_headers: Tuple[bytes, ...] = tuple(name.lower().encode() for name in excluded_headers)
+        self.encodings: List[str] = list(ENCODERS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+        encoding: Optional[str] = None
+        for name, value in scope["headers"]:
+            if name in self.excluded_headers:
+                encoding = None
+                break
+            if name == b"accept-encoding":
+                encoding = negotiate(value.decode('latin-1'), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, CompressedResponse(send, encoding, self.minimum_size).send)
+
+class CompressedResponse:
+    """send() wrapper compressing one response
+    """
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        """Initialize this class and set class members
+        """
+        self.downstream = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.encoder = None
+        self.passthrough: bool = False
+
+    def compressible(self, headers: Headers) -> bool:
+        """Whether the response is worth compressing from its status and headers alone
+        """
+        if self.start["status"] in (204, 304) or "content-encoding" in headers:
+            return False
+        content_type: str = headers.get("content-type", "")
+        if content_type.startswith(UNCOMPRESSED_TYPES) or not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        content_length: Optional[str] = headers.get("content-length")
+        return content_length is None or int(content_length) >= self.minimum_size
+
+    def encoded_start(self) -> Message:
+        """The start message with the encoding headers
+        """
+        headers = MutableHeaders(scope=self.start)
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag: Optional[str] = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        return self.start
+
+    async def send(self, message: Message):
+        message_type: str = message["type"]
+        if message_type == "http.response.start":
+            self.start = message
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        if self.encoder is None:
+            if not self.compressible(Headers(raw=self.start["headers"])) or (
+                not more_body and len(body) < self.minimum_size
+            ):
+                self.passthrough = True
+                await self.downstream(self.start)
+                await self.downstream(message)
+                return
+            self.encoder = ENCODERS[self.encoding]()
+            start: Message = self.encoded_start()
+            headers = MutableHeaders(scope=start)
+            started: float = time.perf_counter()
+            if not more_body:
+                body = self.encoder.finish(body)
+                record('compress', started)
+                headers["Content-Length"] = str(len(body))
+                await self.downstream(start)
+                await self.downstream({"type": "http.response.body", "body": body})
+                return
+            if "content-length" in headers:
+                del headers["content-length"]
+            body = self.encoder.compress(body)
+            record('compress', started)
+            await self.downstream(start)
+            await self.downstream({"type": "http.response.body", "body": body, "more_body": True})
+            return
+
+        started = time.perf_counter()
+        body = self.encoder.compress(body) if more_body else self.encoder.finish(body)
+        record('compress', started)
+        await self.downstream({"type": "http.response.body", "body": body, "more_body": more_body})
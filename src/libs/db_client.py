@@ -1,8 +1,31 @@
 """CockroachDB client
 """
+import time
+import random
+import asyncio
+import logging
 import asyncpg
 from enum import Enum
-from src.constants import DB_POOL_DEFAULT_MIN_SIZE, DB_POOL_DEFAULT_MAX_SIZE
+from collections import Counter
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from src.libs.metrics import Histogram
+from src.libs.timing import record
+from src.libs.single_flight import SingleFlight, call_key
+from src.libs.batch_loader import BatchLoader
+from src.libs.write_coalescer import WriteCoalescer
+from src.constants import DB_POOL_DEFAULT_MIN_SIZE, DB_POOL_DEFAULT_MAX_SIZE, DB_DEFAULT_STATEMENT_CACHE_SIZE, \
+    DB_DEFAULT_MAX_CACHED_STATEMENT_LIFETIME, DB_DEFAULT_MAX_INACTIVE_CONNECTION_LIFETIME, \
+    DB_POOL_DEFAULT_ACQUIRE_TIMEOUT, DB_CURSOR_DEFAULT_PREFETCH, DB_DEFAULT_FOLLOWER_READ_AS_OF, \
+    DB_TXN_DEFAULT_MAX_RETRIES, DB_TXN_DEFAULT_RETRY_BASE_DELAY, DB_TXN_DEFAULT_RETRY_MAX_DELAY, \
+    DB_DEFAULT_COALESCE_READS, DB_DEFAULT_BATCH_WINDOW, DB_DEFAULT_BATCH_MAX_SIZE, DB_DEFAULT_WRITE_BATCH_INTERVAL, \
+    DB_DEFAULT_WRITE_BATCH_MAX_SIZE, DB_DEFAULT_WRITE_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+RO_POOL: str = 'ro'
+RW_POOL: str = 'rw'
+UNREGISTERED_STATEMENT: str = 'unregistered'
 
 class DBAccessMode(Enum):
     """DB access mode definitions
@@ -11,7 +34,111 @@ class DBAccessMode(Enum):
     WRITE = "WRITE"
     BOTH = "BOTH"
 
-class CockroachDBClient:
+class PreparedConnection(asyncpg.Connection):
+    """Pooled connection that keeps the registered statements prepared in its statement cache
+    """
+    def __init__(self, *args, **kwargs):
+        """Initialize this class and set class members
+        """
+        super().__init__(*args, **kwargs)
+        self.prepared_statements: set = set()
+
+    async def prepare_cached(self, name: str, query: str):
+        """Prepare a statement into the statement cache that fetch() looks up by query text
+        """
+        await self._prepare(query, use_cache=True)
+        self.prepared_statements.add(name)
+
+class SharedQueries:
+    """Read coalescing, read batching and write batching of a DB client
+
+    Base class of CockroachDBClient and of the benchmarks' in-memory client,
+    which implement read(query, *args, follower_read), write(query, *args)
+    and write_transaction(name, callback). Every write makes later reads
+    start their own query instead of sharing one already in flight.
+    """
+    def __init__(
+        self,
+        coalesce_reads: bool = DB_DEFAULT_COALESCE_READS,
+        batch_window: float = DB_DEFAULT_BATCH_WINDOW,
+        batch_max_size: int = DB_DEFAULT_BATCH_MAX_SIZE,
+        write_batch_interval: float = DB_DEFAULT_WRITE_BATCH_INTERVAL,
+        write_batch_max_size: int = DB_DEFAULT_WRITE_BATCH_MAX_SIZE,
+        write_queue_size: int = DB_DEFAULT_WRITE_QUEUE_SIZE
+    ):
+        """Initialize this class and set class members
+        """
+        self.coalesce_reads = coalesce_reads
+        self.batch_window = batch_window
+        self.batch_max_size = batch_max_size
+        self.write_batch_interval = write_batch_interval
+        self.write_batch_max_size = write_batch_max_size
+        self.write_queue_size = write_queue_size
+        self.statements: Dict[str, Tuple[str, DBAccessMode]] = {}
+        self.reads: SingleFlight = SingleFlight()
+        self.loaders: Dict[str, BatchLoader] = {}
+        self.coalescers: Dict[str, WriteCoalescer] = {}
+
+    async def execute_read(self, query: str, *args, follower_read: bool = False):
+        """Perform read operation, optionally as a bounded-staleness follower read.
+        Concurrent reads with the same statement and arguments share one connection and query (see SingleFlight).
+        """
+        if not self.coalesce_reads:
+            return await self.read(query, *args, follower_read=follower_read)
+        return await self.reads.run(
+            query if query in self.statements else UNREGISTERED_STATEMENT, call_key(query, follower_read, *args),
+            lambda: self.read(query, *args, follower_read=follower_read)
+        )
+
+    async def execute_write(self, query: str, *args):
+        """Perform write operation.
+        Reads already in flight are not shared with later reads, which must see the write.
+        """
+        try:
+            return await self.write(query, *args)
+        finally:
+            self.reads.invalidate()
+
+    async def run_transaction(self, name: str, callback: Callable[[Any], Awaitable]) -> Any:
+        """Run callback(conn) in a write transaction (see write_transaction).
+        Reads already in flight are not shared with later reads, which must see the writes.
+        """
+        try:
+            return await self.write_transaction(name, callback)
+        finally:
+            self.reads.invalidate()
+
+    def loader(self, name: str, load_many: Callable[[List[Hashable]], Awaitable[Dict]]) -> BatchLoader:
+        """Batch loader registered under name, created on first use with the client's batch window and size
+        """
+        if name not in self.loaders:
+            self.loaders[name] = BatchLoader(load_many, window=self.batch_window, max_size=self.batch_max_size)
+        return self.loaders[name]
+
+    def coalescer(self, name: str, apply: Callable[[List], Awaitable[List[Tuple[Any, Optional[str]]]]]) -> WriteCoalescer:
+        """Write coalescer registered under name, created on first use with the client's write batch settings
+        """
+        if name not in self.coalescers:
+            self.coalescers[name] = WriteCoalescer(apply, interval=self.write_batch_interval,
+                                                   max_size=self.write_batch_max_size, queue_size=self.write_queue_size)
+        return self.coalescers[name]
+
+    async def close_coalescers(self):
+        """Commit the queued writes and stop the flushers
+        """
+        for coalescer in self.coalescers.values():
+            await coalescer.close()
+
+    def sharing_stats(self) -> Dict:
+        """Return coalescing, batching and write batching counters
+        """
+        return {
+            'coalescing': self.reads.stats(),
+            'batching': {name: loader.stats() for name, loader in self.loaders.items()},
+            'write_batching': {name: coalescer.stats() for name, coalescer in self.coalescers.items()}
+        }
+
+class CockroachDBClient(SharedQueries):
     """CockroachDBClient class
     """
     def __init__(
@@ -21,57 +148,347 @@ class CockroachDBClient:
         rw_dsn: str | None = None,
         mode: DBAccessMode = DBAccessMode.BOTH,
         min_size: int = DB_POOL_DEFAULT_MIN_SIZE,
-        max_size: int = DB_POOL_DEFAULT_MAX_SIZE
+        max_size: int = DB_POOL_DEFAULT_MAX_SIZE,
+        statement_cache_size: int = DB_DEFAULT_STATEMENT_CACHE_SIZE,
+        max_cached_statement_lifetime: float = DB_DEFAULT_MAX_CACHED_STATEMENT_LIFETIME,
+        max_inactive_connection_lifetime: float = DB_DEFAULT_MAX_INACTIVE_CONNECTION_LIFETIME,
+        acquire_timeout: float | None = DB_POOL_DEFAULT_ACQUIRE_TIMEOUT,
+        command_timeout: float | None = None,
+        follower_read_as_of: str = DB_DEFAULT_FOLLOWER_READ_AS_OF,
+        max_retries: int = DB_TXN_DEFAULT_MAX_RETRIES,
+        retry_base_delay: float = DB_TXN_DEFAULT_RETRY_BASE_DELAY,
+        retry_max_delay: float = DB_TXN_DEFAULT_RETRY_MAX_DELAY,
+        coalesce_reads: bool = DB_DEFAULT_COALESCE_READS,
+        batch_window: float = DB_DEFAULT_BATCH_WINDOW,
+        batch_max_size: int = DB_DEFAULT_BATCH_MAX_SIZE,
+        write_batch_interval: float = DB_DEFAULT_WRITE_BATCH_INTERVAL,
+        write_batch_max_size: int = DB_DEFAULT_WRITE_BATCH_MAX_SIZE,
+        write_queue_size: int = DB_DEFAULT_WRITE_QUEUE_SIZE
     ):
         """Initialize this class and set class members
         """
+        super().__init__(
+            coalesce_reads=coalesce_reads, batch_window=batch_window, batch_max_size=batch_max_size,
+            write_batch_interval=write_batch_interval, write_batch_max_size=write_batch_max_size,
+            write_queue_size=write_queue_size
+        )
         self.ssl = ssl
         self.ro_dsn = ro_dsn
         self.rw_dsn = rw_dsn
         self.mode = mode
         self.min_size = min_size
         self.max_size = max_size
+        self.statement_cache_size = statement_cache_size
+        self.max_cached_statement_lifetime = max_cached_statement_lifetime
+        self.max_inactive_connection_lifetime = max_inactive_connection_lifetime
+        self.acquire_timeout = acquire_timeout
+        self.command_timeout = command_timeout
+        self.follower_read_as_of = follower_read_as_of
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
         self.ro_pool = None
         self.rw_pool = None
+        self.startup: asyncio.Task | None = None
+        self.connected: bool = False
+        self.pool_metrics: Dict[str, Dict] = {
+            pool_name: {'waiters': 0, 'acquire_timeouts': 0, 'acquire_latency': Histogram()}
+            for pool_name in (RO_POOL, RW_POOL)
+        }
+        self.prepare_counts: Counter = Counter()
+        self.execute_counts: Counter = Counter()
+        self.unregistered_executions: int = 0
+        self.follower_reads: int = 0
+        self.retry_counts: Counter = Counter()
+        self.retries_exhausted: Counter = Counter()
+
+    def register_statements(self, statements: Dict[str, Tuple[str, DBAccessMode]]):
+        """Register named statements, prepared on every pooled connection whose access mode they need
+        """
+        self.statements.update(statements)
+
+    async def create_pool(self, dsn: str, mode: DBAccessMode):
+        """Create a connection pool that prepares the statements of the given access mode
+        """
+        async def init(conn: PreparedConnection):
+            if not self.statement_cache_size:
+                return
+            for name, (query, statement_mode) in self.statements.items():
+                if statement_mode == mode:
+                    await self.prepare(conn, name, query)
+
+        return await asyncpg.create_pool(
+            dsn=dsn, min_size=self.min_size, max_size=self.max_size, ssl=self.ssl,
+            statement_cache_size=self.statement_cache_size,
+            max_cached_statement_lifetime=self.max_cached_statement_lifetime,
+            max_inactive_connection_lifetime=self.max_inactive_connection_lifetime,
+            command_timeout=self.command_timeout,
+            connection_class=PreparedConnection,
+            init=init
+        )
 
     async def connect(self):
         """Connect DB
         """
-        if self.mode in (DBAccessMode.READ, DBAccessMode.BOTH) and self.ro_dsn:
-            self.ro_pool = await asyncpg.create_pool(
-                dsn=self.ro_dsn, min_size=self.min_size, max_size=self.max_size, ssl=self.ssl
-            )
-        if self.mode in (DBAccessMode.WRITE, DBAccessMode.BOTH) and self.rw_dsn:
-            self.rw_pool = await asyncpg.create_pool(
-                dsn=self.rw_dsn, min_size=self.min_size, max_size=self.max_size, ssl=self.ssl
-            )
+        if self.mode in (DBAccessMode.READ, DBAccessMode.BOTH) and self.ro_dsn and self.ro_pool is None:
+            self.ro_pool = await self.create_pool(self.ro_dsn, DBAccessMode.READ)
+        if self.mode in (DBAccessMode.WRITE, DBAccessMode.BOTH) and self.rw_dsn and self.rw_pool is None:
+            self.rw_pool = await self.create_pool(self.rw_dsn, DBAccessMode.WRITE)
+
+    async def start_up(self):
+        """Connect and warm up the pools
+        """
+        await self.connect()
+        await self.warm_up()
+        self.connected = True
+
+    def start(self):
+        """Connect and warm up in the background, so the app can serve requests that need no database meanwhile.
+        Queries wait until it is done.
+        """
+        self.startup = asyncio.ensure_future(self.start_up())
+        self.startup.add_done_callback(self.log_startup_failure)
+
+    def log_startup_failure(self, task: asyncio.Task):
+        """Log a failed background start when it happens; the next ready() retries it and raises its error
+        """
+        if task.cancelled() or task.exception() is None:
+            return
+        logger.error("DB client (%s) failed to connect: %s", self.mode.value, task.exception(),
+                     exc_info=task.exception())
+
+    async def ready(self):
+        """Wait for a background start(), starting it again if the last attempt failed
+        """
+        if self.startup is None or self.connected:
+            return
+        if self.startup.done() and not self.startup.cancelled():
+            self.start()
+        await asyncio.shield(self.startup)
 
     async def disconnect(self):
         """Disconnect DB
         """
+        if self.startup is not None and not self.startup.done():
+            self.startup.cancel()
+        await self.close_coalescers()
         if self.ro_pool:
             await self.ro_pool.close()
         if self.rw_pool:
             await self.rw_pool.close()
 
-    async def execute_read(self, query: str, *args):
-        """Perform read operation
+    async def warm_up(self):
+        """Open and ping min_size connections on every pool so the first requests do not pay for it
         """
-        if self.ro_pool:
-            async with self.ro_pool.acquire() as conn:
-                return await conn.fetch(query, *args)
-        elif self.rw_pool:
-            async with self.rw_pool.acquire() as conn:
+        for pool in (self.ro_pool, self.rw_pool):
+            if pool is None:
+                continue
+            async with AsyncExitStack() as stack:
+                for _ in range(self.min_size):
+                    conn = await stack.enter_async_context(pool.acquire(timeout=self.acquire_timeout))
+                    await conn.execute('SELECT 1')
+
+    @asynccontextmanager
+    async def acquire(self, pool_name: str):
+        """Acquire a pooled connection, recording wait time, waiters and timeouts
+        """
+        pool = self.ro_pool if pool_name == RO_POOL else self.rw_pool
+        metrics: Dict = self.pool_metrics[pool_name]
+        metrics['waiters'] += 1
+        started: float = time.perf_counter()
+        try:
+            conn = await pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            metrics['acquire_timeouts'] += 1
+            raise RuntimeError(
+                f"Timed out after {self.acquire_timeout}s acquiring a connection from the {pool_name} pool."
+            )
+        finally:
+            metrics['waiters'] -= 1
+            metrics['acquire_latency'].observe(time.perf_counter() - started)
+            record('db_acquire', started)
+        try:
+            yield conn
+        finally:
+            await pool.release(conn)
+
+    def pool_stats(self) -> Dict:
+        """Return size, idle, in-use, waiters and acquire latency per pool
+        """
+        stats: Dict = {}
+        for pool_name, pool in ((RO_POOL, self.ro_pool), (RW_POOL, self.rw_pool)):
+            if pool is None:
+                continue
+            metrics: Dict = self.pool_metrics[pool_name]
+            size: int = pool.get_size()
+            idle: int = pool.get_idle_size()
+            stats[pool_name] = {
+                'min_size': pool.get_min_size(),
+                'max_size': pool.get_max_size(),
+                'size': size,
+                'idle': idle,
+                'in_use': size - idle,
+                'waiters': metrics['waiters'],
+                'acquire_timeouts': metrics['acquire_timeouts'],
+                'acquire_latency': metrics['acquire_latency'].snapshot()
+            }
+        return stats
+
+    def stats(self) -> Dict:
+        """Return pool and statement statistics
+        """
+        return {
+            'ready': self.startup is None or self.connected,
+            'pools': self.pool_stats(),
+            'statements': self.statement_stats(),
+            'retries': self.retry_stats(),
+            **self.sharing_stats()
+        }
+
+    async def prepare(self, conn: PreparedConnection, name: str, query: str):
+        """Prepare a named statement on a connection
+        """
+        await conn.prepare_cached(name, query)
+        self.prepare_counts[name] += 1
+
+    async def fetch(self, conn: PreparedConnection, query: str, *args):
+        """Run a registered statement by name, or raw SQL, on an acquired connection
+        """
+        started: float = time.perf_counter()
+        try:
+            if query not in self.statements:
+                self.unregistered_executions += 1
                 return await conn.fetch(query, *args)
-        else:
+
+            sql_query: str = self.statements[query][0]
+            if self.statement_cache_size and query not in conn.prepared_statements:
+                await self.prepare(conn, query, sql_query)
+            self.execute_counts[query] += 1
+            return await conn.fetch(sql_query, *args)
+        finally:
+            record('db_query', started)
+
+    def statement_stats(self) -> Dict:
+        """Return prepare and execute counters per registered statement
+        """
+        return {
+            'prepares': dict(self.prepare_counts),
+            'executions': dict(self.execute_counts),
+            'unregistered_executions': self.unregistered_executions,
+            'follower_reads': self.follower_reads
+        }
+
+    @asynccontextmanager
+    async def read_transaction(self, conn: PreparedConnection, follower_read: bool = False):
+        """Run the enclosed reads in one read-only transaction.
+        A follower read runs AS OF SYSTEM TIME follower_read_as_of and may be served by the nearest replica.
+        """
+        if not follower_read:
+            async with conn.transaction(readonly=True):
+                yield conn
+            return
+
+        self.follower_reads += 1
+        await conn.execute(f"BEGIN AS OF SYSTEM TIME {self.follower_read_as_of}")
+        try:
+            yield conn
+        except BaseException:
+            await conn.execute("ROLLBACK")
+            raise
+        await conn.execute("COMMIT")
+
+    async def read(self, query: str, *args, follower_read: bool = False):
+        """Run one read on a pooled connection
+        """
+        await self.ready()
+        if not self.ro_pool and not self.rw_pool:
             raise RuntimeError("No connection pool (read-only or read-write) is initialized.")
+        async with self.acquire(RO_POOL if self.ro_pool else RW_POOL) as conn:
+            if not follower_read:
+                return await self.fetch(conn, query, *args)
+            async with self.read_transaction(conn, follower_read=True):
+                return await self.fetch(conn, query, *args)
 
-    async def execute_write(self, query: str, *args):
-        """Perform write operation
+    async def stream_read(self, query: str, *args, prefetch: int = DB_CURSOR_DEFAULT_PREFETCH,
+                          follower_read: bool = False) -> AsyncIterator:
+        """Yield the rows of a read through a server-side cursor, holding at most `prefetch` rows in memory
         """
+        await self.ready()
+        if not self.ro_pool and not self.rw_pool:
+            raise RuntimeError("No connection pool (read-only or read-write) is initialized.")
+        async with self.acquire(RO_POOL if self.ro_pool else RW_POOL) as conn:
+            sql_query: str = query
+            if query in self.statements:
+                sql_query = self.statements[query][0]
+                if self.statement_cache_size and query not in conn.prepared_statements:
+                    await self.prepare(conn, query, sql_query)
+                self.execute_counts[query] += 1
+            else:
+                self.unregistered_executions += 1
+            async with self.read_transaction(conn, follower_read=follower_read):
+                async for record in conn.cursor(sql_query, *args, prefetch=prefetch):
+                    yield record
+
+    async def write(self, query: str, *args):
+        """Run one write on a pooled connection, retrying serialization failures
+        """
+        await self.ready()
         if not self.rw_pool:
             raise RuntimeError("Write pool not initialized.")
-        async with self.rw_pool.acquire() as conn:
-            if "RETURNING" in query.upper():
-                return await conn.fetch(query, *args)
-            return await conn.execute(query, *args)
+
+        async def write() -> Any:
+            async with self.acquire(RW_POOL) as conn:
+                if query in self.statements or "RETURNING" in query.upper():
+                    return await self.fetch(conn, query, *args)
+                started: float = time.perf_counter()
+                try:
+                    return await conn.execute(query, *args)
+                finally:
+                    record('db_query', started)
+
+        return await self.with_retries(query, write)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Acquire a write connection and run the enclosed block in one transaction
+        """
+        await self.ready()
+        if not self.rw_pool:
+            raise RuntimeError("Write pool not initialized.")
+        async with self.acquire(RW_POOL) as conn:
+            async with conn.transaction():
+                yield conn
+
+    async def write_transaction(self, name: str, callback: Callable[[PreparedConnection], Awaitable]) -> Any:
+        """Run callback(conn) in a write transaction, re-running the whole transaction on serialization failures.
+        The callback may run more than once, so it must not have side effects outside the transaction.
+        """
+        async def attempt() -> Any:
+            async with self.transaction() as conn:
+                return await callback(conn)
+
+        return await self.with_retries(name, attempt)
+
+    async def with_retries(self, name: str, operation: Callable[[], Awaitable]) -> Any:
+        """Await operation(), retrying SQLSTATE 40001 with full-jitter exponential backoff up to max_retries times
+        """
+        attempt: int = 0
+        while True:
+            try:
+                return await operation()
+            except asyncpg.SerializationError:
+                if attempt >= self.max_retries:
+                    self.retries_exhausted[name] += 1
+                    raise
+                delay: float = min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt)
+                attempt += 1
+                self.retry_counts[name] += 1
+                await asyncio.sleep(random.uniform(0, delay))
+
+    def retry_stats(self) -> Dict:
+        """Return serialization-failure retries and exhausted retry budgets per statement or transaction
+        """
+        return {
+            'retries': dict(self.retry_counts),
+            'exhausted': dict(self.retries_exhausted)
+        }
@@ -0,0 +1,67 @@
+"""ASGI app loaded in the background after startup
+"""
+import asyncio
+from typing import Awaitable, Callable, Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+class DeferredApp:
+    """Mountable placeholder for a Starlette app that is slow to import
+
+    start() loads the app in a background task and runs its lifespan until
+    stop(); requests arriving before it is loaded wait for it. The server can
+    thus answer its other routes while the deferred app is still importing.
+    """
+    def __init__(self, loader: Callable[[], Awaitable[ASGIApp]]):
+        """Initialize this class and set class members
+        """
+        self.loader = loader
+        self.app: Optional[ASGIApp] = None
+        self.loaded: Optional[asyncio.Future] = None
+        self.stopping: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start loading the app
+        """
+        self.loaded = asyncio.get_running_loop().create_future()
+        self.stopping = asyncio.Event()
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        """Load the app and hold its lifespan open, in one task as anyio requires
+        """
+        try:
+            app = await self.loader()
+            async with app.router.lifespan_context(app):
+                self.app = app
+                self.loaded.set_result(app)
+                await self.stopping.wait()
+        except Exception as e:
+            if not self.loaded.done():
+                self.loaded.set_exception(e)
+            else:
+                raise
+        finally:
+            self.app = None
+
+    async def stop(self):
+        """Run the app's lifespan shutdown
+        """
+        if self.task is None:
+            return
+        self.stopping.set()
+        await self.task
+        self.task = None
+
+    async def ready(self) -> ASGIApp:
+        """Wait until the app is loaded; raises the loader's error when loading failed
+        """
+        if self.app is not None:
+            return self.app
+        if self.loaded is None:
+            raise RuntimeError("The deferred app has not been started.")
+        return await asyncio.shield(self.loaded)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        app: ASGIApp = self.app or await self.ready()
+        await app(scope, receive, send)
@@ -1,33 +1,108 @@
 import os
+from typing import Dict
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from src.libs.db_client import CockroachDBClient, DBAccessMode
-from src.constants import DB_RO_VAR, DB_RW_VAR
+from src.models.user_dal import UserDAL
+from src.libs.cache import CacheBackend, InMemoryCacheBackend, RedisCacheBackend
+from src.constants import DB_RO_VAR, DB_RW_VAR, DB_POOL_MIN_SIZE_VAR, DB_POOL_MAX_SIZE_VAR, DB_POOL_ACQUIRE_TIMEOUT_VAR, \
+    DB_COMMAND_TIMEOUT_VAR, DB_FOLLOWER_READ_AS_OF_VAR, DB_DEFAULT_FOLLOWER_READ_AS_OF, DB_POOL_DEFAULT_MIN_SIZE, DB_POOL_DEFAULT_MAX_SIZE, DB_POOL_DEFAULT_ACQUIRE_TIMEOUT, \
+    DB_STATEMENT_CACHE_SIZE_VAR, DB_MAX_CACHED_STATEMENT_LIFETIME_VAR, \
+    DB_MAX_INACTIVE_CONNECTION_LIFETIME_VAR, DB_DEFAULT_STATEMENT_CACHE_SIZE, DB_DEFAULT_MAX_CACHED_STATEMENT_LIFETIME, \
+    DB_DEFAULT_MAX_INACTIVE_CONNECTION_LIFETIME, USER_CACHE_BACKEND_VAR, USER_CACHE_MAX_SIZE_VAR, \
+    USER_CACHE_TTL_VAR, USER_CACHE_REDIS_URL_VAR, USER_CACHE_MEMORY_BACKEND, USER_CACHE_REDIS_BACKEND, \
+    USER_CACHE_DEFAULT_MAX_SIZE, USER_CACHE_DEFAULT_TTL, USER_CACHE_NAMESPACE, USER_CACHE_TOMBSTONE_TTL_VAR, \
+    USER_CACHE_DEFAULT_TOMBSTONE_TTL, DB_TXN_MAX_RETRIES_VAR, \
+    DB_TXN_RETRY_BASE_DELAY_VAR, DB_TXN_RETRY_MAX_DELAY_VAR, DB_TXN_DEFAULT_MAX_RETRIES, \
+    DB_TXN_DEFAULT_RETRY_BASE_DELAY, DB_TXN_DEFAULT_RETRY_MAX_DELAY, DB_COALESCE_READS_VAR, DB_DEFAULT_COALESCE_READS, \
+    DB_BATCH_WINDOW_VAR, DB_BATCH_MAX_SIZE_VAR, DB_DEFAULT_BATCH_WINDOW, DB_DEFAULT_BATCH_MAX_SIZE, \
+    DB_WRITE_BATCH_INTERVAL_VAR, DB_WRITE_BATCH_MAX_SIZE_VAR, DB_WRITE_QUEUE_SIZE_VAR, DB_DEFAULT_WRITE_BATCH_INTERVAL, \
+    DB_DEFAULT_WRITE_BATCH_MAX_SIZE, DB_DEFAULT_WRITE_QUEUE_SIZE
 
-db_client_ro = CockroachDBClient(
-    ro_dsn=os.getenv(DB_RO_VAR),
-    mode=DBAccessMode.READ
-)
+db_client_options: Dict = {
+    'min_size': int(os.getenv(DB_POOL_MIN_SIZE_VAR) or DB_POOL_DEFAULT_MIN_SIZE),
+    'max_size': int(os.getenv(DB_POOL_MAX_SIZE_VAR) or DB_POOL_DEFAULT_MAX_SIZE),
+    'acquire_timeout': float(os.getenv(DB_POOL_ACQUIRE_TIMEOUT_VAR) or DB_POOL_DEFAULT_ACQUIRE_TIMEOUT) or None,
+    'command_timeout': float(os.getenv(DB_COMMAND_TIMEOUT_VAR) or 0) or None,
+    'follower_read_as_of': os.getenv(DB_FOLLOWER_READ_AS_OF_VAR) or DB_DEFAULT_FOLLOWER_READ_AS_OF,
+    'statement_cache_size': int(os.getenv(DB_STATEMENT_CACHE_SIZE_VAR) or DB_DEFAULT_STATEMENT_CACHE_SIZE),
+    'max_cached_statement_lifetime': float(
+        os.getenv(DB_MAX_CACHED_STATEMENT_LIFETIME_VAR) or DB_DEFAULT_MAX_CACHED_STATEMENT_LIFETIME
+    ),
+    'max_inactive_connection_lifetime': float(
+        os.getenv(DB_MAX_INACTIVE_CONNECTION_LIFETIME_VAR) or DB_DEFAULT_MAX_INACTIVE_CONNECTION_LIFETIME
+    ),
+    'max_retries': int(os.getenv(DB_TXN_MAX_RETRIES_VAR) or DB_TXN_DEFAULT_MAX_RETRIES),
+    'retry_base_delay': float(os.getenv(DB_TXN_RETRY_BASE_DELAY_VAR) or DB_TXN_DEFAULT_RETRY_BASE_DELAY),
+    'retry_max_delay': float(os.getenv(DB_TXN_RETRY_MAX_DELAY_VAR) or DB_TXN_DEFAULT_RETRY_MAX_DELAY),
+    'coalesce_reads': (os.getenv(DB_COALESCE_READS_VAR) or str(DB_DEFAULT_COALESCE_READS)).lower() in ('1', 'true'),
+    'batch_window': float(os.getenv(DB_BATCH_WINDOW_VAR) or DB_DEFAULT_BATCH_WINDOW),
+    'batch_max_size': int(os.getenv(DB_BATCH_MAX_SIZE_VAR) or DB_DEFAULT_BATCH_MAX_SIZE),
+    'write_batch_interval': float(os.getenv(DB_WRITE_BATCH_INTERVAL_VAR) or DB_DEFAULT_WRITE_BATCH_INTERVAL),
+    'write_batch_max_size': int(os.getenv(DB_WRITE_BATCH_MAX_SIZE_VAR) or DB_DEFAULT_WRITE_BATCH_MAX_SIZE),
+    'write_queue_size': int(os.getenv(DB_WRITE_QUEUE_SIZE_VAR) or DB_DEFAULT_WRITE_QUEUE_SIZE)
+}
 
-db_client_rw = CockroachDBClient(
-    rw_dsn=os.getenv(DB_RW_VAR),
-    mode=DBAccessMode.WRITE
-)
+# Clients to use instead of the ones built from the environment (e.g. benchmarks.fake_db), set before startup
+db_client_ro: CockroachDBClient | None = None
+db_client_rw: CockroachDBClient | None = None
+
+def create_db_client(mode: DBAccessMode) -> CockroachDBClient:
+    """Build the DB client of an access mode from the environment.
+    """
+    if mode == DBAccessMode.READ:
+        db_client = CockroachDBClient(ro_dsn=os.getenv(DB_RO_VAR), mode=mode, **db_client_options)
+    else:
+        db_client = CockroachDBClient(rw_dsn=os.getenv(DB_RW_VAR), mode=mode, **db_client_options)
+    db_client.register_statements(UserDAL.STATEMENTS)
+    return db_client
+
+def create_user_cache() -> CacheBackend | None:
+    """Build the user cache backend selected by the environment.
+    """
+    backend: str = os.getenv(USER_CACHE_BACKEND_VAR) or USER_CACHE_MEMORY_BACKEND
+    max_size: int = int(os.getenv(USER_CACHE_MAX_SIZE_VAR) or USER_CACHE_DEFAULT_MAX_SIZE)
+    ttl: float = float(os.getenv(USER_CACHE_TTL_VAR) or USER_CACHE_DEFAULT_TTL)
+    tombstone_ttl: float = float(os.getenv(USER_CACHE_TOMBSTONE_TTL_VAR) or USER_CACHE_DEFAULT_TOMBSTONE_TTL)
+    if backend == USER_CACHE_REDIS_BACKEND:
+        return RedisCacheBackend(
+            url=os.getenv(USER_CACHE_REDIS_URL_VAR),
+            ttl=ttl,
+            namespace=USER_CACHE_NAMESPACE,
+            near_cache_size=max_size,
+            tombstone_ttl=tombstone_ttl
+        )
+    if backend == USER_CACHE_MEMORY_BACKEND and max_size > 0:
+        return InMemoryCacheBackend(max_size=max_size, ttl=ttl, tombstone_ttl=tombstone_ttl)
+    return None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """FastAPI lifespan context manager to manage resources.
+
+    Clients are built here rather than at import. The DB pools connect and
+    warm up in the background, so the server starts answering requests that
+    need no database (e.g. /mcp/status/) right away; queries wait for them.
     """
-    app.state.db_client_ro = db_client_ro
-    app.state.db_client_rw = db_client_rw
+    app.state.db_client_ro = db_client_ro or create_db_client(DBAccessMode.READ)
+    app.state.db_client_rw = db_client_rw or create_db_client(DBAccessMode.WRITE)
+    # Reads run on the read-only client and writes on the read-write one: they share in-flight reads so a write
+    # stops later reads from joining a query that started before it
+    app.state.db_client_rw.reads = app.state.db_client_ro.reads
+    app.state.user_cache = create_user_cache()
 
-    await db_client_ro.connect()
-    await db_client_rw.connect()
+    app.state.db_client_ro.start()
+    app.state.db_client_rw.start()
+    if app.state.user_cache:
+        await app.state.user_cache.connect()
 
     try:
         yield
     finally:
-        await db_client_ro.disconnect()
-        await db_client_rw.disconnect()
+        await app.state.db_client_ro.disconnect()
+        await app.state.db_client_rw.disconnect()
+        if app.state.user_cache:
+            await app.state.user_cache.disconnect()
         del app.state.db_client_ro
         del app.state.db_client_rw
+        del app.state.user_cache
@@ -0,0 +1,66 @@
+"""OpenAPI document and MCP tool manifest, built once per process
+
+The OpenAPI schema and the MCP tools/list payload only change when the code
+does, so both are encoded once at startup and served as static documents
+with a strong ETag. `python -m src.manifest` writes the same files for
+clients (e.g. the ADK agent) that should not need a live server to start.
+"""
+import os
+from typing import List, Optional, Sequence
+from fastapi import FastAPI
+from fastmcp import FastMCP
+from fastmcp.tools import Tool
+from fastmcp.server.middleware import Middleware, MiddlewareContext, CallNext
+from src.helpers.common import json_dumps
+from src.helpers.responses import StaticDocument
+from src.constants import MANIFEST_OPENAPI_FILE, MANIFEST_TOOLS_FILE
+
+class ToolsListCache(Middleware):
+    """Answer tools/list from the first result
+
+    FastMCP re-resolves the `$ref`s of every tool schema on each tools/list
+    (~12 ms for this server). Tools are registered at import and do not change
+    afterwards, so the result is kept for the life of the process. Must be the
+    outermost middleware to also skip the dereferencing.
+    """
+    def __init__(self):
+        """Initialize this class and set class members
+        """
+        self.tools: Optional[Sequence[Tool]] = None
+
+    async def on_list_tools(self, context: MiddlewareContext, call_next: CallNext) -> Sequence[Tool]:
+        if self.tools is None:
+            self.tools = await call_next(context)
+        return self.tools
+
+class Manifest:
+    """OpenAPI document and tools/list payload of the app
+    """
+    def __init__(self, app: FastAPI, mcp: FastMCP):
+        """Initialize this class and set class members
+        """
+        self.app: FastAPI = app
+        self.mcp: FastMCP = mcp
+        self.openapi: Optional[StaticDocument] = None
+        self.tools: Optional[StaticDocument] = None
+
+    async def build(self):
+        """Encode both documents; tools are listed as an MCP client receives them
+        """
+        tools: Sequence[Tool] = await self.mcp.list_tools()
+        self.openapi = StaticDocument(json_dumps(self.app.openapi()))
+        self.tools = StaticDocument(json_dumps({
+            'tools': [tool.to_mcp_tool().model_dump(mode='json', by_alias=True, exclude_none=True) for tool in tools]
+        }))
+
+    def write(self, directory: str) -> List[str]:
+        """Write both documents to a directory, returning the file paths
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths: List[str] = []
+        for name, document in ((MANIFEST_OPENAPI_FILE, self.openapi), (MANIFEST_TOOLS_FILE, self.tools)):
+            path: str = os.path.join(directory, name)
+            with open(path, 'wb') as file:
+                file.write(document.body)
+            paths.append(path)
+        return paths
@@ -0,0 +1,34 @@
+"""Runtime metrics
+"""
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+LATENCY_BUCKETS: Tuple = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Cumulative bucket histogram of observed values (in seconds)
+    """
+    def __init__(self, buckets: Tuple = LATENCY_BUCKETS):
+        """Initialize this class and set class members
+        """
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+
+    def observe(self, value: float):
+        """Record one observation
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict:
+        """Return cumulative counts per upper bound
+        """
+        cumulative: int = 0
+        buckets: Dict = {}
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {'count': self.count, 'sum': self.sum, 'buckets': buckets}
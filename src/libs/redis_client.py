@@ -0,0 +1,171 @@
+"""Minimal asyncio Redis (RESP2) client
+"""
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from urllib.parse import urlsplit, unquote
+
+REDIS_DEFAULT_PORT: int = 6379
+
+class RedisError(Exception):
+    """Error reply returned by the Redis server
+    """
+
+def encode_command(*args) -> bytes:
+    """Encode a command as a RESP array of bulk strings
+    """
+    parts: List[bytes] = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """Read one RESP reply
+    """
+    line = await reader.readuntil(b'\r\n')
+    prefix, payload = line[:1], line[1:-2]
+    if prefix == b'+':
+        return payload.decode()
+    if prefix == b'-':
+        return RedisError(payload.decode())
+    if prefix == b':':
+        return int(payload)
+    if prefix == b'$':
+        length = int(payload)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if prefix == b'*':
+        length = int(payload)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"Unexpected RESP reply: {line!r}")
+
+class RedisClient:
+    """Single-connection Redis client that pipelines concurrent commands
+    """
+    def __init__(self, url: str, timeout: float = 1.0):
+        """Initialize this class and set class members
+        """
+        parts = urlsplit(url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or REDIS_DEFAULT_PORT
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.lstrip('/') or 0)
+        self.ssl = parts.scheme == 'rediss'
+        self.timeout = timeout
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.pending: deque = deque()
+        self.reader_task: Optional[asyncio.Task] = None
+        self.connect_lock = asyncio.Lock()
+
+    async def open_connection(self):
+        """Open a connection, authenticate and select the database
+        """
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl or None), self.timeout
+        )
+        commands: List = []
+        if self.password:
+            commands.append(('AUTH', self.username, self.password) if self.username else ('AUTH', self.password))
+        if self.db:
+            commands.append(('SELECT', self.db))
+        for command in commands:
+            writer.write(encode_command(*command))
+            reply = await asyncio.wait_for(read_reply(reader), self.timeout)
+            if isinstance(reply, RedisError):
+                writer.close()
+                raise reply
+        return reader, writer
+
+    async def connect(self):
+        """Connect and start the reply reader
+        """
+        async with self.connect_lock:
+            if self.writer is not None:
+                return
+            self.reader, self.writer = await self.open_connection()
+            self.reader_task = asyncio.create_task(self.read_replies())
+
+    async def disconnect(self):
+        """Close the connection and fail any pending command
+        """
+        if self.reader_task:
+            self.reader_task.cancel()
+        self.reset(ConnectionError("Redis connection closed."))
+
+    def reset(self, error: Exception):
+        """Drop the current connection
+        """
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = self.reader_task = None
+        while self.pending:
+            future = self.pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    async def read_replies(self):
+        """Resolve pending commands in the order their replies arrive
+        """
+        try:
+            while True:
+                reply = await read_reply(self.reader)
+                future = self.pending.popleft()
+                if future.done():
+                    continue
+                if isinstance(reply, RedisError):
+                    future.set_exception(reply)
+                else:
+                    future.set_result(reply)
+        except asyncio.CancelledError:
+            raise
+        except (OSError, asyncio.IncompleteReadError, ConnectionError) as e:
+            self.reset(ConnectionError(f"Redis connection lost: {str(e)}"))
+
+    async def execute(self, *args) -> Any:
+        """Send a command and wait for its reply
+        """
+        if self.writer is None:
+            await self.connect()
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append(future)
+        self.writer.write(encode_command(*args))
+        return await asyncio.wait_for(future, self.timeout)
+
+    async def pipeline(self, commands: List[Tuple]) -> List[Any]:
+        """Send several commands in one write and wait for their replies, in order.
+        Raises the first error reply after every reply has arrived.
+        """
+        if self.writer is None:
+            await self.connect()
+        loop = asyncio.get_running_loop()
+        futures: List[asyncio.Future] = [loop.create_future() for _ in commands]
+        self.pending.extend(futures)
+        self.writer.write(b''.join(encode_command(*command) for command in commands))
+        replies: List = await asyncio.wait_for(asyncio.gather(*futures, return_exceptions=True), self.timeout)
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+        return replies
+
+    async def subscribe(self, channel: str, callback: Callable[[bytes], Awaitable[None] | None]):
+        """Listen on a pub/sub channel on a dedicated connection until cancelled
+        """
+        reader, writer = await self.open_connection()
+        try:
+            writer.write(encode_command('SUBSCRIBE', channel))
+            while True:
+                reply = await read_reply(reader)
+                if isinstance(reply, list) and len(reply) == 3 and reply[0] == b'message':
+                    result = callback(reply[2])
+                    if asyncio.iscoroutine(result):
+                        await result
+        finally:
+            writer.close()
@@ -0,0 +1,70 @@
+"""Single-flight deduplication of concurrent identical calls
+"""
+import asyncio
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+# Set in the caller's context when it got the result of a call started by another caller
+shared_call: ContextVar[bool] = ContextVar('shared_call', default=False)
+
+def call_key(*args) -> Tuple:
+    """Hashable key of call arguments, with lists (e.g. of ids) as tuples
+    """
+    return tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args)
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers with the same key
+
+    The first caller of a key starts the call in its own task; callers with
+    the same key arriving before it completes await that task instead of
+    making their own call, and all get its result (the same object, which
+    callers must not mutate) or exception. The task is shielded, so a
+    cancelled caller does not cancel the call for the others. A key is
+    forgotten as soon as its call completes: nothing is cached. invalidate()
+    forgets every call in flight, so that calls made after a write do not get
+    rows read before it. Callers that shared a call see `shared_call` set and
+    should not cache its result, which may predate a write made elsewhere.
+    """
+    def __init__(self):
+        """Initialize this class and set class members
+        """
+        self.calls: Dict[Hashable, asyncio.Future] = {}
+        self.call_counts: Counter = Counter()
+        self.collapsed_counts: Counter = Counter()
+
+    async def run(self, name: str, key: Hashable, call: Callable[[], Awaitable]) -> Any:
+        """Await call(), or the call already in flight for key; `name` labels the counters
+        """
+        self.call_counts[name] += 1
+        future = self.calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self.calls[key] = future
+            future.add_done_callback(lambda done: self.forget(key, done))
+        else:
+            self.collapsed_counts[name] += 1
+            shared_call.set(True)
+        return await asyncio.shield(future)
+
+    def invalidate(self):
+        """Let later callers start their own call instead of sharing one already in flight
+        """
+        self.calls.clear()
+
+    def forget(self, key: Hashable, future: asyncio.Future):
+        """Drop a completed call, retrieving its exception in case every caller was cancelled
+        """
+        if self.calls.get(key) is future:
+            del self.calls[key]
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self) -> Dict:
+        """Return calls, calls collapsed into one already in flight, and calls in flight
+        """
+        return {
+            'calls': dict(self.call_counts),
+            'collapsed': dict(self.collapsed_counts),
+            'in_flight': len(self.calls)
+        }
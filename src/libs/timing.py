@@ -0,0 +1,141 @@
+"""Request timing instrumentation
+
+Hot-path code marks phases with
+
+    started = time.perf_counter()
+    ...
+    record('db_query', started)
+
+which adds the elapsed time to the current request's timings. Outside an
+instrumented request (TimingMiddleware not installed) record() is a single
+ContextVar lookup.
+"""
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.libs.metrics import Histogram
+from src.constants import MCP_TOOL_HEADER
+
+TIMING_HEADER: bytes = b'server-timing'
+TOTAL_PHASE: str = 'total'
+HTTP_TRANSPORT: str = 'http'
+MCP_TRANSPORT: str = 'mcp'
+UNMATCHED_OPERATION: str = 'unmatched'
+MCP_TOOL_HEADER_NAME: bytes = MCP_TOOL_HEADER.lower().encode()
+
+current_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('current_timings', default=None)
+
+def record(phase: str, started: float):
+    """Add the time since `started` (time.perf_counter()) to a phase of the current request
+    """
+    timings = current_timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - started
+
+def server_timing(timings: Dict[str, float]) -> bytes:
+    """Server-Timing header value, durations in milliseconds
+    """
+    return ', '.join(f'{phase};dur={seconds * 1000:.3f}' for phase, seconds in timings.items()).encode()
+
+class RequestMetrics:
+    """Latency histograms per (operation id, transport) and per phase
+    """
+    def __init__(self):
+        """Initialize this class and set class members
+        """
+        self.requests: Dict[Tuple[str, str], Histogram] = {}
+        self.phases: Dict[Tuple[str, str], Histogram] = {}
+
+    def observe(self, operation_id: str, transport: str, total: float, timings: Dict[str, float]):
+        """Record one finished request
+        """
+        key: Tuple[str, str] = (operation_id, transport)
+        if key not in self.requests:
+            self.requests[key] = Histogram()
+        self.requests[key].observe(total)
+        for phase, seconds in timings.items():
+            phase_key: Tuple[str, str] = (operation_id, phase)
+            if phase_key not in self.phases:
+                self.phases[phase_key] = Histogram()
+            self.phases[phase_key].observe(seconds)
+
+    def render(self) -> str:
+        """Prometheus text exposition of all histograms
+        """
+        lines: List[str] = [
+            '# HELP mcp_request_duration_seconds Request latency per operation id and transport.',
+            '# TYPE mcp_request_duration_seconds histogram'
+        ]
+        for (operation_id, transport), histogram in sorted(self.requests.items()):
+            lines.extend(self.render_histogram(
+                'mcp_request_duration_seconds', f'operation_id="{operation_id}",transport="{transport}"', histogram
+            ))
+        lines.extend([
+            '# HELP mcp_request_phase_seconds Time spent per request in each phase, per operation id.',
+            '# TYPE mcp_request_phase_seconds histogram'
+        ])
+        for (operation_id, phase), histogram in sorted(self.phases.items()):
+            lines.extend(self.render_histogram(
+                'mcp_request_phase_seconds', f'operation_id="{operation_id}",phase="{phase}"', histogram
+            ))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def render_histogram(name: str, labels: str, histogram: Histogram) -> List[str]:
+        """Bucket, sum and count samples of one histogram
+        """
+        snapshot: Dict = histogram.snapshot()
+        lines: List[str] = [
+            f'{name}_bucket{{{labels},le="{bound}"}} {count}' for bound, count in snapshot['buckets'].items()
+        ]
+        lines.append(f'{name}_sum{{{labels}}} {snapshot["sum"]}')
+        lines.append(f'{name}_count{{{labels}}} {snapshot["count"]}')
+        return lines
+
+request_metrics = RequestMetrics()
+
+class TimingMiddleware:
+    """Time each HTTP request, add a Server-Timing header and feed the /metrics histograms
+
+    Phases recorded before the response starts (pool acquire, queries,
+    serialization) are reported in the header; all of them, including the
+    streamed body, go into the histograms. Requests proxied from an MCP tool
+    call are labelled transport="mcp"; the MCP transport requests themselves
+    are labelled with their path (/mcp/mcp/mcp), so the time FastMCP spends
+    framing a tool call is the difference between the two.
+    """
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics = request_metrics):
+        """Initialize this class and set class members
+        """
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = current_timings.set(timings)
+        started: float = time.perf_counter()
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                header: Dict[str, float] = dict(timings)
+                header[TOTAL_PHASE] = time.perf_counter() - started
+                message["headers"] = list(message.get("headers", [])) + [(TIMING_HEADER, server_timing(header))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            route = scope.get("route")
+            operation_id: str = getattr(route, "operation_id", None) or (
+                scope.get("root_path", "") + route.path if route is not None else UNMATCHED_OPERATION
+            )
+            transport: str = MCP_TRANSPORT if any(
+                name == MCP_TOOL_HEADER_NAME for name, _ in scope["headers"]
+            ) else HTTP_TRANSPORT
+            self.metrics.observe(operation_id, transport, time.perf_counter() - started, timings)
@@ -0,0 +1,119 @@
+"""Write-behind grouping of single-row writes
+"""
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+class WriteCoalescer:
+    """Apply queued writes in groups, one transaction per group
+
+    submit(item) puts the write on a bounded queue (waiting while it is full)
+    and resolves once the group holding it is committed, with the item's
+    result or error: callers see the same durability as a direct write. A
+    flusher task takes the first queued write, waits up to `interval` seconds
+    or until `max_size` writes are queued, and passes them to
+    apply(items), which returns a (result, error) pair per item. Groups are
+    applied one at a time, so writes arriving during a commit make the next
+    group larger. An exception raised by apply fails every write of the group.
+    """
+    def __init__(self, apply: Callable[[List], Awaitable[List[Tuple[Any, Optional[str]]]]],
+                 interval: float, max_size: int, queue_size: int):
+        """Initialize this class and set class members
+        """
+        self.apply = apply
+        self.interval = interval
+        self.max_size = max_size
+        self.queue_size = queue_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.full: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        self.writes: int = 0
+        self.flushes: int = 0
+        self.failed_flushes: int = 0
+
+    def start(self):
+        """Start the flusher, outside of the first caller's context (request timings)
+        """
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.full = asyncio.Event()
+        self.task = asyncio.get_running_loop().create_task(self.run(), context=contextvars.Context())
+
+    async def submit(self, item: Any) -> Any:
+        """Queue a write and wait until it is committed
+        """
+        if self.task is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        # A group error is set on every future, including those of cancelled callers
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        await self.queue.put((item, future))
+        self.writes += 1
+        if self.queue.qsize() >= self.max_size:
+            self.full.set()
+        return await asyncio.shield(future)
+
+    async def run(self):
+        """Flush groups until close() queues None
+        """
+        while True:
+            first = await self.queue.get()
+            if first is None:
+                return
+            if self.queue.qsize() + 1 < self.max_size:
+                self.full.clear()
+                try:
+                    await asyncio.wait_for(self.full.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            group: List = [first]
+            closing: bool = False
+            while len(group) < self.max_size and not self.queue.empty():
+                write = self.queue.get_nowait()
+                if write is None:
+                    closing = True
+                    break
+                group.append(write)
+            await self.flush(group)
+            if closing:
+                return
+
+    async def flush(self, group: List[Tuple[Any, asyncio.Future]]):
+        """Apply one group and resolve its callers
+        """
+        self.flushes += 1
+        try:
+            results = await self.apply([item for item, _ in group])
+        except Exception as e:
+            self.failed_flushes += 1
+            for _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), (result, error) in zip(group, results):
+            if future.done():
+                continue
+            if error:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(result)
+
+    async def close(self):
+        """Commit the queued writes and stop the flusher
+        """
+        if self.task is None:
+            return
+        await self.queue.put(None)
+        # Flush now instead of waiting out the interval
+        self.full.set()
+        await self.task
+        self.task = None
+
+    def stats(self) -> Dict:
+        """Return writes, groups flushed, failed groups and writes waiting in the queue
+        """
+        return {
+            'writes': self.writes,
+            'flushes': self.flushes,
+            'failed_flushes': self.failed_flushes,
+            'queued': self.queue.qsize() if self.queue is not None else 0
+        }
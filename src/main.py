@@ -1,26 +1,64 @@
 """App entry point
 """
+import os
+import asyncio
+import functools
+import importlib
+from contextlib import asynccontextmanager
 from urllib.parse import urlencode, parse_qs, unquote_plus
-from fastapi import Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastmcp import FastMCP
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from src.app import app
 from src.routes import api_router
+from src.libs.timing import TimingMiddleware, request_metrics
+from src.libs.deferred import DeferredApp
+from src.libs.compression import CompressionMiddleware
+from src.helpers.common import json_dumps
+from src.helpers.responses import StaticDocument
 
-from src.constants import IS_TRUE, ALLOWED_METHODS, ALLOWED_ORIGINS, ALLOWED_HEADERS
+from src.constants import IS_TRUE, ALLOWED_METHODS, ALLOWED_ORIGINS, ALLOWED_HEADERS, SERVER_TIMING_ENABLED_VAR, \
+    MANIFEST_TOOLS_PATH, SERVER_COMPRESSION_ENABLED_VAR, SERVER_COMPRESSION_MIN_SIZE_VAR, \
+    SERVER_DEFAULT_COMPRESSION_MIN_SIZE, SERVER_COMPRESSION_EXCLUDED_PATHS, \
+    SERVER_COMPRESSION_EXCLUDED_HEADERS
 
-class URLEncodingMiddleware(BaseHTTPMiddleware):
+class URLEncodingMiddleware:
     """Encode URL middleware
+
+    Pure ASGI: the query string is only re-encoded when it holds `&amp;`,
+    percent-encoded characters or a parameter without a value (which the
+    re-encoding drops, e.g. `?limit=&offset=0` becomes `offset=0`), every other
+    request passes straight through.
     """
-    async def dispatch(self, request: Request, call_next):
-        raw_query_string = request.scope["query_string"].decode()
-        decoded_query_string = unquote_plus(raw_query_string.replace("&amp;", "&"))
+    def __init__(self, app: ASGIApp):
+        """Initialize this class and set class members
+        """
+        self.app = app
+
+    @staticmethod
+    def encode_query_string(query_string: bytes) -> bytes:
+        """Decode `&amp;` and percent-encoding, then re-encode the query string
+        """
+        decoded_query_string = unquote_plus(query_string.decode().replace("&amp;", "&"))
         parsed_query = parse_qs(decoded_query_string)
-        encoded_query_string = urlencode(parsed_query, doseq=True).encode()
-        request.scope["query_string"] = encoded_query_string
-        return await call_next(request)
+        return urlencode(parsed_query, doseq=True).encode()
+
+    @staticmethod
+    def needs_encoding(query_string: bytes) -> bool:
+        """Whether encode_query_string would change the query string
+        """
+        if b"%" in query_string or b"&amp;" in query_string:
+            return True
+        return any(not value for _, _, value in (param.partition(b"=") for param in query_string.split(b"&")))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            query_string: bytes = scope["query_string"]
+            if query_string and self.needs_encoding(query_string):
+                scope["query_string"] = self.encode_query_string(query_string)
+        await self.app(scope, receive, send)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,8 +70,70 @@ app.add_middleware(
 
 app.add_middleware(URLEncodingMiddleware)
 
+if (os.getenv(SERVER_COMPRESSION_ENABLED_VAR) or 'true').lower() in ('1', 'true'):
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=int(os.getenv(SERVER_COMPRESSION_MIN_SIZE_VAR) or SERVER_DEFAULT_COMPRESSION_MIN_SIZE),
+        excluded_paths=SERVER_COMPRESSION_EXCLUDED_PATHS,
+        excluded_headers=SERVER_COMPRESSION_EXCLUDED_HEADERS
+    )
+
+if (os.getenv(SERVER_TIMING_ENABLED_VAR) or '').lower() in ('1', 'true'):
+    app.add_middleware(TimingMiddleware)
+
+async def metrics(request: Request):
+    """Prometheus metrics of this worker process
+    """
+    return PlainTextResponse(request_metrics.render(), media_type='text/plain; version=0.0.4')
+
+app.add_route('/metrics', metrics, methods=['GET'], include_in_schema=False)
+
 app.include_router(api_router, prefix="/mcp")
 
-mcp = FastMCP.from_fastapi(app=app)
-mcp_app = mcp.http_app(path='/mcp')
-app.mount("/mcp/mcp", mcp_app)
+async def load_mcp_server() -> ASGIApp:
+    """Import the MCP server off the event loop and build its manifest
+    """
+    module = await asyncio.to_thread(importlib.import_module, 'src.mcp_server')
+    await module.manifest.build()
+    return module.mcp_app
+
+mcp_server = DeferredApp(load_mcp_server)
+
+@functools.cache
+def openapi_document() -> StaticDocument:
+    """OpenAPI document of the app, encoded on first use
+    """
+    return StaticDocument(json_dumps(app.openapi()))
+
+async def openapi(request: Request):
+    """OpenAPI document, encoded once; unlike the tools, it does not wait for the MCP server
+    """
+    return openapi_document().response(request)
+
+async def tools(request: Request):
+    """MCP tools/list payload, encoded once at startup
+    """
+    await mcp_server.ready()
+    from src.mcp_server import manifest
+    return manifest.tools.response(request)
+
+# Replaces FastAPI's /openapi.json route, which re-encodes the schema on every request
+app.router.routes = [route for route in app.router.routes if getattr(route, 'path', None) != app.openapi_url]
+app.add_route(app.openapi_url, openapi, methods=['GET'], include_in_schema=False)
+app.add_route(MANIFEST_TOOLS_PATH, tools, methods=['GET'], include_in_schema=False)
+app.mount("/mcp/mcp", mcp_server)
+
+app_lifespan = app.router.lifespan_context
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the app lifespan, then load the MCP server, which runs its own lifespan as mounted apps do not get one.
+    """
+    async with app_lifespan(app):
+        mcp_server.start()
+        try:
+            yield
+        finally:
+            await mcp_server.stop()
+
+app.router.lifespan_context = lifespan
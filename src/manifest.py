@@ -0,0 +1,22 @@
+"""Write the OpenAPI document and MCP tool manifest
+
+    python -m src.manifest [--output-dir build]
+
+Writes openapi.json and tools.json, as served by /openapi.json and
+/tools.json, without starting the server or connecting to the database.
+"""
+import asyncio
+import argparse
+from src.mcp_server import manifest
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output-dir', default='.', help='directory the files are written to')
+    args = parser.parse_args()
+
+    asyncio.run(manifest.build())
+    for path in manifest.write(args.output_dir):
+        print(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+"""MCP server
+
+FastMCP and the OpenAPI conversion account for most of the app's import
+time, so src.main loads this module in the background after startup (see
+DeferredApp).
+"""
+import os
+from fastmcp import FastMCP
+from fastmcp.server.providers.openapi import RouteMap, MCPType
+from src.main import app
+from src.libs.manifest import Manifest, ToolsListCache
+from src.tools.users import UsersTools
+from src.constants import MCP_TOOL_HEADER, USERS, MCP_TOOLS_MODE_VAR, MCP_TOOLS_DEFAULT_MODE, MCP_TOOLS_NATIVE_MODE
+
+# In native mode the users operations are served by UsersTools instead of
+# being proxied over HTTP to their REST routes; the other routes stay proxied.
+native_tools: bool = (os.getenv(MCP_TOOLS_MODE_VAR) or MCP_TOOLS_DEFAULT_MODE).lower() == MCP_TOOLS_NATIVE_MODE
+mcp = FastMCP.from_fastapi(
+    app=app,
+    httpx_client_kwargs={'headers': {MCP_TOOL_HEADER: 'true'}},
+    route_maps=[RouteMap(tags={USERS}, mcp_type=MCPType.EXCLUDE)] if native_tools else None,
+    middleware=[ToolsListCache()]
+)
+if native_tools:
+    UsersTools(mcp)
+mcp_app = mcp.http_app(path='/mcp')
+
+manifest = Manifest(app=app, mcp=mcp)
@@ -1,9 +1,9 @@
 """Users model
 """
 from typing import Optional, List, Dict
-from pydantic import BaseModel, UUID4, StrictStr, EmailStr, field_validator
+from pydantic import BaseModel, Field, UUID4, StrictStr, EmailStr, field_validator
 from datetime import datetime
-from src.constants import IS_TRUE
+from src.constants import IS_TRUE, USERS_LOOKUP_MAX_IDS, USERS_BATCH_MAX_SIZE
 
 class CreateUser(BaseModel):
     """CreateUser basemodel
@@ -25,6 +25,26 @@ class UpdateUser(BaseModel):
     id: UUID4
     email_address: EmailStr
 
+class CreateUsers(BaseModel):
+    """CreateUsers basemodel
+    """
+    users: List[CreateUser] = Field(min_length=1, max_length=USERS_BATCH_MAX_SIZE)
+
+class UpdateUsers(BaseModel):
+    """UpdateUsers basemodel
+    """
+    users: List[UpdateUser] = Field(min_length=1, max_length=USERS_BATCH_MAX_SIZE)
+
+class DeleteUsers(BaseModel):
+    """DeleteUsers basemodel
+    """
+    ids: List[UUID4] = Field(min_length=1, max_length=USERS_BATCH_MAX_SIZE)
+
+class GetUsersByIds(BaseModel):
+    """GetUsersByIds basemodel
+    """
+    ids: List[UUID4] = Field(min_length=1, max_length=USERS_LOOKUP_MAX_IDS)
+
 class UserResponse(BaseModel):
     """UserResponse basemodel
     """
@@ -34,6 +54,29 @@ class UserResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+class GetUserResponse(BaseModel):
+    """GetUserResponse basemodel
+    """
+    status: bool
+    message: List[str]
+    response: UserResponse
+
+class UsersResponse(BaseModel):
+    """UsersResponse basemodel
+    """
+    status: bool
+    message: List[str]
+    response: List[UserResponse]
+    next_cursor: Optional[str] = None
+
+class UsersByIdsResponse(BaseModel):
+    """UsersByIdsResponse basemodel
+    """
+    status: bool
+    message: List[str]
+    response: List[UserResponse]
+    missing_ids: List[str]
+
 class UpdateUserResponse(BaseModel):
     """UpdateUserResponse basemodel
     """
@@ -54,3 +97,18 @@ class UserDefaultResponse(BaseModel):
     status: bool
     message: List[str]
     response: Dict
+
+class BatchItemResponse(BaseModel):
+    """BatchItemResponse basemodel
+    """
+    index: int
+    status: bool
+    message: List[str]
+    response: Dict
+
+class BatchResponse(BaseModel):
+    """BatchResponse basemodel
+    """
+    status: bool
+    message: List[str]
+    response: List[BatchItemResponse]
@@ -1,42 +1,37 @@
 """User DAL
 """
-from typing import Tuple, Dict
+import asyncpg
+from typing import AsyncIterator, Tuple, Dict, List, Optional
+from uuid import UUID
+from datetime import datetime
+from src.libs.db_client import DBAccessMode
 from src.constants import IS_TRUE, IS_FALSE
 
+NEW_USER_STMT: str = 'new_user'
+GET_USER_STMT: str = 'get_user'
+GET_USERS_STMT: str = 'get_users'
+GET_USERS_AFTER_STMT: str = 'get_users_after'
+GET_USERS_BY_IDS_STMT: str = 'get_users_by_ids'
+UPDATE_USER_STMT: str = 'update_user'
+DELETE_USER_STMT: str = 'delete_user'
+NEW_USERS_STMT: str = 'new_users'
+UPDATE_USERS_STMT: str = 'update_users'
+DELETE_USERS_STMT: str = 'delete_users'
+EXPORT_USERS_STMT: str = 'export_users'
+
 class UserDAL:
     """User Data Access Layer class
     """
-    def __init__(self, db_client):
-        """Initialze this class and assign class member(s)
-        """
-        self.db_client = db_client
-
-    async def new_user(self, user: Dict):
-        """Create new user
-        """
-        sql_query: str = """
+    STATEMENTS: Dict[str, Tuple[str, DBAccessMode]] = {
+        NEW_USER_STMT: ("""
             INSERT INTO
                 users
             (username, email_address, active)
             VALUES
             ($1, $2, $3)
-            RETURNING id
-        """
-        values: Tuple = tuple([
-            user.username,
-            user.email_address,
-            user.active
-        ])
-        try:
-            result = await self.db_client.execute_write(sql_query, *values)
-            return str(result[0]["id"])
-        except Exception as e:
-            raise RuntimeError(f"Failed to create user: {str(e)}")
-
-    async def get_user(self, id: str):
-        """Get user
-        """
-        sql_query: str = """
+            RETURNING id, username, email_address, created_at, updated_at
+        """, DBAccessMode.WRITE),
+        GET_USER_STMT: ("""
             SELECT
                 id,
                 username,
@@ -50,6 +45,148 @@ class UserDAL:
             AND
                 active = $2
             LIMIT $3
+        """, DBAccessMode.READ),
+        GET_USERS_STMT: ("""
+            SELECT
+                id,
+                username,
+                email_address,
+                created_at,
+                updated_at
+            FROM
+                users
+            WHERE
+                active = $1
+            ORDER BY
+                created_at, id
+            LIMIT $2
+            OFFSET $3
+        """, DBAccessMode.READ),
+        GET_USERS_AFTER_STMT: ("""
+            SELECT
+                id,
+                username,
+                email_address,
+                created_at,
+                updated_at
+            FROM
+                users
+            WHERE
+                active = $1
+            AND
+                (created_at, id) > ($2, $3)
+            ORDER BY
+                created_at, id
+            LIMIT $4
+        """, DBAccessMode.READ),
+        EXPORT_USERS_STMT: ("""
+            SELECT
+                id,
+                username,
+                email_address,
+                created_at,
+                updated_at
+            FROM
+                users
+            WHERE
+                active = $1
+            ORDER BY
+                created_at, id
+            LIMIT $2
+        """, DBAccessMode.READ),
+        GET_USERS_BY_IDS_STMT: ("""
+            SELECT
+                id,
+                username,
+                email_address,
+                created_at,
+                updated_at
+            FROM
+                users
+            WHERE
+                id = ANY($1)
+            AND
+                active = $2
+        """, DBAccessMode.READ),
+        UPDATE_USER_STMT: ("""
+            UPDATE
+                users
+            SET
+                email_address = $2,
+                updated_at = now()
+            WHERE
+                id = $1
+            AND
+                active = $3
+            RETURNING id, username, email_address, created_at, updated_at
+        """, DBAccessMode.WRITE),
+        DELETE_USER_STMT: ("""
+            UPDATE
+                users
+            SET
+                active = $1
+            WHERE
+                id = $2
+        """, DBAccessMode.WRITE),
+        NEW_USERS_STMT: ("""
+            INSERT INTO
+                users
+            (username, email_address, active)
+            SELECT
+                *
+            FROM
+                unnest($1::STRING[], $2::STRING[], $3::BOOL[])
+            ON CONFLICT DO NOTHING
+            RETURNING id, username, email_address, created_at, updated_at
+        """, DBAccessMode.WRITE),
+        UPDATE_USERS_STMT: ("""
+            UPDATE
+                users
+            SET
+                email_address = data.email_address,
+                updated_at = now()
+            FROM
+                unnest($1::UUID[], $2::STRING[]) AS data(id, email_address)
+            WHERE
+                users.id = data.id
+            AND
+                users.active = $3
+            RETURNING users.id, users.username, users.email_address, users.created_at, users.updated_at
+        """, DBAccessMode.WRITE),
+        DELETE_USERS_STMT: ("""
+            UPDATE
+                users
+            SET
+                active = $1
+            WHERE
+                id = ANY($2)
+            AND
+                active = $3
+            RETURNING id
+        """, DBAccessMode.WRITE)
+    }
+
+    def __init__(self, db_client):
+        """Initialze this class and assign class member(s)
+        """
+        self.db_client = db_client
+
+    async def new_user(self, user: Dict):
+        """Create new user and return the inserted row
+        """
+        values: Tuple = tuple([
+            user.username,
+            user.email_address,
+            user.active
+        ])
+        try:
+            result = await self.db_client.execute_write(NEW_USER_STMT, *values)
+            return result[0]
+        except Exception as e:
+            raise RuntimeError(f"Failed to create user: {str(e)}")
+
+    async def get_user(self, id: str, follower_read: bool = False):
+        """Get user. With a batch window, ids requested concurrently are read with one get_users_by_ids query.
         """
         values: Tuple = tuple([
             id,
@@ -58,28 +195,27 @@ class UserDAL:
         ])
         query_result: Dict = {}
         try:
-            query_result = await self.db_client.execute_read(sql_query, *values)
+            if self.db_client.batch_window:
+                loader = self.db_client.loader(
+                    f'{GET_USER_STMT}:follower_read' if follower_read else GET_USER_STMT,
+                    lambda ids: self.load_users(ids, follower_read=follower_read)
+                )
+                user = await loader.load(UUID(str(id)))
+                return [user] if user else []
+            query_result = await self.db_client.execute_read(GET_USER_STMT, *values, follower_read=follower_read)
         except Exception as e:
             raise RuntimeError(f"Failed to get user: {str(e)}")
 
         return query_result
 
-    async def get_users(self, offset: int, limit: int):
-        """Get users
+    async def load_users(self, ids: List[UUID], follower_read: bool = False) -> Dict:
+        """Users by id, for the get_user batch loader
         """
-        sql_query: str = """
-            SELECT
-                id,
-                username,
-                email_address,
-                created_at,
-                updated_at
-            FROM
-                users
-            WHERE
-                active = $1
-            LIMIT $2
-            OFFSET $3
+        query_results = await self.get_users_by_ids(ids=ids, follower_read=follower_read)
+        return {query_result['id']: query_result for query_result in query_results}
+
+    async def get_users(self, offset: int, limit: int, follower_read: bool = False):
+        """Get users
         """
         values: Tuple = tuple([
             IS_TRUE,
@@ -87,45 +223,262 @@ class UserDAL:
             offset
         ])
         try:
-            return await self.db_client.execute_read(sql_query, *values)
+            return await self.db_client.execute_read(GET_USERS_STMT, *values, follower_read=follower_read)
         except Exception as e:
             raise RuntimeError(f"Failed to get users: {str(e)}")
 
-    async def update_user(self, user: Dict):
-        """Update user
+    async def get_users_after(self, created_at: datetime, id: UUID, limit: int, follower_read: bool = False):
+        """Get users after the (created_at, id) keyset position
         """
-        sql_query: str = """
-            UPSERT INTO
-                users
-            (id, email_address)
-            VALUES
-            ($1, $2)
+        values: Tuple = tuple([
+            IS_TRUE,
+            created_at,
+            id,
+            limit
+        ])
+        try:
+            return await self.db_client.execute_read(GET_USERS_AFTER_STMT, *values, follower_read=follower_read)
+        except Exception as e:
+            raise RuntimeError(f"Failed to get users: {str(e)}")
+
+    async def export_users(self, limit: Optional[int] = None, follower_read: bool = False) -> AsyncIterator:
+        """Stream active users ordered by creation time through a server-side cursor
+        """
+        values: Tuple = tuple([
+            IS_TRUE,
+            limit
+        ])
+        try:
+            async for record in self.db_client.stream_read(EXPORT_USERS_STMT, *values, follower_read=follower_read):
+                yield record
+        except Exception as e:
+            raise RuntimeError(f"Failed to export users: {str(e)}")
+
+    async def get_users_by_ids(self, ids: List[UUID], follower_read: bool = False):
+        """Get users by ids in a single query
+        """
+        values: Tuple = tuple([
+            ids,
+            IS_TRUE
+        ])
+        try:
+            return await self.db_client.execute_read(GET_USERS_BY_IDS_STMT, *values, follower_read=follower_read)
+        except Exception as e:
+            raise RuntimeError(f"Failed to get users: {str(e)}")
+
+    async def update_user(self, user: Dict):
+        """Update an active user and return the updated row, None when there is no active user with the id.
+        With a write batch interval, the update is queued and committed together with concurrent ones.
         """
         values: Tuple = tuple([
             user.id,
-            user.email_address
+            user.email_address,
+            IS_TRUE
         ])
         try:
-            await self.db_client.execute_write(sql_query, *values)
+            if self.db_client.write_batch_interval:
+                return await self.db_client.coalescer(UPDATE_USERS_STMT, self.apply_updates).submit(user)
+            result = await self.db_client.execute_write(UPDATE_USER_STMT, *values)
+            return result[0] if result else None
         except Exception as e:
             raise RuntimeError(f"Failed to update user: {str(e)}")
 
     async def delete_user(self, id: str):
-        """Update user
-        """
-        sql_query: str = """
-            UPDATE
-                users
-            SET
-                active = $1
-            WHERE
-                id = $2
+        """Soft delete user.
+        With a write batch interval, the delete is queued and committed together with concurrent ones.
         """
         values: Tuple = tuple([
             IS_FALSE,
             id
         ])
         try:
-            await self.db_client.execute_write(sql_query, *values)
+            if self.db_client.write_batch_interval:
+                # A malformed id fails here, before it can fail the statement of the whole group
+                await self.db_client.coalescer(DELETE_USERS_STMT, self.apply_deletes).submit(UUID(str(id)))
+                return
+            await self.db_client.execute_write(DELETE_USER_STMT, *values)
         except Exception as e:
             raise RuntimeError(f"Failed to delete user: {str(e)}")
+
+    async def apply_updates(self, users: List) -> List[Tuple[Optional[Dict], Optional[str]]]:
+        """Apply queued update_user calls in one transaction, returning a (row, error) pair per call,
+        with no row for an id that is not an active user.
+        Each group updates one row per id, so repeated updates of an id apply in queue order.
+        """
+        async def update(conn) -> List:
+            results: List = [None] * len(users)
+            pending: List = list(range(len(users)))
+            while pending:
+                group: List = []
+                later: List = []
+                ids: set = set()
+                for index in pending:
+                    (later if users[index].id in ids else group).append(index)
+                    ids.add(users[index].id)
+                try:
+                    async with conn.transaction():
+                        query_results = await self.db_client.fetch(
+                            conn, UPDATE_USERS_STMT,
+                            [users[index].id for index in group], [users[index].email_address for index in group],
+                            IS_TRUE
+                        )
+                    updated: Dict = {query_result['id']: query_result for query_result in query_results}
+                    for index in group:
+                        results[index] = (updated.get(users[index].id), None)
+                except asyncpg.SerializationError:
+                    raise
+                except asyncpg.PostgresError:
+                    # One update fails (e.g. email address taken): apply row by row so only it fails
+                    for index in group:
+                        try:
+                            async with conn.transaction():
+                                query_results = await self.db_client.fetch(
+                                    conn, UPDATE_USER_STMT, users[index].id, users[index].email_address, IS_TRUE
+                                )
+                            results[index] = (query_results[0] if query_results else None, None)
+                        except asyncpg.SerializationError:
+                            raise
+                        except asyncpg.PostgresError as e:
+                            results[index] = (None, str(e))
+                pending = later
+            return results
+
+        return await self.db_client.run_transaction(UPDATE_USERS_STMT, update)
+
+    async def apply_deletes(self, ids: List[UUID]) -> List[Tuple[None, Optional[str]]]:
+        """Apply queued delete_user calls with one statement, returning a (None, error) pair per call
+        """
+        async def delete(conn) -> List:
+            try:
+                async with conn.transaction():
+                    await self.db_client.fetch(conn, DELETE_USERS_STMT, IS_FALSE, list(set(ids)), IS_TRUE)
+                return [(None, None)] * len(ids)
+            except asyncpg.SerializationError:
+                raise
+            except asyncpg.PostgresError:
+                # One delete fails: apply row by row so only it fails
+                results: List = []
+                for id in ids:
+                    try:
+                        async with conn.transaction():
+                            await self.db_client.fetch(conn, DELETE_USER_STMT, IS_FALSE, id)
+                        results.append((None, None))
+                    except asyncpg.SerializationError:
+                        raise
+                    except asyncpg.PostgresError as e:
+                        results.append((None, str(e)))
+                return results
+
+        return await self.db_client.run_transaction(DELETE_USERS_STMT, delete)
+
+    async def new_users(self, users: List) -> List[Tuple[Optional[Dict], Optional[str]]]:
+        """Create users with one multi-row insert, returning a (row, error) pair per user
+        """
+        results: List = [None] * len(users)
+        pending: List = []
+        usernames: set = set()
+        email_addresses: set = set()
+        for index, user in enumerate(users):
+            if user.username in usernames or user.email_address in email_addresses:
+                results[index] = (None, 'duplicate username or email address in batch.')
+                continue
+            usernames.add(user.username)
+            email_addresses.add(user.email_address)
+            pending.append(index)
+
+        values: Tuple = tuple([
+            [users[index].username for index in pending],
+            [users[index].email_address for index in pending],
+            [users[index].active for index in pending]
+        ])
+        try:
+            query_results = await self.db_client.run_transaction(
+                NEW_USERS_STMT, lambda conn: self.db_client.fetch(conn, NEW_USERS_STMT, *values)
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to create users: {str(e)}")
+
+        created: Dict = {query_result['username']: query_result for query_result in query_results}
+        for index in pending:
+            query_result = created.get(users[index].username)
+            if query_result is None:
+                results[index] = (None, 'username or email address already exists.')
+            else:
+                results[index] = (query_result, None)
+        return results
+
+    async def update_users(self, users: List) -> List[Tuple[Optional[Dict], Optional[str]]]:
+        """Update users with one multi-row update, returning a (row, error) pair per user
+        """
+        results: List = [None] * len(users)
+        pending: List = []
+        ids: set = set()
+        for index, user in enumerate(users):
+            if user.id in ids:
+                results[index] = (None, 'duplicate user id in batch.')
+                continue
+            ids.add(user.id)
+            pending.append(index)
+
+        values: Tuple = tuple([
+            [users[index].id for index in pending],
+            [users[index].email_address for index in pending],
+            IS_TRUE
+        ])
+
+        async def update(conn) -> Dict:
+            updated: Dict = {}
+            try:
+                async with conn.transaction():
+                    query_results = await self.db_client.fetch(conn, UPDATE_USERS_STMT, *values)
+                return {query_result['id']: (query_result, None) for query_result in query_results}
+            except asyncpg.UniqueViolationError:
+                # An email address is taken: apply row by row so only the conflicting items fail
+                for index in pending:
+                    try:
+                        async with conn.transaction():
+                            query_results = await self.db_client.fetch(
+                                conn, UPDATE_USER_STMT, users[index].id, users[index].email_address, IS_TRUE
+                            )
+                        if query_results:
+                            updated[users[index].id] = (query_results[0], None)
+                    except asyncpg.UniqueViolationError:
+                        updated[users[index].id] = (None, 'email address already exists.')
+            return updated
+
+        try:
+            updated: Dict = await self.db_client.run_transaction(UPDATE_USERS_STMT, update)
+        except Exception as e:
+            raise RuntimeError(f"Failed to update users: {str(e)}")
+
+        for index in pending:
+            results[index] = updated.get(users[index].id, (None, 'user not found.'))
+        return results
+
+    async def delete_users(self, ids: List[UUID]) -> List[Tuple[Optional[UUID], Optional[str]]]:
+        """Soft delete users with one statement, returning an (id, error) pair per id
+        """
+        values: Tuple = tuple([
+            IS_FALSE,
+            list(set(ids)),
+            IS_TRUE
+        ])
+        try:
+            query_results = await self.db_client.run_transaction(
+                DELETE_USERS_STMT, lambda conn: self.db_client.fetch(conn, DELETE_USERS_STMT, *values)
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to delete users: {str(e)}")
+
+        deleted: set = {query_result['id'] for query_result in query_results}
+        results: List = []
+        seen: set = set()
+        for id in ids:
+            if id in seen:
+                results.append((None, 'duplicate user id in batch.'))
+            elif id in deleted:
+                results.append((id, None))
+            else:
+                results.append((None, 'user not found.'))
+            seen.add(id)
+        return results
@@ -1,10 +1,14 @@
 """Status router
 """
-from fastapi import APIRouter, status
-from fastapi.responses import JSONResponse
+from typing import Optional
+from fastapi import APIRouter, status, Depends
+from src.helpers.responses import FastJSONResponse
 from src.models.status import StatusResponse
+from src.libs.cache import CacheBackend
+from src.libs.db_client import CockroachDBClient
+from src.dependencies import get_user_cache, get_db_client_ro, get_db_client_rw
 from src.constants import IS_TRUE
-from src.constants import GET_API_STATUS_OP_ID, HEALTHCHECK
+from src.constants import GET_API_STATUS_OP_ID, GET_API_STATS_OP_ID, HEALTHCHECK
 
 class StatusRouter:
     """Status router class
@@ -15,11 +19,13 @@ class StatusRouter:
         self.router: APIRouter = APIRouter()
 
         self.router.add_api_route("/", self.get_mcp_server_status, methods=["GET"], operation_id=GET_API_STATUS_OP_ID, tags=[HEALTHCHECK], response_model=StatusResponse)
+        # Operator endpoint: left out of the OpenAPI document, so it is not exposed as an MCP tool
+        self.router.add_api_route("/stats", self.get_mcp_server_stats, methods=["GET"], operation_id=GET_API_STATS_OP_ID, tags=[HEALTHCHECK], response_model=StatusResponse, include_in_schema=False)
 
     async def get_mcp_server_status(self):
         """Get MCP Server Status
         """
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 'status': IS_TRUE,
@@ -29,3 +35,24 @@ class StatusRouter:
                 'response': {}
             }
         )
+
+    async def get_mcp_server_stats(self, user_cache: Optional[CacheBackend] = Depends(get_user_cache),
+                                   db_client_ro: CockroachDBClient = Depends(get_db_client_ro),
+                                   db_client_rw: CockroachDBClient = Depends(get_db_client_rw)
+                                ):
+        """Get MCP Server runtime statistics
+        """
+        return FastJSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                'status': IS_TRUE,
+                'message': [],
+                'response': {
+                    'user_cache': user_cache.stats() if user_cache is not None else {},
+                    'db': {
+                        'ro': db_client_ro.stats(),
+                        'rw': db_client_rw.stats()
+                    }
+                }
+            }
+        )
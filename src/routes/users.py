@@ -1,15 +1,22 @@
 """Users router
 """
-from typing import Optional, List
-from fastapi import APIRouter, status, Depends, Query
-from fastapi.responses import JSONResponse
-from src.models.user import CreateUser, UpdateUser, UserResponse, SignupResponse, \
-    UserDefaultResponse, UpdateUserResponse
+from typing import AsyncIterator, Dict, Optional, List
+from fastapi import APIRouter, status, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from src.helpers.responses import FastJSONResponse
+from src.models.user import CreateUser, UpdateUser, GetUserResponse, SignupResponse, \
+    UserDefaultResponse, UpdateUserResponse, UsersResponse, GetUsersByIds, UsersByIdsResponse, \
+    CreateUsers, UpdateUsers, DeleteUsers, BatchResponse
 from src.models.user_dal import UserDAL
-from src.dependencies import get_dal, get_db_client_rw, get_db_client_ro
-from src.helpers.common import custom_serializer
+from src.libs.cache import CacheBackend
+from src.dependencies import get_dal, get_db_client_rw, get_db_client_ro, get_user_cache
+from src.helpers.common import json_dumps, http_date, not_modified
+from src.helpers.users import invalidate_users, get_user_data, get_users_page, get_users_by_ids, \
+    batch_content, user_validators, FOLLOWER_READ_DESCRIPTION
 from src.constants import IS_TRUE, IS_FALSE, GET_USERS_OP_ID, GET_USER_OP_ID, \
-    POST_USER_SIGNUP_OP_ID, PUT_USER_OP_ID, DELETE_USER_OP_ID, USERS
+    GET_USERS_BY_IDS_OP_ID, POST_USER_SIGNUP_OP_ID, PUT_USER_OP_ID, DELETE_USER_OP_ID, USERS, \
+    POST_USERS_BATCH_OP_ID, PUT_USERS_BATCH_OP_ID, DELETE_USERS_BATCH_OP_ID, EXPORT_USERS_OP_ID, \
+    USERS_EXPORT_CHUNK_ROWS, USERS_EXPORT_MCP_MAX_ROWS, MCP_TOOL_HEADER
 
 class UsersRouter:
     """Users router class
@@ -20,9 +27,20 @@ class UsersRouter:
         self.router: APIRouter = APIRouter()
 
         self.router.add_api_route("/", self.get_users, methods=["GET"], operation_id=GET_USERS_OP_ID,
-                                  tags=[USERS], response_model=List[UserResponse])
+                                  tags=[USERS], response_model=UsersResponse)
+        self.router.add_api_route("/lookup", self.get_users_by_ids, methods=["POST"], operation_id=GET_USERS_BY_IDS_OP_ID,
+                                  tags=[USERS], response_model=UsersByIdsResponse)
+        self.router.add_api_route("/batch", self.signup_batch, methods=["POST"], operation_id=POST_USERS_BATCH_OP_ID,
+                                  tags=[USERS], response_model=BatchResponse)
+        self.router.add_api_route("/batch", self.update_users_batch, methods=["PUT"], operation_id=PUT_USERS_BATCH_OP_ID,
+                                  tags=[USERS], response_model=BatchResponse)
+        self.router.add_api_route("/batch", self.delete_users_batch, methods=["DELETE"], operation_id=DELETE_USERS_BATCH_OP_ID,
+                                  tags=[USERS], response_model=BatchResponse)
+        self.router.add_api_route("/export", self.export_users, methods=["GET"], operation_id=EXPORT_USERS_OP_ID,
+                                  tags=[USERS], response_class=StreamingResponse,
+                                  responses={200: {'content': {'application/x-ndjson': {}}}})
         self.router.add_api_route("/{id}", self.get_user, methods=["GET"], operation_id=GET_USER_OP_ID,
-                                  tags=[USERS], response_model=UserResponse)
+                                  tags=[USERS], response_model=GetUserResponse)
         self.router.add_api_route("/", self.signup, methods=["POST"], operation_id=POST_USER_SIGNUP_OP_ID,
                                   tags=[USERS], response_model=SignupResponse)
         self.router.add_api_route("/{id}", self.update_user, methods=["PUT"], operation_id=PUT_USER_OP_ID,
@@ -30,26 +48,50 @@ class UsersRouter:
         self.router.add_api_route("/{id}", self.delete_user, methods=["DELETE"], operation_id=DELETE_USER_OP_ID,
                                   tags=[USERS], response_model=UserDefaultResponse)
 
-    async def _get_user_data(self, dal: UserDAL, user_id: str):
-        """Core logic to retrieve and serialize user data.
+    def _batch_response(self, results: List, serialize) -> FastJSONResponse:
+        """Build a batch response with one result entry per input item.
         """
-        query_result = await dal.get_user(id=user_id)
-        if query_result:
-            mutable_result = dict(query_result[0])
-            mutable_result['id'] = custom_serializer(mutable_result['id'])
-            mutable_result['created_at'] = custom_serializer(mutable_result['created_at'])
-            mutable_result['updated_at'] = custom_serializer(mutable_result['updated_at'])
-            return mutable_result
-        return None
+        return FastJSONResponse(status_code=status.HTTP_200_OK, content=batch_content(results, serialize))
+
+    def _conditional_response(self, request: Request, content: Dict, users: List[Dict], *extra,
+                              collection: bool = False) -> Response:
+        """200 with ETag and Last-Modified from the users' (id, updated_at), or 304 when the client has them.
+        A collection gets no Last-Modified: rows can enter or leave it (e.g. on a soft delete) without
+        changing the latest updated_at, so only its ETag, which covers the row set, is compared.
+        """
+        etag, last_modified = user_validators(users, *extra)
+        if collection:
+            last_modified = None
+        headers: Dict[str, str] = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if last_modified is not None:
+            headers['Last-Modified'] = http_date(last_modified)
+        if not_modified(request.headers.get('if-none-match'), request.headers.get('if-modified-since'),
+                        etag, last_modified):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return FastJSONResponse(status_code=status.HTTP_200_OK, content=content, headers=headers)
+
+    async def _export_lines(self, records: AsyncIterator) -> AsyncIterator[bytes]:
+        """Encode rows as NDJSON, flushing every USERS_EXPORT_CHUNK_ROWS rows
+        """
+        lines: List[bytes] = []
+        async for record in records:
+            lines.append(json_dumps(dict(record)))
+            if len(lines) >= USERS_EXPORT_CHUNK_ROWS:
+                yield b'\n'.join(lines) + b'\n'
+                lines = []
+        if lines:
+            yield b'\n'.join(lines) + b'\n'
 
     async def signup(self, user: CreateUser,
-                     dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_rw))
+                     dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_rw)),
+                     cache: Optional[CacheBackend] = Depends(get_user_cache)
                 ):
         """Sign up new user
         """
-        new_user_uuid = await dal.new_user(user=user)
-        user_data = await self._get_user_data(dal=dal, user_id=new_user_uuid)
-        return JSONResponse(
+        query_result = await dal.new_user(user=user)
+        await invalidate_users(cache, [query_result['id']])
+        user_data = dict(query_result)
+        return FastJSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 'status': IS_TRUE,
@@ -58,14 +100,16 @@ class UsersRouter:
             }
         )
 
-    async def get_user(self, id: str,
-                       dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_ro))
+    async def get_user(self, id: str, request: Request,
+                       follower_read: bool = Query(False, description=FOLLOWER_READ_DESCRIPTION),
+                       dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_ro)),
+                       cache: Optional[CacheBackend] = Depends(get_user_cache)
                     ):
         """Get user
         """
-        query_result = await self._get_user_data(dal=dal, user_id=id)
+        query_result = await get_user_data(dal=dal, user_id=id, cache=cache, follower_read=follower_read)
         if not query_result:
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content={
                     'status': IS_FALSE,
@@ -73,48 +117,133 @@ class UsersRouter:
                     'response': query_result
                 }
             )
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content={
+        return self._conditional_response(
+            request,
+            {
                 'status': IS_TRUE,
                 'message': [],
                 'response': query_result
-            }
+            },
+            [query_result]
         )
 
-    async def get_users(self, offset: Optional[int] = Query(0),
+    async def get_users(self, request: Request,
+                        offset: Optional[int] = Query(0),
                         limit: Optional[int] = Query(1),
+                        cursor: Optional[str] = Query(None),
+                        follower_read: bool = Query(False, description=FOLLOWER_READ_DESCRIPTION),
                         dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_ro))
                     ):
-        """Get users
+        """Get users, ordered by creation time. Pass `next_cursor` back as `cursor` to fetch the next page.
+        """
+        try:
+            response, next_cursor = await get_users_page(dal=dal, offset=offset, limit=limit, cursor=cursor,
+                                                         follower_read=follower_read)
+        except ValueError:
+            return FastJSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={
+                    'status': IS_FALSE,
+                    'message': ['invalid cursor.'],
+                    'response': []
+                }
+            )
+
+        return self._conditional_response(
+            request,
+            {
+                'status': IS_TRUE,
+                'message': [],
+                'response': response,
+                'next_cursor': next_cursor
+            },
+            response,
+            next_cursor,
+            collection=True
+        )
+
+    async def export_users(self, request: Request,
+                           limit: Optional[int] = Query(None, ge=1),
+                           follower_read: bool = Query(False, description=FOLLOWER_READ_DESCRIPTION),
+                           dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_ro))
+                        ):
+        """Export active users as NDJSON, one user per line, ordered by creation time. MCP tool calls return at most 1000 users.
         """
-        response: List = []
-        query_results = await dal.get_users(offset=offset, limit=limit)
-        if query_results:
-            for query_result in query_results:
-                mutable_result = dict(query_result)
-                mutable_result['id'] = custom_serializer(mutable_result['id'])
-                mutable_result['created_at'] = custom_serializer(mutable_result['created_at'])
-                mutable_result['updated_at'] = custom_serializer(mutable_result['updated_at'])
-                response.append(mutable_result)
-
-        return JSONResponse(
+        if request.headers.get(MCP_TOOL_HEADER):
+            limit = min(limit or USERS_EXPORT_MCP_MAX_ROWS, USERS_EXPORT_MCP_MAX_ROWS)
+        return StreamingResponse(
+            self._export_lines(dal.export_users(limit=limit, follower_read=follower_read)),
+            status_code=status.HTTP_200_OK,
+            media_type='application/x-ndjson'
+        )
+
+    async def get_users_by_ids(self, lookup: GetUsersByIds,
+                               follower_read: bool = Query(False, description=FOLLOWER_READ_DESCRIPTION),
+                               dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_ro))
+                            ):
+        """Get many users by id in one call. Users are returned in input order and unknown ids are listed in `missing_ids`.
+        """
+        response, missing_ids = await get_users_by_ids(dal=dal, ids=lookup.ids, follower_read=follower_read)
+
+        return FastJSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 'status': IS_TRUE,
                 'message': [],
-                'response': response
+                'response': response,
+                'missing_ids': missing_ids
             }
         )
 
+    async def signup_batch(self, batch: CreateUsers,
+                           dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_rw)),
+                           cache: Optional[CacheBackend] = Depends(get_user_cache)
+                        ):
+        """Sign up many users in one call. Each user gets its own result entry.
+        """
+        results = await dal.new_users(users=batch.users)
+        await invalidate_users(cache, [result['id'] for result, _ in results if result])
+        return self._batch_response(results, dict)
+
+    async def update_users_batch(self, batch: UpdateUsers,
+                                 dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_rw)),
+                                 cache: Optional[CacheBackend] = Depends(get_user_cache)
+                            ):
+        """Update many users' email addresses in one call. Each user gets its own result entry.
+        """
+        results = await dal.update_users(users=batch.users)
+        await invalidate_users(cache, [user.id for user in batch.users])
+        return self._batch_response(results, dict)
+
+    async def delete_users_batch(self, batch: DeleteUsers,
+                                 dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_rw)),
+                                 cache: Optional[CacheBackend] = Depends(get_user_cache)
+                            ):
+        """Delete many users in one call. Each user id gets its own result entry.
+        """
+        results = await dal.delete_users(ids=batch.ids)
+        await invalidate_users(cache, batch.ids)
+        return self._batch_response(results, lambda _: {})
+
     async def update_user(self, user: UpdateUser,
-                     dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_rw))
+                     dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_rw)),
+                     cache: Optional[CacheBackend] = Depends(get_user_cache)
                 ):
         """Update user
         """
-        await dal.update_user(user=user)
-        user_data = await self._get_user_data(dal=dal, user_id=user.id)
-        return JSONResponse(
+        query_result = await dal.update_user(user=user)
+        if query_result is None:
+            return FastJSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={
+                    'status': IS_FALSE,
+                    'message': ['user not found.'],
+                    'response': {}
+                }
+            )
+        await invalidate_users(cache, [user.id])
+        user_data = dict(query_result)
+        return FastJSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 'status': IS_TRUE,
@@ -124,7 +253,8 @@ class UsersRouter:
         )
 
     async def delete_user(self, id: str,
-                     dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_rw))
+                     dal: UserDAL = Depends(lambda: get_dal(UserDAL, get_db_client_rw)),
+                     cache: Optional[CacheBackend] = Depends(get_user_cache)
                 ):
         """Delete user
         """
@@ -132,7 +262,7 @@ class UsersRouter:
         if not id:
             errors.append('user id is required.')
         if len(errors):
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={
                     'status': IS_FALSE,
@@ -142,7 +272,8 @@ class UsersRouter:
             )
 
         await dal.delete_user(id=id)
-        return JSONResponse(
+        await invalidate_users(cache, [id])
+        return FastJSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 'status': IS_TRUE,
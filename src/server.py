@@ -0,0 +1,46 @@
+"""Production entry point
+
+    python -m src.server
+"""
+import os
+import uvicorn
+from src.constants import SERVER_HOST_VAR, SERVER_PORT_VAR, SERVER_WORKERS_VAR, SERVER_LIMIT_CONCURRENCY_VAR, \
+    SERVER_GRACEFUL_TIMEOUT_VAR, SERVER_LOG_LEVEL_VAR, SERVER_DEFAULT_HOST, SERVER_DEFAULT_PORT, \
+    SERVER_DEFAULT_LIMIT_CONCURRENCY, SERVER_DEFAULT_GRACEFUL_TIMEOUT, SERVER_DEFAULT_LOG_LEVEL
+
+def default_workers() -> int:
+    """Number of CPUs this process may run on
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def main():
+    """Serve src.main:app from N worker processes.
+
+    uvloop and httptools are used when installed (uvicorn[standard]).
+    Workers import the app themselves, so every worker opens its own DB pools
+    and cache connections in the lifespan, after the process has started.
+    On SIGTERM each worker stops accepting connections, lets in-flight
+    requests finish for up to MCP_SERVER_GRACEFUL_TIMEOUT seconds, then
+    closes its pools.
+    """
+    workers: int = int(os.getenv(SERVER_WORKERS_VAR) or default_workers())
+    if workers > 1:
+        # MCP sessions live in one worker's memory; any worker must be able to serve any request
+        os.environ.setdefault('FASTMCP_STATELESS_HTTP', 'true')
+
+    uvicorn.run(
+        'src.main:app',
+        host=os.getenv(SERVER_HOST_VAR) or SERVER_DEFAULT_HOST,
+        port=int(os.getenv(SERVER_PORT_VAR) or SERVER_DEFAULT_PORT),
+        workers=workers,
+        loop='auto',
+        http='auto',
+        limit_concurrency=int(os.getenv(SERVER_LIMIT_CONCURRENCY_VAR) or SERVER_DEFAULT_LIMIT_CONCURRENCY),
+        timeout_graceful_shutdown=float(os.getenv(SERVER_GRACEFUL_TIMEOUT_VAR) or SERVER_DEFAULT_GRACEFUL_TIMEOUT),
+        log_level=os.getenv(SERVER_LOG_LEVEL_VAR) or SERVER_DEFAULT_LOG_LEVEL
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Users MCP tools
+"""
+from typing import Annotated, Dict, List, Optional
+from pydantic import Field, UUID4, StrictStr, EmailStr, ValidationError
+from fastmcp import FastMCP
+from fastmcp.exceptions import ToolError
+from src.models.user import CreateUser, UpdateUser, GetUserResponse, SignupResponse, \
+    UserDefaultResponse, UpdateUserResponse, UsersResponse, UsersByIdsResponse, BatchResponse
+from src.models.user_dal import UserDAL
+from src.dependencies import get_dal, get_db_client_rw, get_db_client_ro, get_user_cache
+from src.helpers.users import invalidate_users, get_user_data, get_users_page, get_users_by_ids, \
+    batch_content, FOLLOWER_READ_DESCRIPTION
+from src.constants import IS_TRUE, USERS, GET_USERS_OP_ID, GET_USER_OP_ID, GET_USERS_BY_IDS_OP_ID, \
+    POST_USER_SIGNUP_OP_ID, PUT_USER_OP_ID, DELETE_USER_OP_ID, POST_USERS_BATCH_OP_ID, PUT_USERS_BATCH_OP_ID, \
+    DELETE_USERS_BATCH_OP_ID, EXPORT_USERS_OP_ID, USERS_LOOKUP_MAX_IDS, USERS_BATCH_MAX_SIZE, \
+    USERS_EXPORT_MCP_MAX_ROWS
+
+FollowerRead = Annotated[bool, Field(description=FOLLOWER_READ_DESCRIPTION)]
+
+class UsersTools:
+    """Users tools class
+
+    Native FastMCP tools for the users operations. Each tool is named after the
+    operation id of the matching REST route and calls UserDAL directly, so a
+    tool call skips the HTTP round trip through the FastAPI app that the
+    OpenAPI proxy tools make. Like the routes, tools return plain dicts and
+    the response models only declare the output schema, so rows are not
+    revalidated on the way out.
+    """
+    def __init__(self, mcp: FastMCP):
+        """Register the tools on the given FastMCP server
+        """
+        self.mcp: FastMCP = mcp
+
+        mcp.tool(self.get_user, name=GET_USER_OP_ID, tags={USERS}, output_schema=GetUserResponse.model_json_schema())
+        mcp.tool(self.get_users, name=GET_USERS_OP_ID, tags={USERS}, output_schema=UsersResponse.model_json_schema())
+        mcp.tool(self.get_users_by_ids, name=GET_USERS_BY_IDS_OP_ID, tags={USERS}, output_schema=UsersByIdsResponse.model_json_schema())
+        mcp.tool(self.signup, name=POST_USER_SIGNUP_OP_ID, tags={USERS}, output_schema=SignupResponse.model_json_schema())
+        mcp.tool(self.update_user, name=PUT_USER_OP_ID, tags={USERS}, output_schema=UpdateUserResponse.model_json_schema())
+        mcp.tool(self.delete_user, name=DELETE_USER_OP_ID, tags={USERS}, output_schema=UserDefaultResponse.model_json_schema())
+        mcp.tool(self.signup_batch, name=POST_USERS_BATCH_OP_ID, tags={USERS}, output_schema=BatchResponse.model_json_schema())
+        mcp.tool(self.update_users_batch, name=PUT_USERS_BATCH_OP_ID, tags={USERS}, output_schema=BatchResponse.model_json_schema())
+        mcp.tool(self.delete_users_batch, name=DELETE_USERS_BATCH_OP_ID, tags={USERS}, output_schema=BatchResponse.model_json_schema())
+        mcp.tool(self.export_users, name=EXPORT_USERS_OP_ID, tags={USERS}, output_schema=UsersResponse.model_json_schema())
+
+    async def get_user(self, id: UUID4, follower_read: FollowerRead = False) -> Dict:
+        """Get user
+        """
+        dal: UserDAL = get_dal(UserDAL, get_db_client_ro)
+        user_data = await get_user_data(dal=dal, user_id=id, cache=get_user_cache(), follower_read=follower_read)
+        if not user_data:
+            raise ToolError('user not found.')
+        return {'status': IS_TRUE, 'message': [], 'response': user_data}
+
+    async def get_users(self, offset: int = 0, limit: int = 1, cursor: Optional[str] = None,
+                        follower_read: FollowerRead = False) -> Dict:
+        """Get users, ordered by creation time. Pass `next_cursor` back as `cursor` to fetch the next page.
+        """
+        dal: UserDAL = get_dal(UserDAL, get_db_client_ro)
+        try:
+            response, next_cursor = await get_users_page(dal=dal, offset=offset, limit=limit, cursor=cursor,
+                                                         follower_read=follower_read)
+        except ValueError:
+            raise ToolError('invalid cursor.')
+        return {'status': IS_TRUE, 'message': [], 'response': response, 'next_cursor': next_cursor}
+
+    async def get_users_by_ids(self, ids: Annotated[List[UUID4], Field(min_length=1, max_length=USERS_LOOKUP_MAX_IDS)],
+                               follower_read: FollowerRead = False) -> Dict:
+        """Get many users by id in one call. Users are returned in input order and unknown ids are listed in `missing_ids`.
+        """
+        dal: UserDAL = get_dal(UserDAL, get_db_client_ro)
+        response, missing_ids = await get_users_by_ids(dal=dal, ids=ids, follower_read=follower_read)
+        return {'status': IS_TRUE, 'message': [], 'response': response, 'missing_ids': missing_ids}
+
+    async def export_users(self, limit: Annotated[Optional[int], Field(ge=1)] = None,
+                           follower_read: FollowerRead = False) -> Dict:
+        """Export active users, ordered by creation time. Returns at most 1000 users.
+        """
+        dal: UserDAL = get_dal(UserDAL, get_db_client_ro)
+        limit = min(limit or USERS_EXPORT_MCP_MAX_ROWS, USERS_EXPORT_MCP_MAX_ROWS)
+        response: List = [dict(record) async for record in dal.export_users(limit=limit, follower_read=follower_read)]
+        return {'status': IS_TRUE, 'message': [], 'response': response}
+
+    async def signup(self, username: StrictStr, email_address: EmailStr, active: bool = IS_TRUE) -> Dict:
+        """Sign up new user
+        """
+        try:
+            user: CreateUser = CreateUser(username=username, email_address=email_address, active=active)
+        except ValidationError as e:
+            raise ToolError(str(e))
+        query_result = await get_dal(UserDAL, get_db_client_rw).new_user(user=user)
+        await invalidate_users(get_user_cache(), [query_result['id']])
+        return {'status': IS_TRUE, 'message': [], 'response': dict(query_result)}
+
+    async def update_user(self, id: UUID4, email_address: EmailStr) -> Dict:
+        """Update user
+        """
+        try:
+            user: UpdateUser = UpdateUser(id=id, email_address=email_address)
+        except ValidationError as e:
+            raise ToolError(str(e))
+        query_result = await get_dal(UserDAL, get_db_client_rw).update_user(user=user)
+        if query_result is None:
+            raise ToolError('user not found.')
+        await invalidate_users(get_user_cache(), [user.id])
+        return {'status': IS_TRUE, 'message': [], 'response': dict(query_result)}
+
+    async def delete_user(self, id: UUID4) -> Dict:
+        """Delete user
+        """
+        await get_dal(UserDAL, get_db_client_rw).delete_user(id=id)
+        await invalidate_users(get_user_cache(), [id])
+        return {'status': IS_TRUE, 'message': [], 'response': {}}
+
+    async def signup_batch(self, users: Annotated[List[CreateUser], Field(min_length=1, max_length=USERS_BATCH_MAX_SIZE)]
+                        ) -> Dict:
+        """Sign up many users in one call. Each user gets its own result entry.
+        """
+        results = await get_dal(UserDAL, get_db_client_rw).new_users(users=users)
+        await invalidate_users(get_user_cache(), [result['id'] for result, _ in results if result])
+        return batch_content(results, dict)
+
+    async def update_users_batch(self, users: Annotated[List[UpdateUser], Field(min_length=1, max_length=USERS_BATCH_MAX_SIZE)]
+                            ) -> Dict:
+        """Update many users' email addresses in one call. Each user gets its own result entry.
+        """
+        results = await get_dal(UserDAL, get_db_client_rw).update_users(users=users)
+        await invalidate_users(get_user_cache(), [user.id for user in users])
+        return batch_content(results, dict)
+
+    async def delete_users_batch(self, ids: Annotated[List[UUID4], Field(min_length=1, max_length=USERS_BATCH_MAX_SIZE)]
+                            ) -> Dict:
+        """Delete many users in one call. Each user id gets its own result entry.
+        """
+        results = await get_dal(UserDAL, get_db_client_rw).delete_users(ids=ids)
+        await invalidate_users(get_user_cache(), ids)
+        return batch_content(results, lambda _: {})
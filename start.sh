@@ -1,6 +1,4 @@
 #!/bin/bash
 
-echo "Starting MCP server on port 8080..."
-uvicorn src.main:app --host 0.0.0.0 --port 8080 &
-
-wait
+echo "Starting MCP server on port ${MCP_SERVER_PORT:-8080}..."
+exec python -m src.server
@@ -0,0 +1,50 @@
+"""Shared fixtures
+
+Tests run from the repository root with `python -m pytest` and need no
+database: the app is driven in process against FakeCockroachDBClient.
+Tests that need a real cluster read DATABASE_RW_DSN and are skipped without it.
+"""
+import os
+import asyncio
+from typing import Any, Awaitable, Callable
+
+import httpx
+import pytest
+
+os.environ.setdefault('MCP_SERVER_HOST', 'http://localhost:8080')
+
+from tests.fake_redis import FakeRedisServer  # noqa: E402
+
+BASE_URL: str = 'http://testserver'
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """In-memory database client installed as both the read-only and read-write client
+    """
+    from src.libs import lifespan
+    from benchmarks.fake_db import FakeCockroachDBClient
+    fake = FakeCockroachDBClient(users=20)
+    monkeypatch.setattr(lifespan, 'db_client_ro', fake)
+    monkeypatch.setattr(lifespan, 'db_client_rw', fake)
+    return fake
+
+@pytest.fixture
+def run_app(fake_db) -> Callable[[Callable[[httpx.AsyncClient], Awaitable]], Any]:
+    """Run check(client) against the app, inside its lifespan, and return its result
+    """
+    from src.main import app
+
+    def run(check: Callable[[httpx.AsyncClient], Awaitable]) -> Any:
+        async def main() -> Any:
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=BASE_URL) as client:
+                    return await check(client)
+        return asyncio.run(main())
+
+    return run
+
+@pytest.fixture
+def fake_redis() -> FakeRedisServer:
+    """Redis-protocol server, started with `async with fake_redis as url` inside the test's event loop
+    """
+    return FakeRedisServer()
@@ -0,0 +1,117 @@
+"""In-process Redis (RESP2) server for tests
+
+Speaks enough of the protocol for RedisClient and RedisCacheBackend: PING,
+AUTH, SELECT, GET, SET (with PX and NX), DEL, PUBLISH and SUBSCRIBE, with data kept
+in a dict. Start it with `async with FakeRedisServer() as url`.
+"""
+import time
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+
+def bulk(value: Optional[bytes]) -> bytes:
+    """RESP bulk string, or the null bulk string for None
+    """
+    if value is None:
+        return b'$-1\r\n'
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+def array(*items: bytes) -> bytes:
+    """RESP array of already encoded items
+    """
+    return b'*%d\r\n' % len(items) + b''.join(items)
+
+async def read_command(reader: asyncio.StreamReader) -> List[bytes]:
+    """Read one command sent as a RESP array of bulk strings
+    """
+    count: int = int((await reader.readuntil(b'\r\n'))[1:-2])
+    args: List[bytes] = []
+    for _ in range(count):
+        length: int = int((await reader.readuntil(b'\r\n'))[1:-2])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+class FakeRedisServer:
+    """Redis-protocol server on a random local port
+    """
+    def __init__(self, password: Optional[str] = None):
+        """Initialize this class and set class members
+        """
+        self.password = password
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.subscribers: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+        self.commands: List[List[bytes]] = []
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def __aenter__(self) -> str:
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        port: int = self.server.sockets[0].getsockname()[1]
+        return f'redis://127.0.0.1:{port}/0'
+
+    async def __aexit__(self, *exc_info):
+        self.server.close()
+        for writers in self.subscribers.values():
+            for writer in writers:
+                writer.close()
+        await self.server.wait_closed()
+
+    def subscriber_count(self, channel: str) -> int:
+        """Connections subscribed to a channel
+        """
+        return len(self.subscribers.get(channel.encode(), ()))
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        """Stored value, None when absent or expired
+        """
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def reply(self, args: List[bytes], writer: asyncio.StreamWriter) -> bytes:
+        """Encoded reply to one command
+        """
+        name: str = args[0].decode().upper()
+        if name == 'PING':
+            return b'+PONG\r\n'
+        if name == 'AUTH':
+            return b'+OK\r\n' if args[-1].decode() == self.password else b'-WRONGPASS invalid password\r\n'
+        if name == 'SELECT':
+            return b'+OK\r\n'
+        if name == 'GET':
+            return bulk(self.get(args[1]))
+        if name == 'SET':
+            options: List[bytes] = [arg.upper() for arg in args[3:]]
+            if b'NX' in options and self.get(args[1]) is not None:
+                return bulk(None)
+            expires_at: Optional[float] = None
+            if b'PX' in options:
+                expires_at = time.monotonic() + int(args[3 + options.index(b'PX') + 1]) / 1000
+            self.data[args[1]] = (args[2], expires_at)
+            return b'+OK\r\n'
+        if name == 'DEL':
+            return b':%d\r\n' % sum(self.data.pop(key, None) is not None for key in args[1:])
+        if name == 'PUBLISH':
+            writers: Set[asyncio.StreamWriter] = self.subscribers.get(args[1], set())
+            for subscriber in writers:
+                subscriber.write(array(bulk(b'message'), bulk(args[1]), bulk(args[2])))
+            return b':%d\r\n' % len(writers)
+        if name == 'SUBSCRIBE':
+            self.subscribers.setdefault(args[1], set()).add(writer)
+            return array(bulk(b'subscribe'), bulk(args[1]), b':1\r\n')
+        return b'-ERR unknown command \'%s\'\r\n' % args[0]
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one connection until the client closes it
+        """
+        try:
+            while True:
+                args: List[bytes] = await read_command(reader)
+                self.commands.append(args)
+                writer.write(self.reply(args, writer))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for writers in self.subscribers.values():
+                writers.discard(writer)
+            writer.close()
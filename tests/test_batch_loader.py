@@ -0,0 +1,86 @@
+"""Batched point lookups (BatchLoader)"""
+import asyncio
+import time
+import uuid
+
+from src.libs.batch_loader import BatchLoader
+from src.libs.timing import current_timings, record
+from src.models import user_dal
+from src.models.user_dal import UserDAL
+
+def test_batch_time_is_not_recorded_in_a_callers_timings():
+    async def load_many(keys: list) -> dict:
+        record('db_query', time.perf_counter())
+        return {key: key.upper() for key in keys}
+
+    async def caller(loader: BatchLoader, key: str) -> tuple:
+        timings: dict = {}
+        current_timings.set(timings)
+        return await loader.load(key), timings
+
+    async def main():
+        # Flushed by the window timer, then as soon as the batch is full
+        by_window = BatchLoader(load_many, window=0.001, max_size=10)
+        by_size = BatchLoader(load_many, window=10, max_size=2)
+        return await asyncio.gather(caller(by_window, 'a'), caller(by_window, 'b'),
+                                    caller(by_size, 'c'), caller(by_size, 'd'))
+
+    assert asyncio.run(main()) == [('A', {}), ('B', {}), ('C', {}), ('D', {})]
+
+def batched(fake_db, window: float, max_size: int):
+    """Make get_user on fake_db go through the batch loader
+    """
+    fake_db.batch_window = window
+    fake_db.batch_max_size = max_size
+    return UserDAL(fake_db)
+
+def lookup(dal: UserDAL, ids: list):
+    """Look up ids concurrently
+    """
+    return asyncio.gather(*[dal.get_user(id=user_id) for user_id in ids])
+
+def test_lookups_within_the_window_share_one_query_with_per_key_results(fake_db):
+    dal = batched(fake_db, window=0.01, max_size=100)
+    first, second, inactive = [str(user_id) for user_id in fake_db.active_ids()[:3]]
+    fake_db.users[uuid.UUID(inactive)]['active'] = False
+    unknown: str = str(uuid.uuid4())
+
+    async def main():
+        together = await lookup(dal, [second, unknown, first, inactive, second])
+        return together, await dal.get_user(id=first)
+
+    together, alone = asyncio.run(main())
+    assert [[row['id'] for row in rows] for rows in together] == [
+        [uuid.UUID(second)], [], [uuid.UUID(first)], [], [uuid.UUID(second)]
+    ]
+    assert alone[0]['email_address'] == 'seed0@example.com'
+    assert fake_db.queries == 2
+    assert fake_db.loaders[user_dal.GET_USER_STMT].stats() == {'calls': 6, 'batches': 2, 'keys': 5}
+
+def test_a_full_batch_is_loaded_without_waiting_for_the_window(fake_db):
+    dal = batched(fake_db, window=10, max_size=2)
+    ids: list = [str(user_id) for user_id in fake_db.active_ids()[:4]]
+
+    async def main():
+        return await asyncio.wait_for(lookup(dal, ids), timeout=1)
+
+    results = asyncio.run(main())
+    assert [rows[0]['id'] for rows in results] == [uuid.UUID(user_id) for user_id in ids]
+    assert fake_db.queries == 2
+    assert fake_db.loaders[user_dal.GET_USER_STMT].stats()['batches'] == 2
+
+def test_a_batch_error_reaches_every_caller(fake_db):
+    dal = batched(fake_db, window=0.01, max_size=100)
+    ids: list = [str(user_id) for user_id in fake_db.active_ids()[:3]]
+
+    def fail(ids, active):
+        raise ConnectionResetError('connection lost')
+
+    fake_db.handlers[user_dal.GET_USERS_BY_IDS_STMT] = fail
+
+    async def main():
+        return await asyncio.gather(*[dal.get_user(id=user_id) for user_id in ids], return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert [str(error) for error in errors] == ['Failed to get user: Failed to get users: connection lost'] * 3
+    assert fake_db.queries == 1
@@ -0,0 +1,96 @@
+"""Negotiated response compression (CompressionMiddleware)"""
+import asyncio
+import json
+import zlib
+
+import pytest
+
+from src.constants import MCP_TOOL_HEADER
+from src.libs.compression import BROTLI, GZIP, ZSTD, CompressionMiddleware, negotiate
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    ('gzip', GZIP),
+    ('gzip, br, zstd', ZSTD),
+    ('gzip, zstd;q=0', GZIP),
+    ('GZIP;q=0.5', GZIP),
+    ('gzip;q=0', None),
+    ('*;q=0', None),
+    ('*', ZSTD),
+    ('identity', None),
+    ('gzip;q=invalid', None)
+])
+def test_negotiate(accept_encoding, expected):
+    assert negotiate(accept_encoding, [ZSTD, BROTLI, GZIP]) == expected
+
+def test_small_bodies_are_not_compressed(run_app, fake_db):
+    user_id: str = str(fake_db.active_ids()[0])
+
+    async def check(client):
+        return await client.get(f'/mcp/users/{user_id}', headers={'Accept-Encoding': 'gzip'})
+
+    response = run_app(check)
+    assert 'content-encoding' not in response.headers
+    assert int(response.headers['content-length']) < 1024
+
+def test_page_is_compressed_with_a_weak_etag(run_app, fake_db):
+    async def check(client):
+        identity = await client.get('/mcp/users/', params={'limit': 20}, headers={'Accept-Encoding': 'identity'})
+        compressed = await client.get('/mcp/users/', params={'limit': 20}, headers={'Accept-Encoding': 'gzip'})
+        cached = await client.get('/mcp/users/', params={'limit': 20},
+                                  headers={'Accept-Encoding': 'gzip', 'If-None-Match': compressed.headers['etag']})
+        return identity, compressed, cached
+
+    identity, compressed, cached = run_app(check)
+    assert 'content-encoding' not in identity.headers
+    assert compressed.headers['content-encoding'] == GZIP
+    assert 'Accept-Encoding' in compressed.headers['vary']
+    assert int(compressed.headers['content-length']) < len(identity.content)
+    assert compressed.content == identity.content
+    assert compressed.headers['etag'] == f"W/{identity.headers['etag']}"
+    assert cached.status_code == 304
+
+def test_export_is_compressed_as_a_stream(run_app, fake_db):
+    async def check(client):
+        return await client.get('/mcp/users/export', headers={'Accept-Encoding': 'gzip'})
+
+    response = run_app(check)
+    assert response.headers['content-encoding'] == GZIP
+    assert 'content-length' not in response.headers
+    rows: list = [json.loads(line) for line in response.text.splitlines()]
+    assert [row['id'] for row in rows] == [str(user_id) for user_id in fake_db.active_ids()]
+
+def test_each_streamed_chunk_is_flushed():
+    chunks: list = [b'{"row": %d}\n' % index * 100 for index in range(3)]
+
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'application/x-ndjson')]})
+        for index, chunk in enumerate(chunks):
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': index < len(chunks) - 1})
+
+    async def main():
+        sent: list = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope: dict = {'type': 'http', 'path': '/mcp/users/export', 'headers': [(b'accept-encoding', b'gzip')]}
+        await CompressionMiddleware(app, minimum_size=1024)(scope, None, send)
+        return sent
+
+    start, *bodies = asyncio.run(main())
+    assert (b'content-encoding', b'gzip') in start['headers']
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Every chunk decodes on arrival, without waiting for the next one
+    assert [decoder.decompress(body['body']) for body in bodies] == chunks
+    assert [body['more_body'] for body in bodies] == [True, True, False]
+
+def test_proxied_tool_calls_are_not_compressed(run_app, fake_db):
+    async def check(client):
+        return await client.get('/mcp/users/', params={'limit': 20},
+                                headers={'Accept-Encoding': 'gzip', MCP_TOOL_HEADER: 'true'})
+
+    response = run_app(check)
+    assert response.status_code == 200
+    assert 'content-encoding' not in response.headers
+    assert len(response.json()['response']) == 20
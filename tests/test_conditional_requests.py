@@ -0,0 +1,31 @@
+"""ETag and Last-Modified on user reads"""
+
+FUTURE: str = 'Fri, 01 Jan 2100 00:00:00 GMT'
+
+def test_user_not_modified_since(run_app, fake_db):
+    user_id: str = str(next(iter(fake_db.users)))
+
+    async def check(client):
+        response = await client.get(f'/mcp/users/{user_id}')
+        assert response.headers['last-modified']
+        return await client.get(f'/mcp/users/{user_id}', headers={'If-Modified-Since': FUTURE})
+
+    assert run_app(check).status_code == 304
+
+def test_page_is_not_validated_by_date(run_app, fake_db):
+    first_id: str = str(next(iter(fake_db.users)))
+
+    async def check(client):
+        page = await client.get('/mcp/users/', params={'limit': 3})
+        assert 'last-modified' not in page.headers
+        # An older user moves into the page without raising its latest updated_at
+        await client.delete(f'/mcp/users/{first_id}')
+        since = await client.get('/mcp/users/', params={'limit': 3}, headers={'If-Modified-Since': FUTURE})
+        match = await client.get('/mcp/users/', params={'limit': 3}, headers={'If-None-Match': page.headers['etag']})
+        unchanged = await client.get('/mcp/users/', params={'limit': 3}, headers={'If-None-Match': since.headers['etag']})
+        return since, match, unchanged
+
+    since, match, unchanged = run_app(check)
+    assert since.status_code == 200
+    assert match.status_code == 200
+    assert unchanged.status_code == 304
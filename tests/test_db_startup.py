@@ -0,0 +1,51 @@
+"""Background start of CockroachDBClient"""
+import asyncio
+import logging
+
+import pytest
+
+from src.libs.db_client import CockroachDBClient, DBAccessMode
+
+def test_failed_start_is_logged_and_retried_by_ready(caplog, monkeypatch):
+    client = CockroachDBClient(rw_dsn='postgresql://nowhere/db', mode=DBAccessMode.WRITE)
+    attempts: list = []
+
+    async def start_up():
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            raise OSError('connection refused')
+        client.connected = True
+
+    monkeypatch.setattr(client, 'start_up', start_up)
+
+    async def main():
+        client.start()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        # Logged at boot, before any request needs the database
+        assert [record.getMessage() for record in caplog.records] == [
+            'DB client (WRITE) failed to connect: connection refused'
+        ]
+        await client.ready()
+
+    with caplog.at_level(logging.ERROR, logger='src.libs.db_client'):
+        asyncio.run(main())
+    assert attempts == [0, 1]
+    assert caplog.records[0].exc_info[0] is OSError
+
+def test_ready_raises_the_startup_error(caplog, monkeypatch):
+    client = CockroachDBClient(ro_dsn='postgresql://nowhere/db', mode=DBAccessMode.READ)
+
+    async def start_up():
+        raise OSError('connection refused')
+
+    monkeypatch.setattr(client, 'start_up', start_up)
+
+    async def main():
+        client.start()
+        with pytest.raises(OSError):
+            await client.ready()
+
+    with caplog.at_level(logging.ERROR, logger='src.libs.db_client'):
+        asyncio.run(main())
+    assert len(caplog.records) == 1
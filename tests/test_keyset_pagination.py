@@ -0,0 +1,53 @@
+"""Keyset cursor pagination of get_users"""
+import json
+from base64 import urlsafe_b64encode
+from datetime import datetime
+
+import pytest
+
+def test_cursor_pages_return_every_user_once(run_app, fake_db):
+    # Users sharing a created_at are ordered by id within it
+    tied_at: datetime = datetime(2025, 1, 1, 0, 0, 5)
+    for index in range(7):
+        fake_db.insert(f'tied{index}', f'tied{index}@example.com', True, tied_at)
+    expected: list = [str(user_id) for user_id in fake_db.active_ids()]
+
+    async def check(client):
+        ids: list = []
+        cursor = None
+        while True:
+            params: dict = {'limit': 4, **({'cursor': cursor} if cursor else {})}
+            page = (await client.get('/mcp/users/', params=params)).json()
+            ids.extend(user['id'] for user in page['response'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return ids
+
+    ids: list = run_app(check)
+    assert ids == expected
+    assert len(ids) == len(set(ids)) == 27
+
+def test_last_full_page_has_a_cursor_to_an_empty_page(run_app, fake_db):
+    async def check(client):
+        page = (await client.get('/mcp/users/', params={'limit': 20})).json()
+        last = (await client.get('/mcp/users/', params={'limit': 20, 'cursor': page['next_cursor']})).json()
+        return page, last
+
+    page, last = run_app(check)
+    assert len(page['response']) == 20 and page['next_cursor']
+    assert last['response'] == [] and last['next_cursor'] is None
+
+@pytest.mark.parametrize('cursor', [
+    'not a cursor',
+    urlsafe_b64encode(b'5').decode(),
+    urlsafe_b64encode(json.dumps(['2025-01-01T00:00:00']).encode()).decode(),
+    urlsafe_b64encode(json.dumps(['yesterday', 'user']).encode()).decode(),
+    urlsafe_b64encode(json.dumps([1, 2]).encode()).decode(),
+])
+def test_invalid_cursor_is_a_bad_request(run_app, cursor):
+    async def check(client):
+        return await client.get('/mcp/users/', params={'limit': 2, 'cursor': cursor})
+
+    response = run_app(check)
+    assert response.status_code == 400
+    assert response.json()['message'] == ['invalid cursor.']
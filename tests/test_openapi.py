@@ -0,0 +1,23 @@
+"""/openapi.json"""
+import json
+
+import pytest
+
+async def failing_loader():
+    raise RuntimeError('FastMCP failed to import')
+
+def test_openapi_does_not_wait_for_the_mcp_server(run_app, monkeypatch):
+    from src.main import app, mcp_server
+    monkeypatch.setattr(mcp_server, 'loader', failing_loader)
+
+    async def check(client):
+        document = await client.get('/openapi.json')
+        cached = await client.get('/openapi.json', headers={'If-None-Match': document.headers['etag']})
+        with pytest.raises(RuntimeError, match='FastMCP failed to import'):
+            await client.get('/tools.json')
+        return document, cached
+
+    document, cached = run_app(check)
+    assert document.status_code == 200
+    assert json.loads(document.content) == json.loads(json.dumps(app.openapi()))
+    assert cached.status_code == 304
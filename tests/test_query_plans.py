@@ -0,0 +1,60 @@
+"""Query plans of the UserDAL statements
+
+EXPLAINs every registered statement on the cluster at DATABASE_RW_DSN, with
+the schema and migrations applied, and fails when a plan scans a whole table
+or index (`FULL SCAN`), e.g. because schema/migrations was not applied or a
+statement stopped matching its index. Skipped without a DSN or when the
+server is not CockroachDB.
+"""
+import os
+import uuid
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import asyncpg
+import pytest
+
+from src.models import user_dal
+from src.models.user_dal import UserDAL
+from src.constants import DB_RW_VAR
+
+USER_ID: uuid.UUID = uuid.UUID('00000000-0000-4000-8000-000000000000')
+CREATED_AT: datetime = datetime(2025, 1, 1)
+
+# Representative arguments per statement; EXPLAIN plans without running the statement
+ARGUMENTS: Dict[str, Tuple] = {
+    user_dal.NEW_USER_STMT: ('user', 'user@example.com', True),
+    user_dal.GET_USER_STMT: (USER_ID, True, 1),
+    user_dal.GET_USERS_STMT: (True, 10, 0),
+    user_dal.GET_USERS_AFTER_STMT: (True, CREATED_AT, USER_ID, 10),
+    user_dal.EXPORT_USERS_STMT: (True, 1000),
+    user_dal.GET_USERS_BY_IDS_STMT: ([USER_ID], True),
+    user_dal.UPDATE_USER_STMT: (USER_ID, 'user@example.com', True),
+    user_dal.DELETE_USER_STMT: (False, USER_ID),
+    user_dal.NEW_USERS_STMT: (['user'], ['user@example.com'], [True]),
+    user_dal.UPDATE_USERS_STMT: ([USER_ID], ['user@example.com'], True),
+    user_dal.DELETE_USERS_STMT: (False, [USER_ID], True)
+}
+
+async def explain(name: str) -> List[str]:
+    """Lines of the plan of a registered statement
+    """
+    conn = await asyncpg.connect(os.getenv(DB_RW_VAR))
+    try:
+        version: str = await conn.fetchval('SELECT version()')
+        if 'CockroachDB' not in version:
+            pytest.skip(f'{DB_RW_VAR} is not a CockroachDB cluster')
+        query: str = UserDAL.STATEMENTS[name][0]
+        return [row['info'] for row in await conn.fetch(f'EXPLAIN {query}', *ARGUMENTS[name])]
+    finally:
+        await conn.close()
+
+def test_every_statement_has_arguments():
+    assert set(ARGUMENTS) == set(UserDAL.STATEMENTS)
+
+@pytest.mark.skipif(not os.getenv(DB_RW_VAR), reason=f'{DB_RW_VAR} is not set')
+@pytest.mark.parametrize('name', sorted(UserDAL.STATEMENTS))
+def test_statement_does_not_scan_a_full_table(name):
+    plan: List[str] = asyncio.run(explain(name))
+    assert not [line for line in plan if 'FULL SCAN' in line], '\n'.join(plan)
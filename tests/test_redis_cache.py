@@ -0,0 +1,162 @@
+"""RedisClient and RedisCacheBackend against an in-process Redis server"""
+import asyncio
+
+import pytest
+
+from src.libs.cache import RedisCacheBackend
+from src.libs.redis_client import RedisClient, RedisError, encode_command, read_reply
+from tests.fake_redis import FakeRedisServer
+
+NAMESPACE: str = 'test:users'
+
+def parse(data: bytes):
+    """Reply read_reply() decodes from raw bytes
+    """
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await read_reply(reader)
+    return asyncio.run(main())
+
+async def wait_for(condition, timeout: float = 2.0):
+    """Poll until condition() is true
+    """
+    deadline: float = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, 'timed out'
+        await asyncio.sleep(0.005)
+
+def test_encode_command():
+    assert encode_command('SET', 'key', b'\x00value', 'PX', 100) == \
+        b'*5\r\n$3\r\nSET\r\n$3\r\nkey\r\n$6\r\n\x00value\r\n$2\r\nPX\r\n$3\r\n100\r\n'
+
+@pytest.mark.parametrize('data, expected', [
+    (b'+OK\r\n', 'OK'),
+    (b':42\r\n', 42),
+    (b'$5\r\nhe\r\no\r\n', b'he\r\no'),
+    (b'$0\r\n\r\n', b''),
+    (b'$-1\r\n', None),
+    (b'*-1\r\n', None),
+    (b'*3\r\n$7\r\nmessage\r\n$1\r\nc\r\n*1\r\n:1\r\n', [b'message', b'c', [1]]),
+])
+def test_read_reply(data, expected):
+    assert parse(data) == expected
+
+def test_read_reply_error():
+    reply = parse(b'-ERR wrong type\r\n')
+    assert isinstance(reply, RedisError) and str(reply) == 'ERR wrong type'
+
+def test_client_commands(fake_redis):
+    async def main():
+        async with fake_redis as url:
+            client = RedisClient(url)
+            try:
+                assert await client.execute('SET', 'a', b'1', 'PX', 60000) == 'OK'
+                # Concurrent commands share the connection and get their own replies
+                replies = await asyncio.gather(*(client.execute('GET', key) for key in ('a', 'b', 'a')))
+                assert replies == [b'1', None, b'1']
+                assert await client.execute('PUBLISH', 'channel', 'a') == 0
+                assert await client.execute('DEL', 'a') == 1
+                assert await client.execute('GET', 'a') is None
+                with pytest.raises(RedisError):
+                    await client.execute('NOPE')
+                assert await client.execute('PING') == 'PONG'
+            finally:
+                await client.disconnect()
+    asyncio.run(main())
+
+def test_client_pipeline(fake_redis):
+    async def main():
+        async with fake_redis as url:
+            client = RedisClient(url)
+            try:
+                assert await client.pipeline([('SET', 'a', b'1'), ('GET', 'a'), ('DEL', 'a', 'b')]) == ['OK', b'1', 1]
+                with pytest.raises(RedisError):
+                    await client.pipeline([('SET', 'a', b'2'), ('NOPE',), ('GET', 'a')])
+                # The replies after the error were still consumed
+                assert await client.execute('GET', 'a') == b'2'
+            finally:
+                await client.disconnect()
+    asyncio.run(main())
+
+def test_client_authenticates():
+    async def main():
+        server = FakeRedisServer(password='secret')
+        async with server as url:
+            client = RedisClient(url.replace('redis://', 'redis://:secret@').replace('/0', '/2'))
+            try:
+                assert await client.execute('PING') == 'PONG'
+            finally:
+                await client.disconnect()
+            assert server.commands[:2] == [[b'AUTH', b'secret'], [b'SELECT', b'2']]
+            with pytest.raises(RedisError):
+                await RedisClient(url.replace('redis://', 'redis://:wrong@')).connect()
+    asyncio.run(main())
+
+def test_invalidation_evicts_other_near_cache(fake_redis):
+    async def main():
+        async with fake_redis as url:
+            writer = RedisCacheBackend(url, ttl=60, namespace=NAMESPACE, near_cache_size=10)
+            reader = RedisCacheBackend(url, ttl=60, namespace=NAMESPACE, near_cache_size=10)
+            await writer.connect()
+            await reader.connect()
+            try:
+                await wait_for(lambda: fake_redis.subscriber_count(f'{NAMESPACE}:invalidate') == 2)
+                await writer.set('user', {'id': 'user', 'email_address': 'old@example.com'})
+                assert await reader.get('user') == {'id': 'user', 'email_address': 'old@example.com'}
+                assert reader.near_cache.get('user') is not None
+
+                await writer.delete('user')
+                await wait_for(lambda: reader.invalidations_received == 1)
+                assert reader.near_cache.get('user') is None
+                assert await reader.get('user') is None
+                assert reader.errors == writer.errors == 0
+            finally:
+                await writer.disconnect()
+                await reader.disconnect()
+    asyncio.run(main())
+
+def test_unreachable_server_is_a_miss(fake_redis):
+    async def main():
+        async with fake_redis as url:
+            pass
+        backend = RedisCacheBackend(url, ttl=60, namespace=NAMESPACE)
+        await backend.connect()
+        await backend.set('user', {'id': 'user'})
+        assert await backend.get('user') is None
+        assert backend.errors > 0
+        await backend.disconnect()
+    asyncio.run(main())
+
+def test_bulk_invalidation_is_one_round_trip(fake_redis):
+    async def main():
+        keys: list = [f'user{index}' for index in range(100)]
+        async with fake_redis as url:
+            writer = RedisCacheBackend(url, ttl=60, namespace=NAMESPACE, near_cache_size=200, tombstone_ttl=5)
+            reader = RedisCacheBackend(url, ttl=60, namespace=NAMESPACE, near_cache_size=200, tombstone_ttl=5)
+            await writer.connect()
+            await reader.connect()
+            try:
+                await wait_for(lambda: fake_redis.subscriber_count(f'{NAMESPACE}:invalidate') == 2)
+                for key in keys:
+                    await writer.set(key, {'id': key})
+                    assert await reader.get(key) == {'id': key}
+
+                round_trips: list = []
+                for name in ('execute', 'pipeline'):
+                    method = getattr(writer.client, name)
+                    setattr(writer.client, name, lambda *args, method=method: round_trips.append(args) or method(*args))
+                fake_redis.commands.clear()
+                await writer.delete_many(keys)
+                assert len(round_trips) == 1
+                assert [command[0] for command in fake_redis.commands].count(b'PUBLISH') == 1
+
+                await wait_for(lambda: reader.invalidations_received == len(keys))
+                assert all(reader.near_cache.get(key) is None for key in keys)
+                assert all([await reader.get(key) is None for key in keys])
+                assert reader.errors == writer.errors == 0
+            finally:
+                await writer.disconnect()
+                await reader.disconnect()
+    asyncio.run(main())
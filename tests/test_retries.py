@@ -0,0 +1,69 @@
+"""Serialization-failure retries of CockroachDBClient.with_retries"""
+import asyncio
+
+import asyncpg
+import pytest
+
+from src.libs import db_client
+from src.libs.db_client import CockroachDBClient
+
+class Flaky:
+    """Operation failing with `error` on its first `failures` calls
+    """
+    def __init__(self, failures: int, error: Exception = None):
+        self.failures = failures
+        self.error = error or asyncpg.SerializationError('restart transaction')
+        self.calls: int = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return 'committed'
+
+@pytest.fixture
+def backoffs(monkeypatch) -> list:
+    """Upper bounds of the jittered backoffs drawn, without sleeping
+    """
+    bounds: list = []
+
+    def uniform(low: float, high: float) -> float:
+        bounds.append((low, high))
+        return 0.0
+
+    monkeypatch.setattr(db_client.random, 'uniform', uniform)
+    return bounds
+
+def test_serialization_failures_are_retried(backoffs):
+    client = CockroachDBClient(max_retries=5, retry_base_delay=0.01, retry_max_delay=1.0)
+    operation = Flaky(failures=3)
+
+    assert asyncio.run(client.with_retries('update_user', operation)) == 'committed'
+    assert operation.calls == 4
+    assert backoffs == [(0, 0.01), (0, 0.02), (0, 0.04)]
+    assert client.retry_stats() == {'retries': {'update_user': 3}, 'exhausted': {}}
+
+def test_retries_stop_at_the_cap_with_bounded_backoff(backoffs):
+    client = CockroachDBClient(max_retries=6, retry_base_delay=0.01, retry_max_delay=0.05)
+    operation = Flaky(failures=100)
+
+    with pytest.raises(asyncpg.SerializationError):
+        asyncio.run(client.with_retries('update_user', operation))
+    assert operation.calls == 7
+    assert [high for _, high in backoffs] == [0.01, 0.02, 0.04, 0.05, 0.05, 0.05]
+    assert client.retry_stats() == {'retries': {'update_user': 6}, 'exhausted': {'update_user': 1}}
+
+@pytest.mark.parametrize('error', [
+    asyncpg.UniqueViolationError('duplicate key value violates unique constraint "users_email_address_key"'),
+    asyncpg.DeadlockDetectedError('deadlock detected'),
+    RuntimeError('Write pool not initialized.')
+])
+def test_other_errors_are_not_retried(backoffs, error):
+    client = CockroachDBClient(max_retries=5)
+    operation = Flaky(failures=1, error=error)
+
+    with pytest.raises(type(error)):
+        asyncio.run(client.with_retries('update_user', operation))
+    assert operation.calls == 1
+    assert backoffs == []
+    assert client.retry_stats() == {'retries': {}, 'exhausted': {}}
@@ -0,0 +1,110 @@
+"""Read coalescing (SingleFlight)"""
+import asyncio
+
+from benchmarks.fake_db import FakeCockroachDBClient
+from src.libs import lifespan
+from src.models import user_dal
+
+def test_read_after_a_write_on_the_other_client_does_not_join_an_older_read(run_app, monkeypatch):
+    # Distinct read-only and read-write clients over the same rows, as create_db_client builds them
+    db_ro = FakeCockroachDBClient(users=1, coalesce_reads=True)
+    db_rw = FakeCockroachDBClient(users=0, coalesce_reads=True)
+    db_rw.users = db_ro.users
+    monkeypatch.setattr(lifespan, 'db_client_ro', db_ro)
+    monkeypatch.setattr(lifespan, 'db_client_rw', db_rw)
+    user_id: str = str(db_ro.active_ids()[0])
+    read, release = asyncio.Event(), asyncio.Event()
+    original = db_ro.read
+
+    async def first_read_waits(query: str, *args, follower_read: bool = False):
+        rows = await original(query, *args, follower_read=follower_read)
+        if not read.is_set():
+            read.set()
+            await release.wait()
+        return rows
+
+    db_ro.read = first_read_waits
+
+    async def check(client):
+        before = asyncio.create_task(client.get(f'/mcp/users/{user_id}'))
+        await read.wait()
+        await client.put(f'/mcp/users/{user_id}', json={'id': user_id, 'email_address': 'new@example.com'})
+        after = asyncio.create_task(client.get(f'/mcp/users/{user_id}'))
+        await asyncio.sleep(0.05)
+        release.set()
+        return (await before).json()['response'], (await after).json()['response']
+
+    before, after = run_app(check)
+    assert before['email_address'] == 'seed0@example.com'
+    assert after['email_address'] == 'new@example.com'
+    assert db_ro.reads is db_rw.reads
+    assert db_ro.reads.stats()['collapsed'] == {}
+
+def coalesced(fake_db):
+    """Make fake_db coalesce reads that take long enough to overlap
+    """
+    fake_db.coalesce_reads = True
+    fake_db.latency = 0.01
+    return fake_db
+
+def test_concurrent_identical_reads_share_one_query(fake_db):
+    db = coalesced(fake_db)
+    first, second = [str(user_id) for user_id in db.active_ids()[:2]]
+
+    async def main():
+        return await asyncio.gather(*[
+            db.execute_read(user_dal.GET_USER_STMT, user_id, True, 1) for user_id in (first, first, first, second)
+        ])
+
+    results = asyncio.run(main())
+    assert [rows[0]['email_address'] for rows in results] == ['seed0@example.com'] * 3 + ['seed1@example.com']
+    assert results[0] is results[1] is results[2]
+    assert db.queries == 2
+    assert db.reads.stats() == {'calls': {user_dal.GET_USER_STMT: 4}, 'collapsed': {user_dal.GET_USER_STMT: 2},
+                                'in_flight': 0}
+
+def test_reads_after_completion_or_invalidation_run_their_own_query(fake_db):
+    db = coalesced(fake_db)
+    user_id: str = str(db.active_ids()[0])
+
+    async def main():
+        await db.execute_read(user_dal.GET_USER_STMT, user_id, True, 1)
+        before = asyncio.create_task(db.execute_read(user_dal.GET_USER_STMT, user_id, True, 1))
+        await asyncio.sleep(0)
+        db.reads.invalidate()
+        after = await db.execute_read(user_dal.GET_USER_STMT, user_id, True, 1)
+        return await before, after
+
+    before, after = asyncio.run(main())
+    assert before == after and before is not after
+    assert db.queries == 3
+    assert db.reads.stats()['collapsed'] == {}
+
+def test_an_error_reaches_every_waiter(fake_db):
+    db = coalesced(fake_db)
+
+    async def main():
+        return await asyncio.gather(*[
+            db.execute_read(user_dal.GET_USER_STMT, 'not-a-uuid', True, 1) for _ in range(3)
+        ], return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert errors[0] is errors[1] is errors[2]
+    assert db.queries == 1
+    assert db.reads.stats()['in_flight'] == 0
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_query(fake_db):
+    db = coalesced(fake_db)
+    user_id: str = str(db.active_ids()[0])
+
+    async def main():
+        cancelled = asyncio.create_task(db.execute_read(user_dal.GET_USER_STMT, user_id, True, 1))
+        waiting = asyncio.create_task(db.execute_read(user_dal.GET_USER_STMT, user_id, True, 1))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await waiting
+
+    rows = asyncio.run(main())
+    assert rows[0]['email_address'] == 'seed0@example.com'
+    assert db.queries == 1
@@ -0,0 +1,24 @@
+"""Import-time budget of the app module (see benchmarks.startup)"""
+from typing import Set, Tuple
+
+import pytest
+
+from benchmarks.startup import MODULE, BUDGET_MS, FORBIDDEN_MODULES, measure_import
+
+RUNS: int = 3
+
+@pytest.fixture(scope='module')
+def app_import() -> Tuple[float, Set[str]]:
+    """Fastest of RUNS imports of the app module in fresh interpreters, in ms, and the modules it imported
+    """
+    total, _, imported = min((measure_import(MODULE) for _ in range(RUNS)), key=lambda run: run[0])
+    return total, imported
+
+def test_import_within_budget(app_import):
+    total, _ = app_import
+    assert total <= BUDGET_MS, f'import {MODULE} took {total:.0f} ms, over the {BUDGET_MS:.0f} ms budget'
+
+@pytest.mark.parametrize('module', FORBIDDEN_MODULES)
+def test_module_not_imported_eagerly(app_import, module):
+    _, imported = app_import
+    assert module not in imported, f'import {MODULE} eagerly imports {module}'
@@ -0,0 +1,14 @@
+"""Status routes"""
+
+def test_stats_is_served_but_not_published(run_app):
+    from src.main import app
+
+    async def check(client):
+        return await client.get('/mcp/status/stats')
+
+    response = run_app(check)
+    assert response.status_code == 200
+    assert set(response.json()['response']) == {'user_cache', 'db'}
+    paths: dict = app.openapi()['paths']
+    assert '/mcp/status/' in paths
+    assert '/mcp/status/stats' not in paths
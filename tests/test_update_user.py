@@ -0,0 +1,42 @@
+"""PUT /mcp/users/{id}"""
+import uuid
+
+import pytest
+
+@pytest.mark.parametrize('write_batch_interval', [0.0, 0.001])
+def test_update_returns_the_written_row(run_app, fake_db, write_batch_interval):
+    fake_db.write_batch_interval = write_batch_interval
+    user_id: str = str(fake_db.active_ids()[0])
+
+    async def check(client):
+        before = (await client.get(f'/mcp/users/{user_id}')).json()['response']
+        updated = await client.put(f'/mcp/users/{user_id}', json={'id': user_id, 'email_address': 'new@example.com'})
+        return before, updated
+
+    before, updated = run_app(check)
+    assert updated.status_code == 200
+    row: dict = updated.json()['response']
+    assert row['email_address'] == 'new@example.com'
+    assert row['username'] == before['username']
+    assert row['updated_at'] > before['updated_at']
+
+@pytest.mark.parametrize('write_batch_interval', [0.0, 0.001])
+def test_update_of_a_deleted_or_unknown_user_is_not_found(run_app, fake_db, write_batch_interval):
+    fake_db.write_batch_interval = write_batch_interval
+    deleted: str = str(fake_db.active_ids()[0])
+    unknown: str = str(uuid.uuid4())
+
+    async def check(client):
+        await client.delete(f'/mcp/users/{deleted}')
+        responses: list = [
+            await client.put(f'/mcp/users/{user_id}', json={'id': user_id, 'email_address': 'new@example.com'})
+            for user_id in (deleted, unknown)
+        ]
+        return responses, await client.get(f'/mcp/users/{deleted}')
+
+    responses, user = run_app(check)
+    assert [response.status_code for response in responses] == [404, 404]
+    assert responses[0].json()['message'] == ['user not found.']
+    assert user.status_code == 404
+    assert fake_db.users[uuid.UUID(deleted)]['email_address'] == 'seed0@example.com'
+    assert len(fake_db.users) == 20
@@ -0,0 +1,42 @@
+"""URLEncodingMiddleware"""
+import asyncio
+
+import pytest
+
+from src.main import URLEncodingMiddleware
+
+def encoded(query_string: bytes) -> bytes:
+    """Query string the app behind the middleware receives
+    """
+    received: dict = {}
+
+    async def app(scope, receive, send):
+        received['query_string'] = scope['query_string']
+
+    scope: dict = {'type': 'http', 'query_string': query_string}
+    asyncio.run(URLEncodingMiddleware(app)(scope, None, None))
+    return received['query_string']
+
+@pytest.mark.parametrize('query_string', [b'', b'offset=0&limit=10', b'limit=10&cursor=abc'])
+def test_plain_query_string_passes_through(query_string):
+    assert encoded(query_string) == query_string
+
+@pytest.mark.parametrize('query_string, expected', [
+    (b'offset=0&amp;limit=10', b'offset=0&limit=10'),
+    (b'cursor=WyIyMDI1In0%3D&limit=10', b'cursor=WyIyMDI1In0%3D&limit=10'),
+    (b'limit=&offset=0', b'offset=0'),
+    (b'offset=0&limit=', b'offset=0'),
+    (b'limit&offset=0', b'offset=0'),
+    (b'offset=0&&limit=10', b'offset=0&limit=10'),
+])
+def test_query_string_is_re_encoded(query_string, expected):
+    assert encoded(query_string) == expected
+    assert encoded(query_string) == URLEncodingMiddleware.encode_query_string(query_string)
+
+def test_blank_value_falls_back_to_default(run_app):
+    async def check(client):
+        return await client.get('/mcp/users/?limit=&offset=0')
+
+    response = run_app(check)
+    assert response.status_code == 200
+    assert len(response.json()['response']) == 1
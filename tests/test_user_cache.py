@@ -0,0 +1,89 @@
+"""get_user cache-aside fill against concurrent invalidation"""
+import asyncio
+import time
+import uuid
+
+from benchmarks.fake_db import FakeCockroachDBClient
+from src.helpers.users import cache_key, get_user_data, invalidate_users
+from src.libs.cache import InMemoryCacheBackend, RedisCacheBackend, TTLCache
+from src.models.user import UpdateUser
+from src.models.user_dal import UserDAL
+from tests.test_redis_cache import NAMESPACE, wait_for
+
+def paused_reads(db: FakeCockroachDBClient):
+    """Make reads of db return their rows only once `release` is set; `read` is set when the rows were read
+    """
+    read, release = asyncio.Event(), asyncio.Event()
+    original = db.read
+
+    async def slow_read(query: str, *args, follower_read: bool = False):
+        rows = await original(query, *args, follower_read=follower_read)
+        read.set()
+        await release.wait()
+        return rows
+
+    db.read = slow_read
+    return read, release
+
+async def read_during_update(db: FakeCockroachDBClient, reader_cache, writer_cache, user_id: str):
+    """Read a user while an update of it commits and invalidates the cache, then read it again
+    """
+    read, release = paused_reads(db)
+    reader = asyncio.create_task(get_user_data(UserDAL(db), user_id, reader_cache))
+    await read.wait()
+    await UserDAL(db).update_user(UpdateUser(id=user_id, email_address='new@example.com'))
+    await invalidate_users(writer_cache, [user_id])
+    release.set()
+    during = await reader
+    return during, await get_user_data(UserDAL(db), user_id, reader_cache)
+
+def test_memory_cache_is_not_filled_with_a_row_read_before_an_update():
+    async def main():
+        db = FakeCockroachDBClient(users=1)
+        user_id: str = str(db.active_ids()[0])
+        cache = InMemoryCacheBackend(max_size=10, ttl=60, tombstone_ttl=5)
+        return await read_during_update(db, cache, cache, user_id)
+
+    during, after = asyncio.run(main())
+    assert during['email_address'] == 'seed0@example.com'
+    assert after['email_address'] == 'new@example.com'
+
+def test_redis_cache_is_not_filled_with_a_row_read_before_another_replicas_update(fake_redis):
+    async def main():
+        db = FakeCockroachDBClient(users=1)
+        user_id: str = str(db.active_ids()[0])
+        async with fake_redis as url:
+            reader = RedisCacheBackend(url, ttl=60, namespace=NAMESPACE, near_cache_size=10, tombstone_ttl=5)
+            writer = RedisCacheBackend(url, ttl=60, namespace=NAMESPACE, near_cache_size=10, tombstone_ttl=5)
+            await reader.connect()
+            await writer.connect()
+            try:
+                await wait_for(lambda: fake_redis.subscriber_count(f'{NAMESPACE}:invalidate') == 2)
+                results = await read_during_update(db, reader, writer, user_id)
+                assert fake_redis.get(f'{NAMESPACE}:{cache_key(user_id)}'.encode()) == b''
+                return results
+            finally:
+                await reader.disconnect()
+                await writer.disconnect()
+
+    during, after = asyncio.run(main())
+    assert during['email_address'] == 'seed0@example.com'
+    assert after['email_address'] == 'new@example.com'
+
+def test_tombstone_expires():
+    cache = TTLCache(max_size=10, ttl=60, tombstone_ttl=0.01)
+    cache.set('user', 'old')
+    cache.delete('user')
+    cache.set('user', 'stale')
+    assert cache.get('user') is None
+    time.sleep(0.02)
+    cache.set('user', 'new')
+    assert cache.get('user') == 'new'
+
+def test_delete_without_tombstone_ttl_allows_refill():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set('user', 'old')
+    cache.delete('user')
+    cache.set('user', 'new')
+    assert cache.get('user') == 'new'
+    assert cache.get(str(uuid.uuid4())) is None
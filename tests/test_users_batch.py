@@ -0,0 +1,77 @@
+"""Bulk signup, update and soft delete (/mcp/users/batch)"""
+import uuid
+
+from src.constants import USER_CACHE_MAX_SIZE_VAR
+
+def test_signup_batch_reports_each_user(run_app, fake_db):
+    users: list = [
+        {'username': 'alice', 'email_address': 'alice@example.com'},
+        {'username': 'seed0', 'email_address': 'new@example.com'},
+        {'username': 'bob', 'email_address': 'alice@example.com'},
+        {'username': 'carol', 'email_address': 'carol@example.com'}
+    ]
+
+    async def check(client):
+        return await client.post('/mcp/users/batch', json={'users': users})
+
+    body: dict = run_app(check).json()
+    assert body['status'] is False
+    assert body['message'] == ['2 of 4 items failed.']
+    assert [item['index'] for item in body['response']] == [0, 1, 2, 3]
+    assert [item['status'] for item in body['response']] == [True, False, False, True]
+    assert body['response'][1]['message'] == ['username or email address already exists.']
+    assert body['response'][2]['message'] == ['duplicate username or email address in batch.']
+    assert body['response'][3]['response']['username'] == 'carol'
+    assert len(fake_db.users) == 22
+
+def test_update_batch_isolates_a_taken_email_address(run_app, fake_db):
+    first, second, third = [str(user_id) for user_id in fake_db.active_ids()[:3]]
+    unknown: str = str(uuid.uuid4())
+    users: list = [
+        {'id': first, 'email_address': 'first@example.com'},
+        {'id': second, 'email_address': 'seed5@example.com'},
+        {'id': unknown, 'email_address': 'unknown@example.com'},
+        {'id': first, 'email_address': 'again@example.com'},
+        {'id': third, 'email_address': 'third@example.com'}
+    ]
+
+    async def check(client):
+        response = await client.put('/mcp/users/batch', json={'users': users})
+        return response, await client.get(f'/mcp/users/{first}')
+
+    response, user = run_app(check)
+    body: dict = response.json()
+    assert body['message'] == ['3 of 5 items failed.']
+    assert [item['status'] for item in body['response']] == [True, False, False, False, True]
+    assert [item['message'] for item in body['response']] == [
+        [], ['email address already exists.'], ['user not found.'], ['duplicate user id in batch.'], []
+    ]
+    assert body['response'][4]['response']['email_address'] == 'third@example.com'
+    assert user.json()['response']['email_address'] == 'first@example.com'
+    assert fake_db.users[uuid.UUID(second)]['email_address'] == 'seed1@example.com'
+
+def test_delete_batch_reports_each_id(run_app, fake_db, monkeypatch):
+    monkeypatch.setenv(USER_CACHE_MAX_SIZE_VAR, '100')
+    first, second = [str(user_id) for user_id in fake_db.active_ids()[:2]]
+    unknown: str = str(uuid.uuid4())
+
+    async def check(client):
+        # Cached before the delete, so the delete must invalidate it
+        assert (await client.get(f'/mcp/users/{first}')).status_code == 200
+        response = await client.request('DELETE', '/mcp/users/batch', json={'ids': [first, unknown, first, second]})
+        return response, await client.get(f'/mcp/users/{first}')
+
+    response, user = run_app(check)
+    body: dict = response.json()
+    assert [item['status'] for item in body['response']] == [True, False, False, True]
+    assert [item['message'] for item in body['response']] == [
+        [], ['user not found.'], ['duplicate user id in batch.'], []
+    ]
+    assert user.status_code == 404
+    assert len(fake_db.active_ids()) == 18
+
+def test_batch_size_is_limited(run_app, fake_db):
+    async def check(client):
+        return await client.request('DELETE', '/mcp/users/batch', json={'ids': []})
+
+    assert run_app(check).status_code == 422
@@ -0,0 +1,32 @@
+"""POST /mcp/users/lookup"""
+import uuid
+
+from src.constants import USERS_LOOKUP_MAX_IDS
+
+def test_lookup_keeps_request_order_and_lists_missing_ids(run_app, fake_db):
+    first, second, inactive = [str(user_id) for user_id in fake_db.active_ids()[:3]]
+    fake_db.users[uuid.UUID(inactive)]['active'] = False
+    unknown: str = str(uuid.uuid4())
+
+    async def check(client):
+        return await client.post('/mcp/users/lookup', json={'ids': [second, unknown, first, inactive, second]})
+
+    response = run_app(check)
+    assert response.status_code == 200
+    body: dict = response.json()
+    assert [user['id'] for user in body['response']] == [second, first]
+    assert body['missing_ids'] == [unknown, inactive]
+
+def test_lookup_rejects_too_many_ids(run_app, fake_db):
+    async def check(client):
+        ids: list = [str(uuid.uuid4()) for _ in range(USERS_LOOKUP_MAX_IDS + 1)]
+        return await client.post('/mcp/users/lookup', json={'ids': ids})
+
+    assert run_app(check).status_code == 422
+    assert fake_db.queries == 0
+
+def test_lookup_rejects_malformed_ids(run_app):
+    async def check(client):
+        return await client.post('/mcp/users/lookup', json={'ids': ['not-a-uuid']})
+
+    assert run_app(check).status_code == 422
@@ -0,0 +1,88 @@
+"""Write batching of update_user and delete_user (WriteCoalescer)"""
+import asyncio
+import uuid
+
+from src.models import user_dal
+from src.models.user import UpdateUser
+from src.models.user_dal import UserDAL
+
+def batched(fake_db, interval: float, max_size: int = 100, queue_size: int = 100, latency: float = 0.0):
+    """Make update_user and delete_user on fake_db go through the write coalescers
+    """
+    fake_db.write_batch_interval = interval
+    fake_db.write_batch_max_size = max_size
+    fake_db.write_queue_size = queue_size
+    fake_db.latency = latency
+    return UserDAL(fake_db)
+
+def update(dal: UserDAL, user_id: str, email_address: str):
+    """update_user call
+    """
+    return dal.update_user(UpdateUser(id=user_id, email_address=email_address))
+
+def test_updates_of_one_user_apply_in_arrival_order_within_a_group(fake_db):
+    dal = batched(fake_db, interval=0.01)
+    first, second = [str(user_id) for user_id in fake_db.active_ids()[:2]]
+
+    async def main():
+        return await asyncio.gather(
+            update(dal, first, 'a@example.com'), update(dal, second, 'b@example.com'),
+            update(dal, first, 'c@example.com'), update(dal, first, 'd@example.com')
+        )
+
+    rows = asyncio.run(main())
+    assert [row['email_address'] for row in rows] == ['a@example.com', 'b@example.com', 'c@example.com', 'd@example.com']
+    assert fake_db.users[uuid.UUID(first)]['email_address'] == 'd@example.com'
+    assert fake_db.coalescers[user_dal.UPDATE_USERS_STMT].stats()['flushes'] == 1
+
+def test_a_failing_update_is_isolated_from_its_group(fake_db):
+    dal = batched(fake_db, interval=0.01)
+    first, second, third = [str(user_id) for user_id in fake_db.active_ids()[:3]]
+    unknown: str = str(uuid.uuid4())
+
+    async def main():
+        return await asyncio.gather(
+            update(dal, first, 'first@example.com'), update(dal, second, 'seed5@example.com'),
+            update(dal, unknown, 'unknown@example.com'), update(dal, third, 'third@example.com'),
+            return_exceptions=True
+        )
+
+    updated, taken, missing, other = asyncio.run(main())
+    assert updated['email_address'] == 'first@example.com'
+    assert isinstance(taken, RuntimeError)
+    assert str(taken).startswith('Failed to update user: duplicate key value violates unique constraint')
+    assert missing is None
+    assert other['email_address'] == 'third@example.com'
+    assert fake_db.users[uuid.UUID(second)]['email_address'] == 'seed1@example.com'
+    assert fake_db.coalescers[user_dal.UPDATE_USERS_STMT].stats()['failed_flushes'] == 0
+
+def test_a_full_queue_holds_back_callers_until_a_group_is_committed(fake_db):
+    dal = batched(fake_db, interval=0.001, max_size=2, queue_size=2, latency=0.05)
+    ids: list = [str(user_id) for user_id in fake_db.active_ids()[:8]]
+
+    async def main():
+        deletes = asyncio.gather(*[dal.delete_user(id=user_id) for user_id in ids])
+        # The first group is committing: two more writes are queued and the others wait to be
+        await asyncio.sleep(0.02)
+        during: dict = fake_db.coalescers[user_dal.DELETE_USERS_STMT].stats()
+        await deletes
+        return during
+
+    during = asyncio.run(main())
+    assert during == {'writes': 4, 'flushes': 1, 'failed_flushes': 0, 'queued': 2}
+    assert fake_db.coalescers[user_dal.DELETE_USERS_STMT].stats()['flushes'] == 4
+    assert len(fake_db.active_ids()) == 12
+
+def test_close_commits_the_queued_writes(fake_db):
+    dal = batched(fake_db, interval=10)
+    ids: list = [str(user_id) for user_id in fake_db.active_ids()[:3]]
+
+    async def main():
+        deletes = [asyncio.create_task(dal.delete_user(id=user_id)) for user_id in ids]
+        await asyncio.sleep(0)
+        await asyncio.wait_for(fake_db.disconnect(), timeout=1)
+        return [delete.done() for delete in deletes]
+
+    assert asyncio.run(main()) == [True, True, True]
+    assert len(fake_db.active_ids()) == 17
+    assert fake_db.coalescers[user_dal.DELETE_USERS_STMT].stats()['flushes'] == 1